@@ -0,0 +1,82 @@
+# benchmarks/bench_inicializacao.py
+# Tempo de inicialização do main_app: com os módulos de lógica importados sob
+# demanda (como está hoje) e com eles importados antes da janela (como era).
+# Cada medição roda em um interpretador novo. Com um display disponível, mede
+# também até a primeira pintura da janela (App() + update()).
+#
+# Uso (a partir da pasta Controle_de_Aglomeracoes):
+#   python -m benchmarks.bench_inicializacao --repeticoes 5
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+
+MODOS = ['sob_demanda', 'antecipado']
+
+# Código do processo filho: importa o main_app (e, no modo antecipado, os módulos
+# de lógica, como o main_app fazia no topo do arquivo) e tenta abrir a janela
+CODIGO_FILHO = '''
+import json, sys, time
+inicio = time.perf_counter()
+import main_app
+if sys.argv[1] == 'antecipado':
+    for nome in main_app.MODULOS_LOGICA: __import__(nome)
+importacao = time.perf_counter() - inicio
+pandas_carregado = 'pandas' in sys.modules
+janela = None
+try:
+    app = main_app.App()
+    app.update()
+    janela = time.perf_counter() - inicio
+    app.destroy()
+except Exception:
+    pass
+print(json.dumps({'importacao_s': importacao, 'janela_s': janela, 'pandas_carregado': pandas_carregado}))
+'''
+
+def medir(modo):
+    """Uma inicialização em um processo novo: tempos internos e tempo total do processo."""
+    inicio = time.perf_counter()
+    saida = subprocess.run([sys.executable, '-c', CODIGO_FILHO, modo], cwd=PASTA_PROJETO,
+                           capture_output=True, text=True, check=True)
+    total = time.perf_counter() - inicio
+    r = json.loads(saida.stdout.strip().splitlines()[-1])
+    r['processo_s'] = total
+    return r
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de inicialização do main_app (importação sob demanda x antecipada)')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    medir('sob_demanda')  # Aquece o cache de disco e os .pyc
+    resultados = {}
+    for modo in MODOS:
+        rodadas = [medir(modo) for _ in range(args.repeticoes)]
+        janelas = [r['janela_s'] for r in rodadas if r['janela_s'] is not None]
+        resultados[modo] = {
+            'importacao_s': min(r['importacao_s'] for r in rodadas),
+            'janela_s': min(janelas) if janelas else None,
+            'processo_s': min(r['processo_s'] for r in rodadas),
+            'pandas_carregado': rodadas[0]['pandas_carregado'],
+        }
+
+    print(f"{'Modo':<14}{'Importação (s)':>16}{'Janela (s)':>12}{'Processo (s)':>14}{'pandas':>8}")
+    for modo, r in resultados.items():
+        janela = '-' if r['janela_s'] is None else f"{r['janela_s']:.3f}"
+        print(f"{modo:<14}{r['importacao_s']:>16.3f}{janela:>12}{r['processo_s']:>14.3f}{'sim' if r['pandas_carregado'] else 'não':>8}")
+    if resultados['sob_demanda']['janela_s'] is None:
+        print("(sem display: a janela não foi aberta, só a importação foi medida)")
+
+    ganho = resultados['antecipado']['importacao_s'] - resultados['sob_demanda']['importacao_s']
+    print(f"\nA janela deixa de esperar {ganho:.2f} s de importações.")
+    # A inicialização sob demanda não pode carregar o pandas antes da janela
+    return 1 if resultados['sob_demanda']['pandas_carregado'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
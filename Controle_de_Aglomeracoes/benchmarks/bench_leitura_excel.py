@@ -0,0 +1,84 @@
+# benchmarks/bench_leitura_excel.py
+# Compara pd.read_excel com a leitura em streaming (logic_storage.ler_excel):
+# tempo de carga e pico de memória (RSS), cada método em um processo separado.
+#
+# Uso (a partir da pasta Controle_de_Aglomeracoes):
+#   python -m benchmarks.bench_leitura_excel --linhas 300000
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+if str(PASTA_PROJETO) not in sys.path:
+    sys.path.insert(0, str(PASTA_PROJETO))
+
+METODOS = ['read_excel', 'read_excel_usecols', 'streaming']
+
+def pico_rss_mb():
+    """Pico de memória residente do processo atual, em MB (None se não der para medir)."""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 1024 / 1024 if sys.platform == 'darwin' else pico / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 / 1024
+    except ImportError:
+        return None
+
+def medir(metodo, arquivo):
+    """Executa um método de leitura e devolve tempo e memória (roda no processo filho)."""
+    import pandas as pd
+    import logic_storage
+
+    rss_inicial = pico_rss_mb()
+    inicio = time.perf_counter()
+    if metodo == 'read_excel':
+        df = pd.read_excel(arquivo)
+    elif metodo == 'read_excel_usecols':
+        df = pd.read_excel(arquivo, usecols=logic_storage.COLUNAS_CONTAGEM)
+    else:
+        df = logic_storage.ler_excel(arquivo, logic_storage.COLUNAS_CONTAGEM)
+    tempo = time.perf_counter() - inicio
+    rss_final = pico_rss_mb()
+    return {
+        'metodo': metodo, 'linhas': len(df), 'tempo_s': round(tempo, 3),
+        'pico_rss_mb': None if rss_final is None else round(rss_final, 1),
+        'acrescimo_rss_mb': None if rss_final is None else round(rss_final - rss_inicial, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo e memória da leitura da planilha de contagem')
+    parser.add_argument('--linhas', type=int, default=300_000)
+    parser.add_argument('--arquivo', help='planilha a usar (padrão: gera uma sintética)')
+    parser.add_argument('--medir', choices=METODOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.arquivo)))
+        return
+
+    arquivo = Path(args.arquivo) if args.arquivo else PASTA_PROJETO / 'benchmarks' / f'contagem_sintetica_{args.linhas}.xlsx'
+    if not arquivo.exists():
+        from benchmarks import dados_sinteticos
+        print(f"Gerando planilha sintética com {args.linhas:,} linhas em {arquivo}...")
+        dados_sinteticos.gerar_planilha(arquivo, args.linhas)
+
+    print(f"{'Método':<22}{'Linhas':>10}{'Tempo (s)':>12}{'Pico RSS (MB)':>16}{'Acréscimo (MB)':>17}")
+    for metodo in METODOS:
+        saida = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_leitura_excel', '--medir', metodo, '--arquivo', str(arquivo)],
+            cwd=PASTA_PROJETO, capture_output=True, text=True, check=True
+        )
+        r = json.loads(saida.stdout.strip().splitlines()[-1])
+        print(f"{r['metodo']:<22}{r['linhas']:>10,}{r['tempo_s']:>12.2f}{str(r['pico_rss_mb']):>16}{str(r['acrescimo_rss_mb']):>17}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/bench_parse_logradouro.py
+# Custo por linha do parse_logradouro escalar: a versão original (regex montado
+# por f-string a cada chamada), o ParserLogradouro pré-compilado sem cache e o
+# mesmo parser com o cache em memória já aquecido. Confere antes que as três
+# versões dão o mesmo resultado nos endereços sintéticos e em textos aleatórios.
+#
+# Uso (a partir da pasta Controle_de_Aglomeracoes):
+#   python -m benchmarks.bench_parse_logradouro --enderecos 3000 --repeticoes 5
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+if str(PASTA_PROJETO) not in sys.path:
+    sys.path.insert(0, str(PASTA_PROJETO))
+
+import logic_parser
+from logic_parser import PATTERN_TIPOS
+from benchmarks import dados_sinteticos
+
+LINHAS_POR_ENDERECO = 20  # Cada endereço se repete na coluna, como na planilha real
+
+def parse_logradouro_original(logradouro_original):
+    """parse_logradouro como era antes do ParserLogradouro (referência de resultado e de tempo)."""
+    resultado = {
+        'tipo_logradouro': '', 'nome_logradouro': '', 'numero_logradouro': '',
+        'complemento_logradouro': '', 'logradouro_padronizado': ''
+    }
+    if pd.isna(logradouro_original) or str(logradouro_original).strip() == '':
+        return resultado
+    logradouro = str(logradouro_original).strip()
+
+    if ' - ' in logradouro:
+        partes = logradouro.split(' - ', 1)
+        parte_principal = partes[0].strip()
+        resultado['complemento_logradouro'] = partes[1].strip()
+    else:
+        parte_principal = logradouro
+
+    tipo_nome = parte_principal
+    numero = ''
+    if ',' in parte_principal:
+        partes = parte_principal.split(',', 1)
+        tipo_nome = partes[0].strip()
+        numero = partes[1].strip()
+    else:
+        match = re.search(r'\s+(\d+[A-Za-z]?)$', parte_principal)
+        if match:
+            numero = match.group(1).strip()
+            tipo_nome = parte_principal[:match.start()].strip()
+    resultado['numero_logradouro'] = numero
+
+    tipo_match = re.match(rf'^({PATTERN_TIPOS})\b', tipo_nome, re.IGNORECASE)
+    if tipo_match:
+        resultado['tipo_logradouro'] = tipo_match.group(1).title()
+        resultado['nome_logradouro'] = tipo_nome[tipo_match.end():].strip()
+    else:
+        partes = tipo_nome.split(maxsplit=1)
+        if len(partes) >= 2:
+            resultado['tipo_logradouro'] = partes[0].title()
+            resultado['nome_logradouro'] = partes[1]
+        elif len(partes) == 1:
+            resultado['nome_logradouro'] = partes[0]
+
+    for key in resultado:
+        if resultado[key] and key != 'logradouro_padronizado':
+            resultado[key] = ' '.join(resultado[key].split())
+
+    logr_padrao = resultado['tipo_logradouro']
+    if resultado['nome_logradouro']:
+        logr_padrao += ' ' + resultado['nome_logradouro']
+    if resultado['numero_logradouro']:
+        logr_padrao += ', ' + resultado['numero_logradouro']
+    if resultado['complemento_logradouro']:
+        logr_padrao += ' - ' + resultado['complemento_logradouro']
+    resultado['logradouro_padronizado'] = logr_padrao.strip()
+    return resultado
+
+def textos_aleatorios(n, semente=11):
+    """Textos curtos com os caracteres que mexem no parse (vírgula, ' - ', dígitos, espaços variados)."""
+    rng = np.random.default_rng(semente)
+    pedacos = ['Rua', 'rua', 'AV.', 'Praça', 'Viela', ' ', '  ', '\t', ',', ' - ', '-', '12', '7B', 'x', 'São', '\n', '0']
+    return [''.join(rng.choice(pedacos, size=rng.integers(1, 9))) for _ in range(n)]
+
+def conferir(valores):
+    """Valores em que alguma versão diverge da original."""
+    parser = logic_parser.ParserLogradouro()
+    divergentes = []
+    for valor in valores:
+        esperado = parse_logradouro_original(valor)
+        if parser.parse(valor) != esperado or parser(valor) != esperado or parser(valor) != esperado:
+            divergentes.append(valor)
+    return divergentes
+
+def cronometrar(funcao, coluna, repeticoes):
+    """Menor tempo por linha (µs) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for valor in coluna:
+            funcao(valor)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) / len(coluna) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Custo por linha do parse_logradouro escalar (original x pré-compilado x cache)')
+    parser.add_argument('--enderecos', type=int, default=3000, help='endereços distintos')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    enderecos = dados_sinteticos.gerar_enderecos(args.enderecos)
+    divergentes = conferir(enderecos + textos_aleatorios(20_000) + [None, float('nan'), 12, 12.0, True, ''])
+    if divergentes:
+        print(f"❌ {len(divergentes)} valor(es) com resultado diferente do original, ex.: {divergentes[:5]!r}")
+        return 1
+
+    rng = np.random.default_rng(3)
+    coluna = [enderecos[i] for i in rng.integers(len(enderecos), size=len(enderecos) * LINHAS_POR_ENDERECO)]
+    aquecido = logic_parser.ParserLogradouro()
+    for valor in enderecos:
+        aquecido(valor)
+
+    resultados = {
+        'original': cronometrar(parse_logradouro_original, coluna, args.repeticoes),
+        'pre_compilado': cronometrar(logic_parser.ParserLogradouro().parse, coluna, args.repeticoes),
+        'com_cache': cronometrar(aquecido, coluna, args.repeticoes),
+    }
+    print(f"{len(coluna):,} linhas ({len(enderecos):,} endereços distintos), resultados conferidos com o original\n")
+    print(f"{'Versão':<16}{'µs/linha':>10}{'Ganho':>8}")
+    for versao, micros in resultados.items():
+        print(f"{versao:<16}{micros:>10.3f}{resultados['original'] / micros:>7.1f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# benchmarks/bench_pipeline.py
+# Casos de desempenho do parser e dos relatórios em planilhas sintéticas de
+# 10k e 100k linhas (1M só tem linha de base para parse_logradouro), comparados com a linha de base gravada em
+# benchmarks/baseline.json. Cada caso roda em um processo separado, dentro de
+# uma cópia temporária do projeto (data/ e docs/ do projeto não são tocados).
+#
+# Uso (a partir da pasta Controle_de_Aglomeracoes):
+#   python -m benchmarks.bench_pipeline                       # 10k e 100k, compara com a base
+#   python -m benchmarks.bench_pipeline --tamanhos 100k --repeticoes 1
+#   python -m benchmarks.bench_pipeline --salvar-baseline     # regrava a linha de base
+#   python -m pytest tests/test_benchmarks.py --benchmarks    # os mesmos casos pelo pytest (CI)
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+PASTA_BENCHMARKS = PASTA_PROJETO / 'benchmarks'
+ARQUIVO_BASELINE = PASTA_BENCHMARKS / 'baseline.json'
+if str(PASTA_PROJETO) not in sys.path:
+    sys.path.insert(0, str(PASTA_PROJETO))
+
+from logic_profiler import pico_memoria_mb
+
+TAMANHOS = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+CASOS = ['parse_logradouro', 'execute_parser', 'execute_report_generator', 'gerar_relatorio_quadras']
+N_DIAS = 60
+DATA_INICIO = datetime(2025, 1, 1)
+DIAS_RELATORIO = 4
+TOLERANCIA = 1.25  # Regressão: caso mais lento que a base por mais que esse fator
+
+# --- Planilhas e Ambiente ---
+
+def planilha_sintetica(linhas):
+    """Planilha sintética do tamanho pedido (gerada uma vez e reaproveitada)."""
+    from benchmarks import dados_sinteticos
+    arquivo = PASTA_BENCHMARKS / f'contagem_sintetica_{linhas}_{N_DIAS}d.xlsx'
+    if not arquivo.exists():
+        print(f"Gerando planilha sintética com {linhas:,} linhas em {arquivo.name}...", flush=True)
+        dados_sinteticos.gerar_planilha(arquivo, linhas, n_dias=N_DIAS, data_inicio=DATA_INICIO)
+    return arquivo
+
+def preparar_ambiente(destino):
+    """Cópia mínima do projeto (módulos, mapeamento e benchmarks) com data/ e docs/ vazias."""
+    destino = Path(destino)
+    for arquivo in PASTA_PROJETO.glob('*.py'):
+        shutil.copy2(arquivo, destino)
+    for arquivo in PASTA_PROJETO.glob('Mapeamento_FINAL_editado.*'):
+        shutil.copy2(arquivo, destino)
+    (destino / 'benchmarks').mkdir()
+    for arquivo in PASTA_BENCHMARKS.glob('*.py'):
+        shutil.copy2(arquivo, destino / 'benchmarks')
+    (destino / 'data' / 'processed').mkdir(parents=True)
+    (destino / 'docs').mkdir()
+    return destino
+
+# --- Casos (rodam no processo filho) ---
+
+def _sem_log(mensagem):
+    pass
+
+def _intervalo_relatorio():
+    """Últimos DIAS_RELATORIO dias da planilha sintética."""
+    data_fim = DATA_INICIO + timedelta(days=N_DIAS - 1)
+    return data_fim - timedelta(days=DIAS_RELATORIO - 1), data_fim
+
+def _limpar_cache_parser():
+    """Cada repetição do parser começa sem o cache persistente de logradouros."""
+    import logic_parser
+    cache = Path('data') / 'processed' / logic_parser.ARQUIVO_CACHE_LOGRADOUROS
+    if cache.exists():
+        cache.unlink()
+
+def montar_caso(caso, arquivo):
+    """Prepara o caso (etapas anteriores fora da medição). Retorna a função medida."""
+    import logic_parser
+    import logic_report
+    import quadras_report
+
+    if caso == 'parse_logradouro':
+        import logic_storage
+        serie = logic_storage.ler_excel(arquivo, ['Logradouro'], tipar=False)['Logradouro']
+        return lambda: logic_parser.parse_logradouro_serie(serie)
+
+    if caso == 'execute_parser':
+        def executar():
+            _limpar_cache_parser()
+            processado, _ = logic_parser.execute_parser(arquivo, _sem_log)
+            if processado is None: raise RuntimeError('execute_parser falhou')
+        return executar
+
+    processado, _ = logic_parser.execute_parser(arquivo, _sem_log)
+    data_inicio, data_fim = _intervalo_relatorio()
+    if caso == 'execute_report_generator':
+        def executar():
+            planilha, _ = logic_report.execute_report_generator(processado, data_inicio, data_fim, _sem_log)
+            if planilha is None: raise RuntimeError('execute_report_generator falhou')
+        return executar
+
+    planilha, _ = logic_report.execute_report_generator(processado, data_inicio, data_fim, _sem_log)
+    return lambda: quadras_report.gerar_relatorio_quadras(planilha, _sem_log)
+
+def medir(caso, arquivo, repeticoes):
+    """Tempo (menor e mediana das repetições) e pico de memória de um caso."""
+    funcao = montar_caso(caso, arquivo)
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+        time.sleep(1)  # Os arquivos gerados levam o segundo no nome
+    tempos.sort()
+    pico = pico_memoria_mb()
+    return {
+        'min_s': round(tempos[0], 4), 'mediana_s': round(tempos[len(tempos) // 2], 4),
+        'repeticoes': repeticoes, 'pico_rss_mb': None if pico is None else round(pico, 1),
+    }
+
+def medir_em_ambiente(caso, tamanho, repeticoes):
+    """Mede um caso em um processo filho, dentro de uma cópia temporária do projeto."""
+    arquivo = planilha_sintetica(TAMANHOS[tamanho])
+    with tempfile.TemporaryDirectory(prefix='bench_') as pasta:
+        preparar_ambiente(pasta)
+        saida = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_pipeline', '--medir', caso,
+             '--arquivo', str(arquivo), '--repeticoes', str(repeticoes)],
+            cwd=pasta, capture_output=True, text=True, check=True
+        )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+# --- Linha de Base ---
+
+def ambiente_atual():
+    import numpy as np
+    import pandas as pd
+    import openpyxl
+    return {
+        'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+        'openpyxl': openpyxl.__version__, 'sistema': platform.platform(), 'processador': platform.processor(),
+    }
+
+def carregar_baseline():
+    if not ARQUIVO_BASELINE.exists():
+        return {}
+    with open(ARQUIVO_BASELINE, encoding='utf-8') as f:
+        return json.load(f)
+
+def referencia(baseline, caso, tamanho):
+    """Menor tempo gravado na linha de base para o caso e o tamanho, ou None."""
+    return baseline.get('casos', {}).get(caso, {}).get(tamanho, {}).get('min_s')
+
+def salvar_baseline(resultados):
+    """Grava (ou atualiza, tamanho a tamanho) a linha de base."""
+    baseline = carregar_baseline()
+    baseline['gerado_em'] = datetime.now().isoformat(timespec='seconds')
+    baseline['ambiente'] = ambiente_atual()
+    casos = baseline.setdefault('casos', {})
+    for caso, por_tamanho in resultados.items():
+        casos.setdefault(caso, {}).update(por_tamanho)
+    with open(ARQUIVO_BASELINE, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks do parser e dos relatórios em planilhas sintéticas')
+    parser.add_argument('--tamanhos', nargs='+', choices=list(TAMANHOS), default=['10k', '100k'])
+    parser.add_argument('--casos', nargs='+', choices=CASOS, default=CASOS)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--salvar-baseline', action='store_true', help='grava os resultados como linha de base')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA, help=f'fator de regressão (padrão: {TOLERANCIA})')
+    parser.add_argument('--medir', choices=CASOS, help=argparse.SUPPRESS)
+    parser.add_argument('--arquivo', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.arquivo, args.repeticoes)))
+        return 0
+
+    baseline = carregar_baseline()
+    resultados, regressoes, sem_base = {}, [], []
+    print(f"{'Caso':<28}{'Tamanho':>8}{'Mín (s)':>10}{'Mediana (s)':>13}{'Pico RSS (MB)':>15}{'Base (s)':>10}{'Razão':>8}")
+    for tamanho in args.tamanhos:
+        for caso in args.casos:
+            r = medir_em_ambiente(caso, tamanho, args.repeticoes)
+            resultados.setdefault(caso, {})[tamanho] = r
+
+            base = referencia(baseline, caso, tamanho)
+            razao = r['min_s'] / base if base else None
+            if base is None:
+                sem_base.append((caso, tamanho))
+            elif razao > args.tolerancia:
+                regressoes.append((caso, tamanho, razao))
+            print(f"{caso:<28}{tamanho:>8}{r['min_s']:>10.3f}{r['mediana_s']:>13.3f}{str(r['pico_rss_mb']):>15}"
+                  f"{'sem base' if base is None else f'{base:.3f}':>10}{'-' if razao is None else f'{razao:.2f}x':>8}",
+                  flush=True)
+
+    if sem_base and not args.salvar_baseline:
+        print(f"\n⚠️  {len(sem_base)} caso(s) sem linha de base (não comparados):")
+        for caso, tamanho in sem_base:
+            print(f"  • {caso} ({tamanho})")
+
+    if args.salvar_baseline:
+        salvar_baseline(resultados)
+        print(f"\n✓ Linha de base gravada em {ARQUIVO_BASELINE}")
+    elif regressoes:
+        print(f"\n❌ {len(regressoes)} caso(s) acima de {args.tolerancia:.2f}x a linha de base:")
+        for caso, tamanho, razao in regressoes:
+            print(f"  • {caso} ({tamanho}): {razao:.2f}x")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
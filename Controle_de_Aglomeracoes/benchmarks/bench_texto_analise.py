@@ -0,0 +1,121 @@
+# benchmarks/bench_texto_analise.py
+# Custo de montar a seção de variações do texto de análise com 10k variações:
+# a versão original (um dicionário por variação, como detectar_variacoes
+# devolvia, e uma f-string por linha em um laço) e a atual (colunas de
+# detectar_variacoes formatadas em lote por formatar_variacoes). Mede também
+# o generate_analysis_text completo. Confere antes que as linhas são as mesmas.
+#
+# Uso (a partir da pasta Controle_de_Aglomeracoes):
+#   python -m benchmarks.bench_texto_analise --variacoes 10000 --repeticoes 5
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+if str(PASTA_PROJETO) not in sys.path:
+    sys.path.insert(0, str(PASTA_PROJETO))
+
+import logic_text_generator
+from logic_report import DIFERENCA_MINIMA, PERIODOS
+from benchmarks import dados_sinteticos
+
+def variacoes_sinteticas(n, semente=5):
+    """Colunas de n variações no formato de logic_report.detectar_variacoes."""
+    rng = np.random.default_rng(semente)
+    enderecos = np.array(dados_sinteticos.gerar_enderecos(max(n // 10, 1)), dtype=object)
+    rotulos = np.array([(datetime(2025, 1, 1) + timedelta(days=d)).strftime('%d/%m') for d in range(61)], dtype=object)
+    dia = rng.integers(60, size=n)
+    v1 = rng.integers(0, 80, size=n).astype(np.int32)
+    dif = rng.choice([-1, 1], size=n) * rng.integers(10, 60, size=n)
+    v2 = np.maximum(v1 + dif, 0).astype(np.int32)
+    dif = v2 - v1
+    pct = np.where(v1 > 0, dif / np.where(v1 > 0, v1, 1) * 100, 100.0)
+    return {
+        'logradouro': enderecos[rng.integers(len(enderecos), size=n)],
+        'periodo': np.array(PERIODOS, dtype=object)[rng.integers(len(PERIODOS), size=n)],
+        'd1': rotulos[dia], 'd2': rotulos[dia + 1],
+        'v1': v1, 'v2': v2, 'pct': pct, 'dif_bruta': dif,
+    }
+
+def dicionarios(colunas):
+    """Um dicionário por variação, como detectar_variacoes montava antes."""
+    return [
+        {'logradouro': colunas['logradouro'][k], 'periodo': colunas['periodo'][k],
+         'd1': colunas['d1'][k], 'd2': colunas['d2'][k],
+         'v1': colunas['v1'][k].item(), 'v2': colunas['v2'][k].item(),
+         'pct': colunas['pct'][k].item(), 'dif_bruta': colunas['dif_bruta'][k].item()}
+        for k in range(len(colunas['dif_bruta']))
+    ]
+
+def formatar_original(variations_list):
+    """_format_extreme_variations como era antes dos modelos (referência de resultado e de tempo)."""
+    linhas = []
+    for var in variations_list:
+        seta = "🔺" if var['dif_bruta'] > 0 else "🔻"
+        tipo = "aumento" if var['dif_bruta'] > 0 else "diminuição"
+        texto = (
+            f"{seta} {var['logradouro']}: passou de {int(var['v1'])} para {int(var['v2'])} pessoas "
+            f"({var['periodo'].capitalize()} de {var['d1']} para {var['d2']}). "
+            f"Uma {tipo} de {abs(var['pct']):.1f}% em 24h."
+        )
+        linhas.append(texto)
+    return "\n".join(linhas)
+
+def dados_relatorio(colunas):
+    """report_data mínimo para o generate_analysis_text."""
+    dia = datetime(2025, 2, 14)
+    periodo = {'total': 812.0, 'enderecos': 23, 'soma_aglom': 511.0}
+    return {
+        'regiao': 'Santa Cecília, Campos Elíseos e Santa Ifigênia', 'limiar': 10, 'diferenca_minima': DIFERENCA_MINIMA,
+        'data_inicio': dia - timedelta(days=59), 'data_fim': dia,
+        'data_inicio_anterior': dia - timedelta(days=60), 'data_fim_anterior': dia - timedelta(days=1),
+        'hoje': datetime.now(), 'media_atual': 2950, 'media_anterior': 3010, 'variacao': -2.0,
+        'ultimo_dia_val': dia, 'ultimo_dia_noite': dia - timedelta(days=1),
+        'ultimo_dia_por_periodo': [(p, periodo) for p in PERIODOS],
+        'top_5_logradouros': [(f'Rua {i}', 100 - i) for i in range(5)],
+        'top_por_periodo': [(p, [(f'Rua {i}', 100 - i) for i in range(5)]) for p in PERIODOS],
+        'top_k': 5, 'dias_top': 3,
+        'variacoes_extremas': colunas, 'ref_texto': 'ontem', 'medias_moveis': [],
+    }
+
+def cronometrar(funcao, repeticoes):
+    """Menor tempo (ms) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description='Seção de variações do texto de análise (laço original x modelos em lote)')
+    parser.add_argument('--variacoes', type=int, default=10_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    colunas = variacoes_sinteticas(args.variacoes)
+    lista = dicionarios(colunas)
+    if logic_text_generator._format_extreme_variations(colunas, DIFERENCA_MINIMA) != formatar_original(lista):
+        print("❌ As linhas em lote diferem das da versão original")
+        return 1
+
+    dados = dados_relatorio(colunas)
+    resultados = {
+        'original (laço)': cronometrar(lambda: formatar_original(lista), args.repeticoes),
+        'original + dicts': cronometrar(lambda: formatar_original(dicionarios(colunas)), args.repeticoes),
+        'em lote': cronometrar(lambda: logic_text_generator._format_extreme_variations(colunas, DIFERENCA_MINIMA), args.repeticoes),
+        'texto completo': cronometrar(lambda: logic_text_generator.generate_analysis_text(dados), args.repeticoes),
+    }
+    print(f"{args.variacoes:,} variações, linhas conferidas com a versão original\n")
+    print(f"{'Versão':<18}{'ms':>9}{'Ganho':>8}")
+    for versao, ms in resultados.items():
+        print(f"{versao:<18}{ms:>9.2f}{resultados['original + dicts'] / ms:>7.1f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
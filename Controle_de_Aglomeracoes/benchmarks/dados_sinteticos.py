@@ -0,0 +1,134 @@
+# benchmarks/dados_sinteticos.py
+# Gerador de planilhas de contagem sintéticas (mesmo layout da planilha Raw)
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+from openpyxl import Workbook
+
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+ARQUIVO_MAPEAMENTO = PASTA_PROJETO / 'Mapeamento_FINAL_editado.xlsx'
+
+RUAS_PADRAO = [
+    'Rua Augusta', 'Praça Princesa Isabel', 'Viaduto Orlando Murgel', 'Largo do Arouche',
+    'Alameda Glete', 'Rua Helvétia', 'Alameda Barão de Limeira', 'Avenida São João',
+    'Rua dos Gusmões', 'Alameda Cleveland', 'Rua Mauá', 'Avenida Duque de Caxias',
+]
+
+# Os quatro formatos de período das planilhas: padrão, invertido e as variações
+# sem zero à esquerda / em minúsculas que o parser normaliza pelo fallback
+FORMATOS_PERIODO = ['{hora:02d}h - {nome}', '{nome} - {hora:02d}h', '{hora}h-{minusculo}', '{minusculo} -{hora}h']
+PESOS_FORMATOS_PERIODO = [0.6, 0.25, 0.1, 0.05]
+HORARIOS = [(5, 'Madrugada'), (10, 'Manhã'), (15, 'Tarde'), (20, 'Noite')]
+
+PERIODOS = [
+    formato.format(hora=hora, nome=nome, minusculo=nome.lower())
+    for formato in FORMATOS_PERIODO for hora, nome in HORARIOS
+]
+PESOS_PERIODOS = np.repeat(PESOS_FORMATOS_PERIODO, len(HORARIOS)) / len(HORARIOS)
+
+# Nomes para ruas fora do mapeamento (com os tipos de logradouro reconhecidos pelo parser)
+NOMES_FORA_DO_MAPEAMENTO = [
+    'das Flores', 'São Bento', 'Benjamin Constant', 'do Triunfo', 'Vitória', 'dos Andradas',
+    'Conselheiro Nébias', 'General Osório', 'Santa Ifigênia', 'do Seminário', 'Aurora', 'Guaianases',
+]
+
+EQUIPES = ['Equipe A', 'Equipe B', 'Equipe C', 'Equipe D']
+
+# Colunas extras, que existem na planilha mas não são usadas nos relatórios
+COLUNAS_EXTRAS = ['Obs', 'Responsável', 'Latitude', 'Longitude']
+
+def _nomes_de_ruas():
+    """Nomes do mapeamento de quadras (ou uma lista fixa, se ele não estiver disponível)."""
+    if ARQUIVO_MAPEAMENTO.exists():
+        return pd.read_excel(ARQUIVO_MAPEAMENTO)['Nome Original'].dropna().unique().tolist()
+    return RUAS_PADRAO
+
+def _ruas_fora_do_mapeamento(rng, n_ruas):
+    """Ruas inventadas com prefixos de logic_parser.TIPOS_LOGRADOURO (às vezes abreviados ou em minúsculas)."""
+    from logic_parser import TIPOS_LOGRADOURO
+    ruas = []
+    for _ in range(n_ruas):
+        tipo = TIPOS_LOGRADOURO[rng.integers(len(TIPOS_LOGRADOURO))]
+        grafia = rng.choice(3, p=[0.7, 0.2, 0.1])
+        if grafia == 1: tipo = tipo.lower()
+        elif grafia == 2: tipo = tipo[:2] + '.'
+        ruas.append(f"{tipo} {NOMES_FORA_DO_MAPEAMENTO[rng.integers(len(NOMES_FORA_DO_MAPEAMENTO))]}")
+    return ruas
+
+def gerar_enderecos(n_enderecos=3000, semente=7, fracao_fora_do_mapeamento=0.05):
+    """
+    Endereços crus nos formatos encontrados nas planilhas (vírgula, número no fim,
+    complemento...). Uma fração usa ruas que não estão no mapeamento de quadras.
+    """
+    rng = np.random.default_rng(semente)
+    ruas = _nomes_de_ruas()
+    n_fora = int(len(ruas) * fracao_fora_do_mapeamento / max(1e-9, 1 - fracao_fora_do_mapeamento))
+    ruas = ruas + _ruas_fora_do_mapeamento(rng, n_fora)
+    formatos = [
+        '{rua}, {num}', '{rua} {num}', '{rua}, {num} - em frente ao bar',
+        '  {RUA}   ,{num}A ', '{rua}', '{rua} - esquina',
+    ]
+    pesos_formatos = [0.5, 0.2, 0.1, 0.05, 0.05, 0.1]
+    enderecos = set()
+    while len(enderecos) < n_enderecos:
+        rua = ruas[rng.integers(len(ruas))]
+        formato = formatos[rng.choice(len(formatos), p=pesos_formatos)]
+        enderecos.add(formato.format(rua=rua, RUA=rua.upper(), num=int(rng.integers(1, 2000))))
+    return sorted(enderecos)
+
+def gerar_contagem(n_linhas, n_dias=60, n_enderecos=3000, semente=7, data_inicio=datetime(2025, 1, 1),
+                   assimetria=0.8):
+    """
+    DataFrame com o layout da planilha Raw de contagem. Os endereços seguem
+    uma distribuição de cauda longa (Zipf com expoente `assimetria`: poucos
+    endereços concentram as contagens), em ordem aleatória de popularidade.
+    """
+    rng = np.random.default_rng(semente)
+    enderecos = np.array(gerar_enderecos(n_enderecos, semente), dtype=object)
+    rng.shuffle(enderecos)
+    pesos = 1.0 / np.arange(1, len(enderecos) + 1) ** assimetria
+    pesos /= pesos.sum()
+
+    datas = pd.Timestamp(data_inicio) + pd.to_timedelta(rng.integers(0, n_dias, n_linhas), unit='D')
+    df = pd.DataFrame({
+        'Equipe': np.array(EQUIPES, dtype=object)[rng.integers(0, len(EQUIPES), n_linhas)],
+        'Data': datas.sort_values().to_pydatetime(),
+        'Logradouro': enderecos[rng.choice(len(enderecos), n_linhas, p=pesos)],
+        'Período': np.array(PERIODOS, dtype=object)[rng.choice(len(PERIODOS), n_linhas, p=PESOS_PERIODOS)],
+        'Qtd. pessoas': rng.geometric(0.12, n_linhas),
+        'Obs': np.where(rng.random(n_linhas) < 0.1, 'Retorno da equipe', None),
+        'Responsável': np.array(EQUIPES, dtype=object)[rng.integers(0, len(EQUIPES), n_linhas)],
+        'Latitude': np.round(-23.53 + rng.random(n_linhas) * 0.02, 6),
+        'Longitude': np.round(-46.65 + rng.random(n_linhas) * 0.02, 6),
+    })
+    return df
+
+def salvar_xlsx(df, caminho):
+    """Grava o DataFrame em .xlsx com o openpyxl em modo write_only (rápido para arquivos grandes)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    for linha in df.itertuples(index=False, name=None):
+        ws.append([None if isinstance(v, float) and np.isnan(v) else v for v in linha])
+    wb.save(caminho)
+    return Path(caminho)
+
+def gerar_planilha(caminho, n_linhas, **kwargs):
+    """Gera e grava uma planilha sintética. Retorna o caminho."""
+    return salvar_xlsx(gerar_contagem(n_linhas, **kwargs), caminho)
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gera uma planilha de contagem sintética (layout da planilha Raw)')
+    parser.add_argument('saida', help='caminho do .xlsx a gravar')
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--dias', type=int, default=60)
+    parser.add_argument('--enderecos', type=int, default=3000)
+    parser.add_argument('--semente', type=int, default=7)
+    args = parser.parse_args()
+
+    caminho = gerar_planilha(args.saida, args.linhas, n_dias=args.dias, n_enderecos=args.enderecos, semente=args.semente)
+    print(f"✓ {args.linhas:,} linhas em {caminho}")
@@ -0,0 +1,288 @@
+# logic_agregados.py
+# Tabela diária materializada do histórico: soma de pessoas por logradouro ×
+# período × dia e o indicador de aglomeração (soma > LIMIAR), com somas
+# prefixadas no eixo dos dias. Qualquer janela (7, 14, 28 dias...) sai de duas
+# leituras do acumulado, sem voltar às linhas da planilha. O indicador tem um
+# acumulado por limiar em uso (o padrão e os das regiões, preparados com
+# garantir_limiares), para que toda região também leia O(1). A tabela fica em
+# data/processed, gravada junto com os acumulados: ler o arquivo (ou receber a
+# tabela em um processo do lote) não refaz as somas. Ela guarda o hash de cada
+# linha já somada: quando chega uma planilha processada que contém todas essas
+# linhas (a base canônica ou uma nova exportação, que só ganhou datas), só as
+# linhas novas entram.
+
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import logic_storage
+
+# --- Configurações ---
+ARQUIVO_AGREGADOS = 'agregados_diarios.pkl'
+VERSAO_AGREGADOS = 4
+JANELAS = (7, 14, 28)  # Médias móveis do texto de análise (dias)
+COLUNAS_AGREGADAS = ['data', 'logradouro', 'periodo_norm', 'qtd_pessoas']  # Conteúdo que identifica uma linha somada
+
+class AgregadosDiarios:
+    """
+    Soma por [logradouro, período, dia] (dia 0 = data_inicial) e somas
+    prefixadas derivadas dela. Recebe linhas já preparadas pelo relatório
+    (colunas logradouro, periodo_norm, data e qtd_pessoas).
+    """
+
+    def __init__(self, periodos, limiar):
+        self.periodos = list(periodos)
+        self.limiar = limiar
+        self.limiares = [limiar]  # Limiares com acumulado de aglomerações (o padrão primeiro)
+        self.logradouros = []
+        self.data_inicial = None
+        self.soma = np.zeros((0, len(self.periodos), 0), dtype=np.float64)
+        self.registros_por_dia = np.zeros(0, dtype=np.int64)
+        self.chaves = np.array([], dtype=np.uint64)  # Hashes das linhas já somadas (ver hash_linhas), ordenados
+        self._indices = {}
+        self._recalcular()
+
+    # --- Atualização ---
+
+    def anexar(self, df, chaves=None):
+        """
+        Soma as linhas de `df` na tabela (o eixo dos dias e o de logradouros
+        crescem se preciso) e refaz os acumulados a partir do primeiro dia tocado.
+        `chaves` são os hashes dessas linhas (calculados aqui se não vierem).
+        """
+        if df.empty:
+            return
+        if chaves is None:
+            chaves = hash_linhas(df)
+        self.chaves = np.union1d(self.chaves, chaves)
+        datas = df['data'].dt.normalize()
+        primeiro, ultimo = datas.min(), datas.max()
+        if self.data_inicial is None:
+            self.data_inicial = primeiro
+        recuo = max(0, (self.data_inicial - primeiro).days)
+        n_dias = max(self.soma.shape[2] + recuo, (ultimo - self.data_inicial).days + recuo + 1)
+
+        codigos, unicos = pd.factorize(df['logradouro'])
+        novos = [logradouro for logradouro in unicos if logradouro not in self._indices]
+        for logradouro in novos:
+            self._indices[logradouro] = len(self.logradouros)
+            self.logradouros.append(logradouro)
+
+        if recuo or n_dias > self.soma.shape[2] or novos:
+            soma = np.zeros((len(self.logradouros), len(self.periodos), n_dias), dtype=np.float64)
+            soma[:self.soma.shape[0], :, recuo:recuo + self.soma.shape[2]] = self.soma
+            registros = np.zeros(n_dias, dtype=np.int64)
+            registros[recuo:recuo + len(self.registros_por_dia)] = self.registros_por_dia
+            self.soma, self.registros_por_dia = soma, registros
+            self.data_inicial = self.data_inicial - pd.Timedelta(days=recuo)
+
+        mapa = np.array([self._indices[logradouro] for logradouro in unicos] + [-1], dtype=np.int64)
+        linha = mapa[codigos]
+        periodo = df['periodo_norm'].map({p: i for i, p in enumerate(self.periodos)}).to_numpy(dtype=np.float64)
+        dia = (datas - self.data_inicial).dt.days.to_numpy(dtype=np.int64)
+        qtd = df['qtd_pessoas'].to_numpy(dtype=np.float64)
+
+        validos = (linha >= 0) & ~np.isnan(periodo)
+        np.add.at(self.soma, (linha[validos], periodo[validos].astype(np.int64), dia[validos]), qtd[validos])
+        np.add.at(self.registros_por_dia, dia, 1)
+
+        self._recalcular(0 if recuo or novos else int(dia.min()))
+
+    def garantir_limiares(self, limiares):
+        """
+        Prepara o acumulado de aglomerações de cada limiar que ainda não tem
+        (uma passada na tabela). Retorna os limiares preparados agora.
+        """
+        novos = []
+        for limiar in limiares:
+            if limiar not in self._acum_acima:
+                self.limiares.append(limiar)
+                self._acumular_limiar(limiar)
+                novos.append(limiar)
+        return novos
+
+    def _recalcular(self, desde=0):
+        """Somas prefixadas (posição k = dias anteriores a k) a partir do dia `desde`."""
+        n_dias = self.soma.shape[2]
+        if desde == 0 or not hasattr(self, '_acum_soma') or self._acum_soma.shape[:2] != self.soma.shape[:2]:
+            desde = 0
+            self._acum_soma = np.zeros(self.soma.shape[:2] + (n_dias + 1,), dtype=np.float64)
+            self._acum_total = np.zeros(n_dias + 1, dtype=np.float64)
+            self._acum_dias = np.zeros(n_dias + 1, dtype=np.int64)
+            self._acum_acima, self._acum_aglomeracoes = {}, {}
+        else:
+            self._acum_soma = _estender(self._acum_soma, n_dias + 1)
+            self._acum_total = _estender(self._acum_total, n_dias + 1)
+            self._acum_dias = _estender(self._acum_dias, n_dias + 1)
+
+        fatia = slice(desde, None)
+        self._acum_soma[..., desde + 1:] = self._acum_soma[..., desde:desde + 1] + np.cumsum(self.soma[..., fatia], axis=2)
+        self._acum_total[desde + 1:] = self._acum_total[desde] + np.cumsum(self.soma[..., fatia].sum(axis=(0, 1)))
+        self._acum_dias[desde + 1:] = self._acum_dias[desde] + np.cumsum(self.registros_por_dia[fatia] > 0)
+        for limiar in self.limiares:
+            self._acumular_limiar(limiar, desde)
+
+    def _acumular_limiar(self, limiar, desde=0):
+        """Acumulados de dias acima de `limiar` (por célula e da tabela toda) a partir do dia `desde`."""
+        n_dias = self.soma.shape[2]
+        if desde == 0 or limiar not in self._acum_acima:
+            desde = 0
+            self._acum_acima[limiar] = np.zeros(self.soma.shape[:2] + (n_dias + 1,), dtype=np.int32)
+            self._acum_aglomeracoes[limiar] = np.zeros(n_dias + 1, dtype=np.int64)
+        else:
+            self._acum_acima[limiar] = _estender(self._acum_acima[limiar], n_dias + 1)
+            self._acum_aglomeracoes[limiar] = _estender(self._acum_aglomeracoes[limiar], n_dias + 1)
+
+        acima = self.soma[..., desde:] > limiar
+        acum_acima, acum_aglomeracoes = self._acum_acima[limiar], self._acum_aglomeracoes[limiar]
+        acum_acima[..., desde + 1:] = acum_acima[..., desde:desde + 1] + np.cumsum(acima, axis=2)
+        acum_aglomeracoes[desde + 1:] = acum_aglomeracoes[desde] + np.cumsum(acima.sum(axis=(0, 1)))
+
+    def _acumulados_acima(self, limiar=None):
+        """(acumulado por célula, acumulado da tabela) de dias acima do limiar (padrão: o da tabela)."""
+        limiar = self.limiar if limiar is None else limiar
+        if limiar not in self._acum_acima:
+            raise ValueError(f"Limiar {limiar:g} sem acumulado nos agregados diários (use garantir_limiares)")
+        return self._acum_acima[limiar], self._acum_aglomeracoes[limiar]
+
+    # --- Consultas por Janela (O(1) por célula) ---
+
+    def _limites(self, data_fim, n_dias):
+        """Posições [a, b) dos acumulados para os n_dias terminando em data_fim (recortadas à tabela)."""
+        if self.data_inicial is None:
+            return 0, 0
+        b = (pd.Timestamp(data_fim).normalize() - self.data_inicial).days + 1
+        total = self.soma.shape[2]
+        return min(max(b - n_dias, 0), total), min(max(b, 0), total)
+
+    def soma_janela(self, data_fim, n_dias):
+        """Soma de pessoas por [logradouro, período] nos n_dias terminando em data_fim."""
+        a, b = self._limites(data_fim, n_dias)
+        return self._acum_soma[..., b] - self._acum_soma[..., a]
+
+    def dias_acima_janela(self, data_fim, n_dias, limiar=None):
+        """Dias com mais de `limiar` pessoas, por [logradouro, período], na janela."""
+        acum_acima, _ = self._acumulados_acima(limiar)
+        a, b = self._limites(data_fim, n_dias)
+        return acum_acima[..., b] - acum_acima[..., a]
+
+    def dias_com_registro(self, data_fim, n_dias):
+        """Dias da janela com ao menos um registro na planilha."""
+        a, b = self._limites(data_fim, n_dias)
+        return int(self._acum_dias[b] - self._acum_dias[a])
+
+    def media_janela(self, data_fim, n_dias):
+        """Média diária por [logradouro, período] na janela (só os dias com registro contam)."""
+        dias = self.dias_com_registro(data_fim, n_dias)
+        return self.soma_janela(data_fim, n_dias) / dias if dias else np.zeros(self.soma.shape[:2])
+
+    def resumo_janela(self, data_fim, n_dias, linhas=None, limiar=None, periodos=None):
+        """
+        Totais da região na janela: soma de pessoas, dias com registro, média
+        de pessoas por dia e média de aglomerações (logradouro × período acima
+        do limiar) por dia. Com `linhas` (posições em self.logradouros) ou
+        `periodos` (nomes, de self.periodos), só esses entram; `limiar` tem que
+        estar preparado (garantir_limiares), senão ValueError.
+        """
+        acum_acima, acum_aglomeracoes = self._acumulados_acima(limiar)
+        a, b = self._limites(data_fim, n_dias)
+        dias = int(self._acum_dias[b] - self._acum_dias[a])
+        if periodos is not None and list(periodos) == self.periodos:
+            periodos = None
+        if linhas is None and periodos is None:
+            soma = float(self._acum_total[b] - self._acum_total[a])
+            aglomeracoes = int(acum_aglomeracoes[b] - acum_aglomeracoes[a])
+        else:
+            linhas = slice(None) if linhas is None else np.asarray(linhas, dtype=np.int64)
+            colunas = slice(None) if periodos is None else [self.periodos.index(periodo) for periodo in periodos]
+            soma = float((self._acum_soma[linhas, :, b] - self._acum_soma[linhas, :, a])[:, colunas].sum())
+            aglomeracoes = int((acum_acima[linhas, :, b] - acum_acima[linhas, :, a])[:, colunas].sum())
+        data_fim = pd.Timestamp(data_fim).normalize()
+        return {
+            'inicio': data_fim - pd.Timedelta(days=n_dias - 1), 'fim': data_fim, 'dias': dias, 'soma': soma,
+            'media_dia': soma / dias if dias else 0.0,
+            'aglomeracoes_dia': aglomeracoes / dias if dias else 0.0,
+        }
+
+    def tabela(self):
+        """A tabela em formato longo: uma linha por logradouro, período e dia com contagem."""
+        linha, periodo, dia = np.nonzero(self.soma)
+        return pd.DataFrame({
+            'logradouro': np.array(self.logradouros, dtype=object)[linha] if len(linha) else [],
+            'periodo': np.array(self.periodos, dtype=object)[periodo] if len(periodo) else [],
+            'data': self.data_inicial + pd.to_timedelta(dia, unit='D') if len(dia) else pd.to_datetime([]),
+            'soma': self.soma[linha, periodo, dia],
+            'acima_limiar': self.soma[linha, periodo, dia] > self.limiar,
+        })
+
+def _estender(acumulado, tamanho):
+    """Acumulado com o último eixo completado com zeros até `tamanho` (quando a tabela ganha dias)."""
+    faltam = tamanho - acumulado.shape[-1]
+    if faltam <= 0:
+        return acumulado
+    return np.pad(acumulado, [(0, 0)] * (acumulado.ndim - 1) + [(0, faltam)])
+
+def hash_linhas(df):
+    """Hash do conteúdo (COLUNAS_AGREGADAS) de cada linha preparada."""
+    return logic_storage.hash_linhas(df[COLUNAS_AGREGADAS])
+
+def carregar_agregados(caminho):
+    """Lê a tabela gravada; arquivo inexistente, corrompido ou de outra versão volta como None."""
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return None
+    try:
+        with open(caminho, 'rb') as f:
+            conteudo = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(conteudo, dict) or conteudo.get('versao') != VERSAO_AGREGADOS:
+        return None
+    return conteudo['agregados']
+
+def salvar_agregados(caminho, agregados):
+    """Grava a tabela (arquivo temporário + replace)."""
+    caminho = Path(caminho)
+    temporario = caminho.with_suffix(caminho.suffix + '.tmp')
+    with open(temporario, 'wb') as f:
+        pickle.dump({'versao': VERSAO_AGREGADOS, 'agregados': agregados}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    temporario.replace(caminho)
+
+def _confere(agregados, chaves, periodos, limiar):
+    """
+    A tabela gravada serve para estas linhas: mesmos períodos e limiar, e
+    todas as linhas já somadas continuam presentes (nenhuma alterada ou removida)?
+    """
+    if agregados is None or agregados.periodos != list(periodos) or agregados.limiar != limiar:
+        return False
+    return bool(np.isin(agregados.chaves, chaves, assume_unique=True).all())
+
+def sincronizar_agregados(caminho, df, periodos, limiar, limiares=()):
+    """
+    Tabela atualizada com `df` (todas as linhas preparadas da planilha
+    processada). As linhas são reconhecidas pelo conteúdo (hash_linhas), não
+    pelo arquivo: se a tabela gravada só tem linhas que continuam em `df` (a
+    base canônica cresceu ou uma nova exportação trouxe mais datas), entram
+    só as linhas novas; se alguma linha somada mudou ou sumiu, a tabela é
+    refeita (com os limiares que já tinha). `limiares` (os das regiões)
+    ganham acumulados próprios. Grava, com os acumulados, quando muda.
+    Retorna (agregados, linhas somadas nesta chamada).
+    """
+    chaves = hash_linhas(df)
+    gravada = carregar_agregados(caminho)
+    if _confere(gravada, chaves, periodos, limiar):
+        agregados = gravada
+        novas = ~np.isin(chaves, agregados.chaves, assume_unique=True)
+    else:
+        agregados = AgregadosDiarios(periodos, limiar)
+        novas = np.ones(len(df), dtype=bool)
+    somadas = int(novas.sum())
+    if somadas:
+        agregados.anexar(df[novas], chaves[novas])
+    registrados = gravada.limiares if gravada is not None else []
+    novos_limiares = agregados.garantir_limiares(list(registrados) + list(limiares))
+    if somadas or novos_limiares or agregados is not gravada:
+        salvar_agregados(caminho, agregados)
+    return agregados, somadas
@@ -0,0 +1,23 @@
+# logic_contexto.py
+# Contexto de uma execução pendurado no log_callback. Quem executa (interface,
+# pipeline) cria o callback com com_contexto(log_callback, perfil=..., tarefa=...)
+# e as funções de lógica, que só recebem o log_callback, buscam cada objeto com
+# contexto_de. Assim o perfil de tempos (logic_profiler) e a tarefa com
+# progresso e cancelamento (logic_jobs) chegam às etapas sem mudar a
+# assinatura das funções. Só biblioteca padrão (importado pela interface).
+
+def com_contexto(log_callback, **objetos):
+    """
+    Callback que repassa as mensagens para log_callback e carrega os objetos
+    como atributos (callback.perfil, callback.tarefa...), mantendo o que já
+    estava pendurado em log_callback. Objetos None não são pendurados.
+    """
+    def callback(mensagem):
+        log_callback(mensagem)
+    callback.__dict__.update(getattr(log_callback, '__dict__', {}))
+    callback.__dict__.update((nome, objeto) for nome, objeto in objetos.items() if objeto is not None)
+    return callback
+
+def contexto_de(log_callback, nome, padrao=None):
+    """Objeto `nome` pendurado no log_callback, ou `padrao`."""
+    return getattr(log_callback, nome, None) or padrao
@@ -0,0 +1,81 @@
+# logic_jobs.py
+# Tarefa em execução (parser, relatório ou quadras): canal de progresso
+# determinado e cancelamento cooperativo. A tarefa vai no contexto do
+# log_callback (logic_contexto, nome 'tarefa') e as funções de lógica a obtêm
+# com tarefa_de(log_callback); sem tarefa, progresso e verificação não fazem nada.
+
+import time
+
+import logic_contexto
+
+# --- Configurações ---
+INTERVALO_PROGRESSO = 0.1  # Segundos mínimos entre dois avisos de progresso da mesma etapa
+
+class TarefaCancelada(Exception):
+    """Levantada nos pontos de verificação de uma tarefa cancelada."""
+
+class Tarefa:
+    """
+    Progresso e cancelamento de uma execução. `ao_progredir(descricao, feito, total)`
+    recebe os avisos (total None = etapa sem contagem); cancelar() pode ser chamado
+    de outra thread e vale a partir do próximo ponto de verificação.
+    """
+
+    def __init__(self, ao_progredir=None, intervalo=INTERVALO_PROGRESSO):
+        self.ao_progredir = ao_progredir
+        self.intervalo = intervalo
+        self._cancelada = False
+        self._ultimo_aviso = (None, 0.0)
+
+    def cancelar(self):
+        self._cancelada = True
+
+    @property
+    def cancelada(self):
+        return self._cancelada
+
+    def verificar(self):
+        """Ponto de verificação: interrompe a execução se a tarefa foi cancelada."""
+        if self._cancelada:
+            raise TarefaCancelada("Tarefa cancelada pelo usuário")
+
+    def progresso(self, descricao, feito=0, total=None):
+        """
+        Avisa o andamento (também é ponto de verificação). Avisos seguidos da
+        mesma etapa são espaçados de `intervalo` segundos, exceto o que a conclui.
+        """
+        self.verificar()
+        if self.ao_progredir is None:
+            return
+        agora = time.perf_counter()
+        ultima_descricao, ultimo_instante = self._ultimo_aviso
+        concluida = total is not None and feito >= total
+        if descricao == ultima_descricao and not concluida and agora - ultimo_instante < self.intervalo:
+            return
+        self._ultimo_aviso = (descricao, agora)
+        self.ao_progredir(descricao, feito, total)
+
+    def contador(self, descricao):
+        """Função (feito, total) que avisa o progresso de uma etapa, para os laços de leitura e escrita."""
+        return lambda feito, total: self.progresso(descricao, feito, total)
+
+class _SemTarefa:
+    """Tarefa nula: nunca cancelada e sem canal de progresso."""
+    cancelada = False
+
+    def verificar(self):
+        pass
+
+    def progresso(self, descricao, feito=0, total=None):
+        pass
+
+    def contador(self, descricao):
+        return None
+
+SEM_TAREFA = _SemTarefa()
+
+# --- Ligação com o log_callback ---
+
+def tarefa_de(log_callback):
+    """Tarefa pendurada no log_callback, ou a tarefa nula."""
+    return logic_contexto.contexto_de(log_callback, 'tarefa', SEM_TAREFA)
@@ -2,12 +2,20 @@
 # (Baseado em parser_planilha_contagem_centro.py)
 
 import pandas as pd
+import numpy as np
 import re
+import pickle
+from collections import OrderedDict
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 import warnings
 import traceback
 
+import logic_storage
+import logic_profiler
+import logic_jobs
+
 warnings.filterwarnings('ignore')
 
 # Tipos identificados na análise (ordenados por frequência)
@@ -22,80 +30,246 @@ TIPOS_LOGRADOURO = [
 
 PATTERN_TIPOS = '|'.join(TIPOS_LOGRADOURO)
 
+COLUNAS_LOGRADOURO = [
+    'tipo_logradouro', 'nome_logradouro', 'numero_logradouro',
+    'complemento_logradouro', 'logradouro_padronizado'
+]
+
+# Cache persistente dos logradouros já parseados (em data/processed).
+# Muda a versão sempre que a lógica de parse_logradouro mudar.
+ARQUIVO_CACHE_LOGRADOUROS = 'cache_logradouros.pkl'
+VERSAO_CACHE_LOGRADOUROS = 1
+MAXIMO_CACHE_LOGRADOUROS = 200_000  # Entradas mantidas no cache persistente (descarta as usadas há mais tempo)
+LOTE_PARSE = 20_000  # Logradouros distintos por lote (progresso e cancelamento entre lotes)
+
+# --- Regex único do motor vetorizado ---
+# Reproduz os PASSOS 1 a 3 de parse_logradouro em um só findall sobre a coluna
+# inteira, com as linhas (já sem espaços nas pontas) separadas por '\0'. A parte
+# principal termina no primeiro ' - '; o TIPO e o NOME são lidos palavra a
+# palavra, parando na vírgula ou antes do número final, o que mantém a
+# prioridade original (vírgula > número no final).
+SEPARADOR_LINHAS = '\0'
+_FIM = r'(?=\0|\Z)'
+_ESPACO = r'(?:[^\S ]| (?!- ))'                        # espaço que não inicia ' - '
+_PALAVRA = r'[^\s,\0]+'
+_NUMERO_FINAL = rf'\d+[A-Za-z]?\s*(?: - |{_FIM})'
+_PALAVRA_NOME = rf'(?!{_NUMERO_FINAL}){_PALAVRA}'       # qualquer palavra menos o número final
+_NOME = rf'{_PALAVRA_NOME}(?:{_ESPACO}+{_PALAVRA_NOME})*'
+_TRECHO = r'[^ \0]*(?: (?!- )[^ \0]*)*'                 # tudo até o ' - '
+
+RE_LOGRADOURO = re.compile(
+    rf'\0(?:(?P<tipo>(?i:{PATTERN_TIPOS}))\b{_ESPACO}*(?P<nome>{_NOME})?'
+    rf'|(?P<tipo_livre>{_PALAVRA}){_ESPACO}+(?P<nome_livre>{_NOME})'
+    rf'|(?P<nome_unico>{_PALAVRA}(?:{_ESPACO}+{_PALAVRA_NOME})*)?)'
+    rf'(?:\s*,{_ESPACO}*(?P<numero_virgula>{_TRECHO}(?<=\S))?'
+    rf'|\s+(?P<numero_final>\d+[A-Za-z]?))?'
+    rf'\s*(?: - \s*(?P<complemento>[^\0]*))?{_FIM}'
+)
+
+# Tabela de espaços em branco (str.isspace) indexada pelo código do caractere;
+# a última posição representa todos os códigos acima de U+3000
+_TABELA_ESPACOS = np.array([chr(c).isspace() for c in range(0x3002)], dtype=bool)
+_TABELA_ESPACOS[-1] = False
+
+# --- Parser escalar pré-compilado ---
+# Um valor por vez (fallback do motor vetorizado e uso avulso). O tipo sai de
+# uma tabela de prefixos montada uma vez a partir dos TIPOS_LOGRADOURO (trie de
+# um nível: inicial -> tipos) e o número final de um teste no último token, sem
+# regex por linha. A alternância compilada só é usada quando o início do texto
+# não é ASCII e a tabela não achou o tipo (dobras de maiúsculas do IGNORECASE).
+RE_TIPO_LOGRADOURO = re.compile(rf'({PATTERN_TIPOS})\b', re.IGNORECASE)
+_MAIOR_TIPO = max(map(len, TIPOS_LOGRADOURO))
+_TIPOS_POR_INICIAL = {}
+for _tipo in TIPOS_LOGRADOURO:
+    _TIPOS_POR_INICIAL.setdefault(_tipo[0].lower(), []).append((len(_tipo), _tipo.lower()))
+_LETRAS_ASCII = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz')
+
+MAXIMO_CACHE_PARSER = 20_000  # Entradas do cache em memória do ParserLogradouro (LRU)
+
+def _fim_do_tipo(tipo_nome):
+    """Posição onde termina o tipo no início de tipo_nome (como ^(TIPOS)\\b, sem diferenciar maiúsculas), ou None."""
+    for tamanho, tipo in _TIPOS_POR_INICIAL.get(tipo_nome[:1].lower(), ()):
+        if tipo_nome[:tamanho].lower() == tipo:
+            seguinte = tipo_nome[tamanho:tamanho + 1]
+            if not seguinte or not (seguinte.isalnum() or seguinte == '_'):
+                return tamanho
+    if not tipo_nome[:_MAIOR_TIPO + 1].isascii():
+        tipo_match = RE_TIPO_LOGRADOURO.match(tipo_nome)
+        if tipo_match:
+            return tipo_match.end()
+    return None
+
+def _numero_final(token):
+    """O token é um número no final do logradouro (\\d+ com uma letra opcional)?"""
+    if token.isdecimal():
+        return True
+    return len(token) > 1 and token[-1] in _LETRAS_ASCII and token[:-1].isdecimal()
+
+def _limpar(texto):
+    """PASSO 4: espaços repetidos, tabs etc. viram um espaço (e somem das pontas)."""
+    if texto.isprintable() and '  ' not in texto and texto[:1] != ' ' and texto[-1:] != ' ':
+        return texto
+    return ' '.join(texto.split())
+
+class ParserLogradouro:
+    """
+    parse_logradouro com as tabelas montadas uma vez e cache em memória dos
+    valores já vistos (o mesmo endereço se repete muito na planilha). Ao
+    encher, o cache descarta o valor usado há mais tempo (LRU).
+    """
+
+    def __init__(self, maximo_cache=MAXIMO_CACHE_PARSER):
+        self.maximo_cache = maximo_cache
+        self._cache = OrderedDict()
+
+    def __call__(self, logradouro_original):
+        # Só textos entram no cache (1, 1.0 e True seriam a mesma chave com textos diferentes)
+        if type(logradouro_original) is not str:
+            return self.parse(logradouro_original)
+        resultado = self._cache.get(logradouro_original)
+        if resultado is None:
+            resultado = self._cache[logradouro_original] = self.parse(logradouro_original)
+            if len(self._cache) > self.maximo_cache:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(logradouro_original)
+        return dict(resultado)
+
+    def parse(self, logradouro_original):
+        """Parse logradouro com extração de número mesmo sem vírgula (sem cache)."""
+        if type(logradouro_original) is str:
+            logradouro = logradouro_original.strip()
+        elif pd.isna(logradouro_original):
+            logradouro = ''
+        else:
+            logradouro = str(logradouro_original).strip()
+        if not logradouro:
+            return dict.fromkeys(COLUNAS_LOGRADOURO, '')
+
+        # PASSO 1: Separar COMPLEMENTO
+        parte_principal, _, complemento = logradouro.partition(' - ')
+
+        # PASSO 2: Separar NÚMERO (após a vírgula ou no final)
+        numero = ''
+        if ',' in parte_principal:
+            tipo_nome, _, numero = parte_principal.partition(',')
+        else:
+            tipo_nome = parte_principal
+            partes = parte_principal.rsplit(None, 1)
+            if len(partes) == 2 and _numero_final(partes[1]):
+                tipo_nome, numero = partes
+        tipo_nome = tipo_nome.strip()
+
+        # PASSO 3: Separar TIPO e NOME
+        fim_tipo = _fim_do_tipo(tipo_nome)
+        if fim_tipo is not None:
+            tipo, nome = tipo_nome[:fim_tipo].title(), tipo_nome[fim_tipo:]
+        else:
+            partes = tipo_nome.split(maxsplit=1)
+            tipo = partes[0].title() if len(partes) >= 2 else ''
+            nome = partes[-1] if partes else ''
+
+        # PASSO 4: Limpeza final
+        tipo, nome, numero, complemento = _limpar(tipo), _limpar(nome), _limpar(numero), _limpar(complemento)
+
+        # PASSO 5: Montar logradouro padronizado
+        logr_padrao = tipo
+        if nome:
+            logr_padrao += ' ' + nome
+        if numero:
+            logr_padrao += ', ' + numero
+        if complemento:
+            logr_padrao += ' - ' + complemento
+
+        return {
+            'tipo_logradouro': tipo,
+            'nome_logradouro': nome,
+            'numero_logradouro': numero,
+            'complemento_logradouro': complemento,
+            'logradouro_padronizado': logr_padrao.strip(),
+        }
+
+PARSER_LOGRADOURO = ParserLogradouro()
+
 def parse_logradouro(logradouro_original):
     """
     Parse logradouro otimizado com extração de número mesmo sem vírgula
+    (usa o parser pré-compilado do módulo, PARSER_LOGRADOURO)
     """
-    
-    resultado = {
-        'tipo_logradouro': '',
-        'nome_logradouro': '',
-        'numero_logradouro': '',
-        'complemento_logradouro': '',
-        'logradouro_padronizado': ''
-    }
-    
-    if pd.isna(logradouro_original) or str(logradouro_original).strip() == '':
-        return resultado
-    
-    logradouro = str(logradouro_original).strip()
-    
-    # PASSO 1: Separar COMPLEMENTO
-    if ' - ' in logradouro:
-        partes = logradouro.split(' - ', 1)
-        parte_principal = partes[0].strip()
-        resultado['complemento_logradouro'] = partes[1].strip()
-    else:
-        parte_principal = logradouro
-    
-    # PASSO 2: Separar NÚMERO
-    tipo_nome = parte_principal
-    numero = ''
-    
-    if ',' in parte_principal:
-        partes = parte_principal.split(',', 1)
-        tipo_nome = partes[0].strip()
-        numero = partes[1].strip()
-    else:
-        match = re.search(r'\s+(\d+[A-Za-z]?)$', parte_principal)
-        if match:
-            numero = match.group(1).strip()
-            tipo_nome = parte_principal[:match.start()].strip()
-    
-    resultado['numero_logradouro'] = numero
-    
-    # PASSO 3: Separar TIPO e NOME
-    tipo_match = re.match(rf'^({PATTERN_TIPOS})\b', tipo_nome, re.IGNORECASE)
-    
-    if tipo_match:
-        resultado['tipo_logradouro'] = tipo_match.group(1).title()
-        resultado['nome_logradouro'] = tipo_nome[tipo_match.end():].strip()
-    else:
-        partes = tipo_nome.split(maxsplit=1)
-        if len(partes) >= 2:
-            resultado['tipo_logradouro'] = partes[0].title()
-            resultado['nome_logradouro'] = partes[1]
-        elif len(partes) == 1:
-            resultado['nome_logradouro'] = partes[0]
-    
-    # PASSO 4: Limpeza final
-    for key in resultado:
-        if resultado[key] and key != 'logradouro_padronizado':
-            resultado[key] = ' '.join(resultado[key].split())
-    
-    # PASSO 5: Montar logradouro padronizado
-    logr_padrao = resultado['tipo_logradouro']
-    if resultado['nome_logradouro']:
-        logr_padrao += ' ' + resultado['nome_logradouro']
-    if resultado['numero_logradouro']:
-        logr_padrao += ', ' + resultado['numero_logradouro']
-    if resultado['complemento_logradouro']:
-        logr_padrao += ' - ' + resultado['complemento_logradouro']
-    
-    resultado['logradouro_padronizado'] = logr_padrao.strip()
-    
+    return PARSER_LOGRADOURO(logradouro_original)
+
+def _coalescer(grupos, nomes):
+    """Junta os ramos do regex: só um dos grupos indicados vem preenchido por linha."""
+    resultado = grupos[:, RE_LOGRADOURO.groupindex[nomes[0]] - 1]
+    for nome in nomes[1:]:
+        resultado = resultado + grupos[:, RE_LOGRADOURO.groupindex[nome] - 1]
     return resultado
 
+def _linhas_com_espaco_irregular(valores):
+    """
+    Marca as linhas com espaços repetidos, tabs etc. (as únicas que precisam da
+    limpeza do PASSO 4), olhando todos os caracteres da coluna de uma vez.
+    """
+    codigos = np.frombuffer('\0'.join(valores).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    espaco = _TABELA_ESPACOS[np.minimum(codigos, len(_TABELA_ESPACOS) - 1)]
+    irregular = espaco & (codigos != ord(' '))
+    irregular[1:] |= espaco[1:] & espaco[:-1]
+
+    fins = np.cumsum(np.fromiter(map(len, valores), dtype=np.int64, count=len(valores)) + 1)
+    linhas = np.searchsorted(fins, np.flatnonzero(irregular), side='right')
+    return np.bincount(linhas, minlength=len(valores)).astype(bool)
+
+def parse_logradouro_serie(serie):
+    """
+    Versão vetorizada de parse_logradouro para a coluna inteira.
+    Um único findall com RE_LOGRADOURO preenche as cinco colunas
+    (COLUNAS_LOGRADOURO), com resultado idêntico ao parse linha a linha.
+    """
+    matriz = np.full((len(serie), len(COLUNAS_LOGRADOURO)), '', dtype=object)
+
+    posicoes = np.flatnonzero(serie.notna().to_numpy())
+    valores = [str(valor).strip() for valor in serie.to_numpy()[posicoes]]
+    preenchidos = np.array([valor != '' for valor in valores], dtype=bool)
+    posicoes = posicoes[preenchidos]
+    valores = [valor for valor in valores if valor]
+
+    if valores:
+        coluna = SEPARADOR_LINHAS + SEPARADOR_LINHAS.join(valores)
+
+        if coluna.count(SEPARADOR_LINHAS) != len(valores):
+            # '\0' dentro de algum valor: segue pelo parse linha a linha
+            partes = pd.DataFrame([PARSER_LOGRADOURO.parse(valor) for valor in valores], columns=COLUNAS_LOGRADOURO)
+            matriz[posicoes] = partes.to_numpy(dtype=object)
+            return pd.DataFrame(matriz, index=serie.index, columns=COLUNAS_LOGRADOURO)
+
+        # PASSOS 1 a 3: complemento, número, tipo e nome em um só findall
+        grupos = np.array(RE_LOGRADOURO.findall(coluna), dtype=object)
+        tipo = _coalescer(grupos, ['tipo', 'tipo_livre'])
+        titulos = {valor: valor.title() for valor in set(tipo)}
+        tipo = np.array([titulos[valor] for valor in tipo], dtype=object)
+        nome = _coalescer(grupos, ['nome', 'nome_livre', 'nome_unico'])
+        numero = _coalescer(grupos, ['numero_virgula', 'numero_final'])
+        complemento = _coalescer(grupos, ['complemento'])
+
+        # PASSO 4: Limpeza final (só nas linhas com espaços repetidos, tabs etc.)
+        irregulares = np.flatnonzero(_linhas_com_espaco_irregular(valores))
+        for campo in (tipo, nome, numero, complemento):
+            campo[irregulares] = [' '.join(valor.split()) for valor in campo[irregulares]]
+
+        # PASSO 5: Montar logradouro padronizado
+        padronizado = (
+            tipo
+            + np.where(nome != '', ' ' + nome, '')
+            + np.where(numero != '', ', ' + numero, '')
+            + np.where(complemento != '', ' - ' + complemento, '')
+        )
+        sem_tipo = np.flatnonzero(tipo == '')
+        padronizado[sem_tipo] = [valor.strip() for valor in padronizado[sem_tipo]]
+
+        matriz[posicoes] = np.column_stack([tipo, nome, numero, complemento, padronizado])
+
+    return pd.DataFrame(matriz, index=serie.index, columns=COLUNAS_LOGRADOURO)
+
 def parse_periodo(periodo_original):
     """
     Parse período otimizado para os padrões identificados
@@ -138,12 +312,126 @@ def parse_periodo(periodo_original):
     
     return periodo
 
-def execute_parser(arquivo_selecionado_path, log_callback):
+# --- Deduplicação e cache ---
+
+def _fatorar_texto(serie):
+    """
+    pd.factorize sobre o texto de cada valor (o mesmo str() usado pelos
+    parsers); valores nulos ficam com código -1.
+    """
+    texto = serie.astype(str).where(serie.notna())
+    return pd.factorize(texto)
+
+def carregar_cache_logradouros(caminho_cache):
+    """
+    Lê o cache persistente {texto original: campos parseados}, do usado há
+    mais tempo para o mais recente. Cache ausente, corrompido ou de outra versão do parser volta vazio.
+    """
+    caminho_cache = Path(caminho_cache)
+    if not caminho_cache.exists():
+        return {}
+    try:
+        with open(caminho_cache, 'rb') as f:
+            conteudo = pickle.load(f)
+    except Exception:
+        return {}
+    if (not isinstance(conteudo, dict)
+            or conteudo.get('versao') != VERSAO_CACHE_LOGRADOUROS
+            or conteudo.get('tipos') != PATTERN_TIPOS):
+        return {}
+    return conteudo.get('logradouros', {})
+
+def salvar_cache_logradouros(caminho_cache, cache):
+    """Grava o cache (arquivo temporário + replace, para não deixar o arquivo pela metade)."""
+    caminho_cache = Path(caminho_cache)
+    temporario = caminho_cache.with_suffix(caminho_cache.suffix + '.tmp')
+    conteudo = {
+        'versao': VERSAO_CACHE_LOGRADOUROS,
+        'tipos': PATTERN_TIPOS,
+        'logradouros': cache,
+    }
+    with open(temporario, 'wb') as f:
+        pickle.dump(conteudo, f, protocol=pickle.HIGHEST_PROTOCOL)
+    temporario.replace(caminho_cache)
+
+def _podar_cache(cache, unicos, maximo_cache):
+    """
+    Passa os valores da planilha atual para o fim do cache (mais recentes) e
+    descarta os do início até caber em maximo_cache. Retorna quantos saíram.
+    """
+    for valor in unicos:
+        cache[valor] = cache.pop(valor)
+    excesso = len(cache) - maximo_cache
+    if excesso <= 0:
+        return 0
+    for valor in list(islice(cache, excesso)):
+        del cache[valor]
+    return excesso
+
+def parse_logradouro_dedup(serie, cache=None, ao_progredir=None, maximo_cache=MAXIMO_CACHE_LOGRADOUROS):
+    """
+    Parseia cada logradouro distinto uma única vez e replica o resultado para
+    todas as ocorrências (factorize + take).
+    Com `cache` (dict), só os valores ainda não vistos passam pelo parser e
+    entram no dicionário. Os faltantes são parseados em lotes de LOTE_PARSE;
+    `ao_progredir(processados, total)` é chamado após cada lote. Ao final, o
+    cache fica com no máximo `maximo_cache` entradas: as da planilha atual e,
+    depois delas, as usadas mais recentemente.
+    Retorna (DataFrame com COLUNAS_LOGRADOURO, estatísticas).
+    """
+    if cache is None:
+        cache = {}
+
+    codigos, unicos = _fatorar_texto(serie)
+    faltantes = [valor for valor in unicos if valor not in cache]
+    for inicio in range(0, len(faltantes), LOTE_PARSE):
+        lote = faltantes[inicio:inicio + LOTE_PARSE]
+        novos = parse_logradouro_serie(pd.Series(lote, dtype=object))
+        cache.update(zip(lote, map(tuple, novos.to_numpy(dtype=object))))
+        if ao_progredir is not None:
+            ao_progredir(inicio + len(lote), len(faltantes))
+
+    # Última linha da tabela = resultado vazio, usado pelo código -1 (nulos)
+    tabela = np.full((len(unicos) + 1, len(COLUNAS_LOGRADOURO)), '', dtype=object)
+    if len(unicos):
+        tabela[:-1] = [cache[valor] for valor in unicos]
+    descartados = _podar_cache(cache, unicos, maximo_cache)
+
+    estatisticas = {
+        'unicos': len(unicos),
+        'hits': len(unicos) - len(faltantes),
+        'misses': len(faltantes),
+        'descartados': descartados,
+        'tamanho_cache': len(cache),
+    }
+    resultado = pd.DataFrame(tabela.take(codigos, axis=0), index=serie.index, columns=COLUNAS_LOGRADOURO)
+    return resultado, estatisticas
+
+def parse_periodo_dedup(serie):
+    """parse_periodo aplicado uma vez por valor distinto e replicado com take."""
+    codigos, unicos = _fatorar_texto(serie)
+    tabela = np.array([parse_periodo(valor) for valor in unicos] + [''], dtype=object)
+    return pd.Series(tabela.take(codigos), index=serie.index, name=serie.name)
+
+def exportar_planilha_processada(df_exportar, df_artefato, arquivo_saida):
+    """
+    Planilha processada (.xlsx) e o artefato colunar lido pelo relatório.
+    Roda na thread de gravação. Retorna o caminho do artefato.
+    """
+    df_exportar.to_excel(arquivo_saida, index=False, engine='openpyxl')
+    return logic_storage.salvar_artefato_processado(df_artefato, arquivo_saida)
+
+def execute_parser(arquivo_selecionado_path, log_callback, incremental=False):
     """
     Função principal que executa toda a lógica de parsing.
     Recebe o caminho do arquivo e uma função de callback para o log.
-    Retorna os caminhos dos arquivos gerados (planilha, relatorio).
+    Com incremental=True, só as linhas que ainda não estão na base canônica
+    (data/processed/base_processada.pkl) são parseadas e anexadas a ela.
+    Retorna os caminhos dos arquivos gerados (planilha, relatorio); no modo
+    incremental, o primeiro é o da base canônica.
     """
+    perfil = logic_profiler.perfil_de(log_callback)
+    tarefa = logic_jobs.tarefa_de(log_callback)
     try:
         log_callback("=" * 80)
         log_callback("INICIANDO PARSER COMPLETO")
@@ -174,10 +462,25 @@ def execute_parser(arquivo_selecionado_path, log_callback):
         log_callback("CARREGANDO PLANILHA")
         log_callback("=" * 80)
         
-        df = pd.read_excel(arquivo_selecionado)
-        log_callback(f"\n✓ Arquivo carregado: {arquivo_selecionado.name}")
-        log_callback(f"✓ Total de registros: {len(df):,}")
+        with perfil.etapa('parser', 'load'):
+            df = logic_storage.ler_excel(arquivo_selecionado, tipar=False, ao_progredir=tarefa.contador("Linhas lidas"))
+            log_callback(f"\n✓ Arquivo carregado: {arquivo_selecionado.name}")
+            log_callback(f"✓ Total de registros: {len(df):,}")
         
+            # MODO INCREMENTAL: manter só o delta em relação à base canônica
+            if incremental:
+                arquivo_base = pasta_processed / logic_storage.ARQUIVO_BASE
+                df_base, chaves_base = logic_storage.carregar_base(arquivo_base)
+                total_raw = len(df)
+                df, chaves_novas = logic_storage.filtrar_linhas_novas(df, chaves_base)
+                log_callback(f"\n🔁 Modo incremental: base com {len(chaves_base):,} registros")
+                log_callback(f"✓ Registros já processados: {total_raw - len(df):,}")
+                log_callback(f"✓ Registros novos: {len(df):,}")
+                if df.empty:
+                    log_callback("\n✓ Nenhum registro novo. Base canônica mantida sem alterações.")
+                    log_callback(f"  📁 Local: {arquivo_base}")
+                    return str(arquivo_base), None
+
         tem_logradouro = 'Logradouro' in df.columns
         tem_periodo = 'Período' in df.columns
 
@@ -189,22 +492,34 @@ def execute_parser(arquivo_selecionado_path, log_callback):
         log_callback("APLICANDO PARSERS")
         log_callback("=" * 80)
 
-        # PARSER DE LOGRADOURO
-        if tem_logradouro:
-            log_callback(f"\n🔄 Processando campo 'Logradouro'...")
-            logradouros_parseados = df['Logradouro'].apply(parse_logradouro)
-            df['Logradouro'] = logradouros_parseados.apply(lambda x: x['logradouro_padronizado'])
-            df['tipo_logradouro'] = logradouros_parseados.apply(lambda x: x['tipo_logradouro'])
-            df['nome_logradouro'] = logradouros_parseados.apply(lambda x: x['nome_logradouro'])
-            df['numero_logradouro'] = logradouros_parseados.apply(lambda x: x['numero_logradouro'])
-            df['complemento_logradouro'] = logradouros_parseados.apply(lambda x: x['complemento_logradouro'])
-            log_callback(f"✓ Campo 'Logradouro' parseado com sucesso!")
-
-        # PARSER DE PERÍODO
-        if tem_periodo:
-            log_callback(f"\n🔄 Processando campo 'Período'...")
-            df['Período'] = df['Período'].apply(parse_periodo)
-            log_callback(f"✓ Campo 'Período' padronizado com sucesso!")
+        with perfil.etapa('parser', 'parse'):
+            # PARSER DE LOGRADOURO
+            estatisticas_cache = None
+            if tem_logradouro:
+                log_callback(f"\n🔄 Processando campo 'Logradouro'...")
+                arquivo_cache = pasta_processed / ARQUIVO_CACHE_LOGRADOUROS
+                cache_logradouros = carregar_cache_logradouros(arquivo_cache)
+                logradouros_parseados, estatisticas_cache = parse_logradouro_dedup(
+                    df['Logradouro'], cache_logradouros, ao_progredir=tarefa.contador("Logradouros processados")
+                )
+                if estatisticas_cache['misses'] or estatisticas_cache['descartados']:
+                    salvar_cache_logradouros(arquivo_cache, cache_logradouros)
+                log_callback(f"  • Logradouros distintos: {estatisticas_cache['unicos']:,}")
+                log_callback(f"  • Cache: {estatisticas_cache['hits']:,} hits / {estatisticas_cache['misses']:,} misses")
+                if estatisticas_cache['descartados']:
+                    log_callback(f"  • Descartados do cache (menos usados): {estatisticas_cache['descartados']:,}")
+                df['Logradouro'] = logradouros_parseados['logradouro_padronizado']
+                df['tipo_logradouro'] = logradouros_parseados['tipo_logradouro']
+                df['nome_logradouro'] = logradouros_parseados['nome_logradouro']
+                df['numero_logradouro'] = logradouros_parseados['numero_logradouro']
+                df['complemento_logradouro'] = logradouros_parseados['complemento_logradouro']
+                log_callback(f"✓ Campo 'Logradouro' parseado com sucesso!")
+
+            # PARSER DE PERÍODO
+            if tem_periodo:
+                log_callback(f"\n🔄 Processando campo 'Período'...")
+                df['Período'] = parse_periodo_dedup(df['Período'])
+                log_callback(f"✓ Campo 'Período' padronizado com sucesso!")
 
         log_callback(f"\n✓ Parsing concluído!")
 
@@ -212,100 +527,143 @@ def execute_parser(arquivo_selecionado_path, log_callback):
         log_callback("\n" + "=" * 80)
         log_callback("ANÁLISE DE QUALIDADE DO PARSING")
         log_callback("=" * 80)
-        total = len(df)
+        with perfil.etapa('parser', 'aggregate'):
+            total = len(df)
         
-        com_tipo = 0
-        com_nome = 0
-        com_numero = 0
-        com_complemento = 0
-        tipos_contagem = pd.Series(dtype='int64')
-        periodos_validos = 0
-        valores_unicos = 0
-        periodos_contagem = pd.Series(dtype='int64')
-
-        if tem_logradouro:
-            com_tipo = (df['tipo_logradouro'] != '').sum()
-            com_nome = (df['nome_logradouro'] != '').sum()
-            com_numero = (df['numero_logradouro'] != '').sum()
-            com_complemento = (df['complemento_logradouro'] != '').sum()
-            tipos_contagem = df[df['tipo_logradouro'] != '']['tipo_logradouro'].value_counts()
-            log_callback(f"\n📊 LOGRADOURO:")
-            log_callback(f"  • Com tipo: {com_tipo:,} ({(com_tipo/total*100):.1f}%)")
-            log_callback(f"  • Com nome: {com_nome:,} ({(com_nome/total*100):.1f}%)")
-            log_callback(f"  • Com número: {com_numero:,} ({(com_numero/total*100):.1f}%)")
-            log_callback(f"  • Com complemento: {com_complemento:,} ({(com_complemento/total*100):.1f}%)")
-
-        if tem_periodo:
-            valores_unicos = df['Período'].nunique()
-            periodos_validos = df['Período'].notna().sum()
-            periodos_contagem = df['Período'].value_counts()
-            log_callback(f"\n📊 PERÍODO:")
-            log_callback(f"  • Padronizados: {periodos_validos:,} ({(periodos_validos/total*100):.1f}%)")
-            log_callback(f"  • Valores únicos: {valores_unicos}")
+            com_tipo = 0
+            com_nome = 0
+            com_numero = 0
+            com_complemento = 0
+            tipos_contagem = pd.Series(dtype='int64')
+            periodos_validos = 0
+            valores_unicos = 0
+            periodos_contagem = pd.Series(dtype='int64')
+
+            if tem_logradouro:
+                com_tipo = (df['tipo_logradouro'] != '').sum()
+                com_nome = (df['nome_logradouro'] != '').sum()
+                com_numero = (df['numero_logradouro'] != '').sum()
+                com_complemento = (df['complemento_logradouro'] != '').sum()
+                tipos_contagem = df[df['tipo_logradouro'] != '']['tipo_logradouro'].value_counts()
+                log_callback(f"\n📊 LOGRADOURO:")
+                log_callback(f"  • Com tipo: {com_tipo:,} ({(com_tipo/total*100):.1f}%)")
+                log_callback(f"  • Com nome: {com_nome:,} ({(com_nome/total*100):.1f}%)")
+                log_callback(f"  • Com número: {com_numero:,} ({(com_numero/total*100):.1f}%)")
+                log_callback(f"  • Com complemento: {com_complemento:,} ({(com_complemento/total*100):.1f}%)")
+
+            if tem_periodo:
+                valores_unicos = df['Período'].nunique()
+                periodos_validos = df['Período'].notna().sum()
+                periodos_contagem = df['Período'].value_counts()
+                log_callback(f"\n📊 PERÍODO:")
+                log_callback(f"  • Padronizados: {periodos_validos:,} ({(periodos_validos/total*100):.1f}%)")
+                log_callback(f"  • Valores únicos: {valores_unicos}")
+
 
+        # Último ponto de cancelamento: daqui em diante os arquivos (e a base) são gravados
+        tarefa.progresso("Gravando planilha processada")
 
         log_callback("\n" + "=" * 80)
         log_callback("EXPORTANDO PLANILHA PROCESSADA")
         log_callback("=" * 80)
 
-        nome_base = arquivo_selecionado.stem
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        nome_saida = f"{nome_base}_processada_{timestamp}.xlsx"
-        arquivo_saida = pasta_processed / nome_saida
-
-        colunas_ordenadas = [
-            'Equipe', 'Data', 'Logradouro', 'Período', 'Qtd. pessoas',
-            'tipo_logradouro', 'nome_logradouro', 'numero_logradouro', 'complemento_logradouro'
-        ]
-        colunas_finais = [col for col in colunas_ordenadas if col in df.columns]
-        for col in df.columns:
-            if col not in colunas_finais:
-                colunas_finais.append(col)
-        df_exportar = df[colunas_finais]
-
-        df_exportar.to_excel(arquivo_saida, index=False, engine='openpyxl')
-        log_callback(f"\n💾 Salvando arquivo processado...")
-        log_callback(f"✓ Arquivo exportado com sucesso!")
-        log_callback(f"  📁 Local: {arquivo_saida}")
-        log_callback(f"  📊 Registros: {len(df_exportar):,}")
+        with perfil.etapa('parser', 'write'):
+            nome_base = arquivo_selecionado.stem
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            sufixo = 'incremento' if incremental else 'processada'
+            nome_saida = f"{nome_base}_{sufixo}_{timestamp}.xlsx"
+            arquivo_saida = pasta_processed / nome_saida
+
+            colunas_ordenadas = [
+                'Equipe', 'Data', 'Logradouro', 'Período', 'Qtd. pessoas',
+                'tipo_logradouro', 'nome_logradouro', 'numero_logradouro', 'complemento_logradouro'
+            ]
+            colunas_finais = [col for col in colunas_ordenadas if col in df.columns]
+            for col in df.columns:
+                if col not in colunas_finais:
+                    colunas_finais.append(col)
+            df_exportar = df[colunas_finais]
+
+            # A planilha (e o artefato colunar) é gravada na thread de gravação enquanto o relatório TXT é escrito
+            # O artefato é registrado em memória daqui, antes de a gravação começar
+            log_callback(f"\n💾 Salvando arquivo processado...")
+            df_artefato = logic_storage.artefato_processado(df_exportar)
+            logic_storage.registrar_processado(arquivo_saida, df_artefato)
+            gravacao = logic_storage.GravacaoEmSegundoPlano(exportar_planilha_processada, df_exportar, df_artefato, arquivo_saida)
 
-        log_callback("\n" + "=" * 80)
-        log_callback("GERANDO RELATÓRIO TXT")
-        log_callback("=" * 80)
-        
         arquivo_relatorio = pasta_docs / f'relatorio_parser_{timestamp}.txt'
-        with open(arquivo_relatorio, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("RELATÓRIO DE PROCESSAMENTO - PARSER COMPLETO\n")
-            f.write("=" * 80 + "\n\n")
-            f.write(f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-            f.write(f"Arquivo de entrada: {arquivo_selecionado.name}\n")
-            f.write(f"Arquivo de saída: {nome_saida}\n")
-            f.write(f"Registros processados: {total:,}\n\n")
+        with gravacao:
+            try:
+                if incremental:
+                    df_base, chaves_base = logic_storage.anexar_na_base(df_base, chaves_base, df_exportar, chaves_novas)
+
+                log_callback("\n" + "=" * 80)
+                log_callback("GERANDO RELATÓRIO TXT")
+                log_callback("=" * 80)
+
+                with perfil.etapa('parser', 'write'):
+                    with open(arquivo_relatorio, 'w', encoding='utf-8') as f:
+                        f.write("=" * 80 + "\n")
+                        f.write("RELATÓRIO DE PROCESSAMENTO - PARSER COMPLETO\n")
+                        f.write("=" * 80 + "\n\n")
+                        f.write(f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+                        f.write(f"Arquivo de entrada: {arquivo_selecionado.name}\n")
+                        f.write(f"Arquivo de saída: {nome_saida}\n")
+                        f.write(f"Registros processados: {total:,}\n\n")
+                        if incremental:
+                            f.write(f"Modo incremental: {total:,} registros novos anexados à base ({len(df_base):,} no total)\n")
+                            f.write(f"Base canônica: {arquivo_base.name}\n\n")
             
-            if tem_logradouro:
-                f.write("-" * 80 + "\n")
-                f.write("LOGRADOURO\n")
-                f.write(f"Com tipo: {com_tipo:,} ({(com_tipo/total*100):.1f}%)\n")
-                f.write(f"Com nome: {com_nome:,} ({(com_nome/total*100):.1f}%)\n")
-                f.write(f"Com número: {com_numero:,} ({(com_numero/total*100):.1f}%)\n")
-                f.write(f"Com complemento: {com_complemento:,} ({(com_complemento/total*100):.1f}%)\n\n")
-                f.write("Top 10 tipos:\n")
-                for i, (tipo, qtd) in enumerate(tipos_contagem.head(10).items(), 1):
-                    pct = (qtd/total*100)
-                    f.write(f"  {i:2d}. {tipo:<15} {qtd:>8,} ({pct:>5.1f}%)\n")
-                f.write("\n")
+                        if tem_logradouro:
+                            f.write("-" * 80 + "\n")
+                            f.write("LOGRADOURO\n")
+                            f.write(f"Com tipo: {com_tipo:,} ({(com_tipo/total*100):.1f}%)\n")
+                            f.write(f"Com nome: {com_nome:,} ({(com_nome/total*100):.1f}%)\n")
+                            f.write(f"Com número: {com_numero:,} ({(com_numero/total*100):.1f}%)\n")
+                            f.write(f"Com complemento: {com_complemento:,} ({(com_complemento/total*100):.1f}%)\n\n")
+                            f.write("Top 10 tipos:\n")
+                            for i, (tipo, qtd) in enumerate(tipos_contagem.head(10).items(), 1):
+                                pct = (qtd/total*100)
+                                f.write(f"  {i:2d}. {tipo:<15} {qtd:>8,} ({pct:>5.1f}%)\n")
+                            f.write("\n")
             
-            if tem_periodo:
-                f.write("-" * 80 + "\n")
-                f.write("PERÍODO\n")
-                f.write(f"Padronizados: {periodos_validos:,} ({(periodos_validos/total*100):.1f}%)\n")
-                f.write(f"Valores únicos: {valores_unicos}\n\n")
-                f.write("Distribuição:\n")
-                for periodo, qtd in periodos_contagem.items():
-                    pct = (qtd/total*100)
-                    f.write(f"  • {periodo:<20} {qtd:>8,} ({pct:>5.1f}%)\n")
-                f.write("\n")
+                        if tem_periodo:
+                            f.write("-" * 80 + "\n")
+                            f.write("PERÍODO\n")
+                            f.write(f"Padronizados: {periodos_validos:,} ({(periodos_validos/total*100):.1f}%)\n")
+                            f.write(f"Valores únicos: {valores_unicos}\n\n")
+                            f.write("Distribuição:\n")
+                            for periodo, qtd in periodos_contagem.items():
+                                pct = (qtd/total*100)
+                                f.write(f"  • {periodo:<20} {qtd:>8,} ({pct:>5.1f}%)\n")
+                            f.write("\n")
+
+                        if estatisticas_cache:
+                            f.write("-" * 80 + "\n")
+                            f.write("CACHE DE LOGRADOUROS\n")
+                            f.write(f"Logradouros distintos: {estatisticas_cache['unicos']:,}\n")
+                            f.write(f"Hits (já parseados): {estatisticas_cache['hits']:,}\n")
+                            f.write(f"Misses (parseados agora): {estatisticas_cache['misses']:,}\n")
+                            f.write(f"Entradas no cache: {estatisticas_cache['tamanho_cache']:,}\n\n")
+
+                    arquivo_artefato = gravacao.concluir()
+            except BaseException:
+                # Sem a planilha processada, o relatório TXT não fica sozinho em docs
+                arquivo_relatorio.unlink(missing_ok=True)
+                logic_storage.descartar_processado(arquivo_saida)
+                raise
+
+        log_callback(f"✓ Arquivo exportado com sucesso!")
+        log_callback(f"  📁 Local: {arquivo_saida}")
+        log_callback(f"  📊 Registros: {len(df_exportar):,}")
+        log_callback(f"✓ Artefato colunar para o relatório: {arquivo_artefato.name}")
+
+        if incremental:
+            # A base canônica só avança depois que a planilha do incremento foi gravada
+            with perfil.etapa('parser', 'write'):
+                logic_storage.salvar_base(arquivo_base, df_base, chaves_base)
+            log_callback(f"\n💾 Base canônica atualizada: {len(df_base):,} registros")
+            log_callback(f"  📁 Local: {arquivo_base}")
 
         log_callback(f"✓ Relatório TXT exportado: {arquivo_relatorio}")
         log_callback("\n" + "=" * 80)
@@ -313,8 +671,13 @@ def execute_parser(arquivo_selecionado_path, log_callback):
         log_callback("=" * 80)
         
         # Retorna os caminhos dos arquivos gerados
+        if incremental:
+            return str(arquivo_base), str(arquivo_relatorio)
         return str(arquivo_saida), str(arquivo_relatorio)
 
+    except logic_jobs.TarefaCancelada:
+        log_callback(f"\n⏹️  Parser cancelado. Nenhum arquivo de saída foi gravado.")
+        return None, None
     except Exception as e:
         log_callback(f"\n❌ ERRO GERAL NO PARSER ❌")
         log_callback(traceback.format_exc())
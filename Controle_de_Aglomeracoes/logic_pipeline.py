@@ -0,0 +1,136 @@
+# logic_pipeline.py
+# Execução sem interface: parser → relatório diário → relatório de quadras no
+# mesmo processo (os DataFrames passam de uma etapa para a outra em memória),
+# com o tempo de cada etapa. Uso: python -m logic_pipeline PLANILHA_RAW [opções]
+
+import json
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import logic_parser
+import logic_report
+import quadras_report
+import logic_contexto
+import logic_profiler
+
+# --- Configurações ---
+DIAS_PADRAO = 4  # Mesmo intervalo padrão da interface (hoje e os 3 dias anteriores)
+
+def intervalo_padrao(hoje=None):
+    """Intervalo padrão do relatório: os últimos DIAS_PADRAO dias, terminando hoje."""
+    hoje = hoje or datetime.now()
+    data_fim = datetime(hoje.year, hoje.month, hoje.day)
+    return data_fim - timedelta(days=DIAS_PADRAO - 1), data_fim
+
+def run_pipeline(arquivo_raw, data_inicio=None, data_fim=None, log_callback=print,
+                 incremental=False, quadras=True):
+    """
+    Executa as três etapas em sequência, sem releitura dos .xlsx intermediários.
+    Datas ausentes usam intervalo_padrao(). Uma etapa que falha interrompe as
+    seguintes. Retorna um dicionário com os arquivos gerados (None quando a
+    etapa falhou ou não rodou), 'sucesso', 'tempos' (segundos por etapa e total)
+    e 'perfil' (spans de logic_profiler; a execução vai também para o histórico
+    em docs).
+    """
+    if data_inicio is None or data_fim is None:
+        inicio_padrao, fim_padrao = intervalo_padrao()
+        data_inicio, data_fim = data_inicio or inicio_padrao, data_fim or fim_padrao
+
+    perfil = logic_contexto.contexto_de(log_callback, 'perfil')
+    if perfil is None:
+        perfil = logic_profiler.Perfil('pipeline')
+        log_callback = logic_contexto.com_contexto(log_callback, perfil=perfil)
+
+    resultado = {
+        'processado': None, 'relatorio_parser': None,
+        'relatorio': None, 'analise': None, 'quadras': None,
+        'sucesso': False, 'tempos': {}, 'perfil': None,
+    }
+    tempos = resultado['tempos']
+    inicio_total = time.perf_counter()
+
+    def cronometrar(etapa, funcao, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            tempos[etapa] = round(time.perf_counter() - inicio, 3)
+
+    try:
+        # 1. Parser
+        resultado['processado'], resultado['relatorio_parser'] = cronometrar(
+            'parser', logic_parser.execute_parser, arquivo_raw, log_callback, incremental=incremental
+        )
+        if not resultado['processado']:
+            return resultado
+
+        # 2. Relatório diário (lê a saída do parser registrada em memória)
+        resultado['relatorio'], resultado['analise'] = cronometrar(
+            'relatorio', logic_report.execute_report_generator,
+            resultado['processado'], data_inicio, data_fim, log_callback
+        )
+        if not resultado['relatorio']:
+            return resultado
+
+        # 3. Quadras (usa a estrutura do relatório diário em memória)
+        if quadras:
+            try:
+                resultado['quadras'] = cronometrar(
+                    'quadras', quadras_report.gerar_relatorio_quadras, resultado['relatorio'], log_callback
+                )
+            except Exception:
+                log_callback(f"\n❌ ERRO NO RELATÓRIO DE QUADRAS ❌")
+                log_callback(traceback.format_exc())
+                return resultado
+
+        resultado['sucesso'] = True
+        return resultado
+    finally:
+        tempos['total'] = round(time.perf_counter() - inicio_total, 3)
+        resultado['perfil'] = perfil.registro()
+        try:
+            perfil.salvar(logic_report.localizar_pasta_docs(lambda mensagem: None))
+        except OSError:
+            pass
+
+def _ler_data(texto):
+    return datetime.strptime(texto, "%d/%m/%Y")
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Executa parser, relatório diário e relatório de quadras sem a interface')
+    parser.add_argument('arquivo', help='planilha raw (Contagem_diaria_centro - Padronizada.xlsx)')
+    parser.add_argument('--inicio', type=_ler_data, help=f'data início dd/mm/aaaa (padrão: {DIAS_PADRAO - 1} dias antes do fim)')
+    parser.add_argument('--fim', type=_ler_data, help='data fim dd/mm/aaaa (padrão: hoje)')
+    parser.add_argument('--incremental', action='store_true', help='modo incremental do parser (anexa à base canônica)')
+    parser.add_argument('--sem-quadras', action='store_true', help='não gera o relatório de quadras')
+    parser.add_argument('--silencioso', action='store_true', help='não mostra o log das etapas')
+    parser.add_argument('--json', action='store_true', help='resultado (arquivos e tempos) em uma linha JSON')
+    args = parser.parse_args()
+
+    data_inicio, data_fim = args.inicio, args.fim
+    if data_inicio is None and data_fim is not None:
+        data_inicio = data_fim - timedelta(days=DIAS_PADRAO - 1)
+    if data_inicio is not None and data_fim is not None and data_fim < data_inicio:
+        parser.error('data fim anterior à data início')
+
+    log = (lambda mensagem: None) if args.silencioso else print
+    resultado = run_pipeline(args.arquivo, data_inicio, data_fim, log,
+                             incremental=args.incremental, quadras=not args.sem_quadras)
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False))
+    else:
+        print("\n" + "=" * 80)
+        for etapa, segundos in resultado['tempos'].items():
+            print(f"⏱️  {etapa:<10} {segundos:>8.2f} s")
+        for span in resultado['perfil']['spans']:
+            print(f"   • {span['span']:<22} {span['parede_s']:>8.2f} s  CPU {span['cpu_s']:>8.2f} s  "
+                  f"{logic_profiler.memoria_do_span(span)}")
+        for chave in ('processado', 'relatorio', 'analise', 'quadras'):
+            print(f"📁 {chave:<10} {resultado[chave] or '-'}")
+        print("✓ Pipeline concluído." if resultado['sucesso'] else "❌ Pipeline interrompido.")
+    sys.exit(0 if resultado['sucesso'] else 1)
@@ -0,0 +1,187 @@
+# logic_profiler.py
+# Medição por etapa (tempo de relógio, tempo de CPU e memória). O Perfil vai no
+# contexto do log_callback (logic_contexto, nome 'perfil') e as funções de
+# lógica abrem spans com `with perfil_de(log_callback).etapa(...)`.
+# Sem perfil no callback, os spans não medem nada.
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+import logic_contexto
+
+# --- Configurações ---
+# Fases usadas pelos módulos (o nome do span é "etapa.fase", ex.: relatorio.aggregate)
+FASES = ('load', 'parse', 'aggregate', 'write', 'format')
+ARQUIVO_HISTORICO = 'perfil_execucoes.jsonl'  # Uma linha JSON por execução, na pasta docs
+INTERVALO_AMOSTRAGEM = 0.05  # Segundos entre duas leituras da memória residente durante um span
+
+# --- Memória ---
+
+def _contadores_windows():
+    """PROCESS_MEMORY_COUNTERS do processo atual (Windows), ou None."""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    contadores = PROCESS_MEMORY_COUNTERS()
+    contadores.cb = ctypes.sizeof(contadores)
+    processo = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(processo, ctypes.byref(contadores), contadores.cb):
+        return None
+    return contadores
+
+def memoria_atual_mb():
+    """Memória residente atual do processo (MB), ou None se indisponível."""
+    try:
+        if sys.platform == 'win32':
+            contadores = _contadores_windows()
+            return None if contadores is None else contadores.WorkingSetSize / 2**20
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except Exception:
+        return None
+
+def pico_memoria_mb():
+    """Pico de memória residente do processo desde o início (MB), ou None se indisponível."""
+    try:
+        if sys.platform == 'win32':
+            contadores = _contadores_windows()
+            return None if contadores is None else contadores.PeakWorkingSetSize / 2**20
+
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        return pico / 2**20 if sys.platform == 'darwin' else pico / 2**10
+    except Exception:
+        return None
+
+class _PicoDoSpan:
+    """
+    Maior memória residente durante um span: lida na entrada, a cada
+    INTERVALO_AMOSTRAGEM por uma thread de amostragem e na saída. (O pico do
+    processo não serve: depois da etapa mais pesada, todas mostrariam o dela.)
+    """
+
+    def __init__(self, intervalo=INTERVALO_AMOSTRAGEM):
+        self.inicio = self.pico = memoria_atual_mb()
+        self._parar = threading.Event()
+        self._thread = None
+        if self.inicio is not None:
+            self._thread = threading.Thread(target=self._amostrar, args=(intervalo,), daemon=True)
+            self._thread.start()
+
+    def _ler(self):
+        atual = memoria_atual_mb()
+        if atual is not None and atual > self.pico:
+            self.pico = atual
+
+    def _amostrar(self, intervalo):
+        while not self._parar.wait(intervalo):
+            self._ler()
+
+    def encerrar(self):
+        """Para a amostragem e devolve (memória na entrada, pico), ou (None, None)."""
+        if self._thread is None:
+            return None, None
+        self._parar.set()
+        self._thread.join()
+        self._ler()
+        return self.inicio, self.pico
+
+# --- Perfil de uma Execução ---
+
+class Perfil:
+    """Spans medidos em uma execução (parser, relatório, quadras ou o pipeline inteiro)."""
+
+    def __init__(self, execucao):
+        self.execucao = execucao
+        self.inicio = datetime.now()
+        self.spans = []
+        self._relogio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, etapa, fase):
+        """
+        Span "etapa.fase": tempo de relógio, tempo de CPU do processo, a memória
+        residente na entrada (rss_inicio_mb), a maior memória residente durante
+        o span (pico_span_mb) e quanto ela subiu em relação à entrada
+        (acrescimo_pico_mb).
+        """
+        memoria = _PicoDoSpan()
+        relogio, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            parede, cpu = time.perf_counter() - relogio, time.process_time() - cpu
+            inicio, pico = memoria.encerrar()
+            self.spans.append({
+                'span': f"{etapa}.{fase}",
+                'parede_s': round(parede, 4),
+                'cpu_s': round(cpu, 4),
+                'rss_inicio_mb': None if inicio is None else round(inicio, 1),
+                'pico_span_mb': None if pico is None else round(pico, 1),
+                'acrescimo_pico_mb': None if pico is None else round(pico - inicio, 1),
+            })
+
+    def registro(self):
+        """Execução como dicionário (a linha JSON do histórico)."""
+        pico = pico_memoria_mb()
+        return {
+            'execucao': self.execucao,
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'total_s': round(time.perf_counter() - self._relogio, 4),
+            'pico_rss_processo_mb': None if pico is None else round(pico, 1),
+            'pid': os.getpid(),
+            'spans': self.spans,
+        }
+
+    def resumo(self):
+        """Linhas do resumo de tempos para o log."""
+        registro = self.registro()
+        linhas = [f"\n⏱️  Tempos ({self.execucao}):"]
+        for span in self.spans:
+            linhas.append(f"  • {span['span']:<22} {span['parede_s']:>8.2f} s  CPU {span['cpu_s']:>8.2f} s  {memoria_do_span(span)}")
+        linhas.append(f"  • {'total':<22} {registro['total_s']:>8.2f} s")
+        return linhas
+
+    def salvar(self, pasta_docs):
+        """Acrescenta a execução ao histórico (docs/perfil_execucoes.jsonl). Retorna o caminho."""
+        caminho = Path(pasta_docs) / ARQUIVO_HISTORICO
+        with open(caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.registro(), ensure_ascii=False) + '\n')
+        return caminho
+
+def memoria_do_span(span):
+    """Texto da memória de um span para o log: "pico 310 MB (+85 MB)"."""
+    if span.get('pico_span_mb') is None:
+        return "pico -"
+    return f"pico {span['pico_span_mb']:,.0f} MB ({span['acrescimo_pico_mb']:+,.0f} MB)"
+
+class _SemPerfil:
+    """Perfil nulo: spans sem medição, para callbacks sem perfil."""
+
+    def etapa(self, etapa, fase):
+        return nullcontext()
+
+SEM_PERFIL = _SemPerfil()
+
+# --- Ligação com o log_callback ---
+
+def perfil_de(log_callback):
+    """Perfil pendurado no log_callback, ou o perfil nulo."""
+    return logic_contexto.contexto_de(log_callback, 'perfil', SEM_PERFIL)
@@ -0,0 +1,152 @@
+# logic_quadras.py
+# Índice compilado do mapeamento de quadras (Mapeamento_FINAL_editado.xlsx):
+# intervalos de numeração por rua em arrays numpy, com cache binário ao lado
+# do .xlsx que só é refeito quando a planilha muda (mtime + hash).
+# Pode ser importado por qualquer módulo que precise atribuir quadras.
+
+import hashlib
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# --- Configuração ---
+ARQUIVO_MAPEAMENTO = Path(__file__).resolve().parent / 'Mapeamento_FINAL_editado.xlsx'
+VERSAO_INDICE = 1
+
+# --- Índice ---
+# Maior número aceito na busca (números maiores que isso caem no último intervalo possível)
+NUMERO_MAXIMO = 2 ** 62
+
+def compilar_indice_quadras(df_map):
+    """
+    Compila o mapeamento em {nome normalizado: (inícios, fins, quadras)}, com
+    arrays numpy ordenados de intervalos disjuntos. Quando intervalos de uma
+    mesma rua se sobrepõem, cada trecho fica com a quadra da primeira linha do
+    mapeamento que o cobre (mesma regra da busca linha a linha).
+    """
+    nomes = df_map['Nome Original'].astype(str).str.lower().str.strip()
+    minimos = pd.to_numeric(df_map['Num Min'], errors='coerce').to_numpy(dtype=np.float64)
+    maximos = pd.to_numeric(df_map['Num Max'], errors='coerce').to_numpy(dtype=np.float64)
+    validos = np.isfinite(minimos) & np.isfinite(maximos)
+    minimos = np.clip(np.trunc(np.where(validos, minimos, 0)), -NUMERO_MAXIMO, NUMERO_MAXIMO).astype(np.int64)
+    maximos = np.clip(np.trunc(np.where(validos, maximos, 0)), -NUMERO_MAXIMO, NUMERO_MAXIMO).astype(np.int64)
+    quadras = df_map['Quadra'].to_numpy(dtype=object)
+
+    indice = {}
+    for nome, posicoes in pd.Series(np.arange(len(df_map))).groupby(nomes.to_numpy(), sort=False):
+        posicoes = posicoes.to_numpy()
+        posicoes = posicoes[validos[posicoes] & (minimos[posicoes] <= maximos[posicoes])]
+        if len(posicoes) == 0:
+            continue
+        # Trechos elementares entre todas as bordas; cada um herda a primeira linha que o cobre
+        bordas = np.unique(np.concatenate([minimos[posicoes], maximos[posicoes] + 1]))
+        inicios, fins = bordas[:-1], bordas[1:] - 1
+        cobre = (minimos[posicoes][:, None] <= inicios) & (fins <= maximos[posicoes][:, None])
+        cobertos = cobre.any(axis=0)
+        primeira = cobre.argmax(axis=0)
+        indice[nome] = (inicios[cobertos], fins[cobertos], quadras[posicoes[primeira[cobertos]]])
+    return indice
+
+def separar_nome_numero(logradouros):
+    """Nome normalizado e número de cada logradouro ("Rua X, 123" -> "rua x", 123; sem número -> 0)."""
+    texto = pd.Series(logradouros, dtype=object).astype(str).str.strip()
+    partes = texto.str.extract(r"^(.*?),\s*(\d+)")
+    com_numero = partes[1].notna()
+    nomes = partes[0].str.strip().str.lower().where(com_numero, texto.str.lower())
+    numeros = partes[1].map(lambda d: min(int(d), NUMERO_MAXIMO) if isinstance(d, str) else 0)
+    return nomes.to_numpy(dtype=object), numeros.to_numpy(dtype=np.int64)
+
+def localizar_quadras(logradouros, indice):
+    """
+    Quadra de cada logradouro da coluna (None quando não há no mapeamento),
+    com uma busca np.searchsorted por rua sobre os intervalos do índice.
+    """
+    logradouros = pd.Series(logradouros, dtype=object).reset_index(drop=True)
+    resultado = np.full(len(logradouros), None, dtype=object)
+    presentes = np.flatnonzero(logradouros.notna().to_numpy())
+    if len(presentes) == 0:
+        return resultado
+
+    nomes, numeros = separar_nome_numero(logradouros.iloc[presentes])
+    for nome, grupo in pd.Series(np.arange(len(presentes))).groupby(nomes, sort=False):
+        if nome not in indice:
+            continue
+        inicios, fins, quadras = indice[nome]
+        grupo = grupo.to_numpy()
+        alvo = numeros[grupo]
+        k = np.searchsorted(inicios, alvo, side='right') - 1
+        achou = (k >= 0) & (alvo <= fins[np.maximum(k, 0)])
+        resultado[presentes[grupo[achou]]] = quadras[k[achou]]
+    return resultado
+
+# --- Cache do Índice ---
+
+def caminho_cache_indice(caminho_mapeamento):
+    """Cache ao lado da planilha: Mapeamento_FINAL_editado.indice.pkl."""
+    caminho_mapeamento = Path(caminho_mapeamento)
+    return caminho_mapeamento.with_name(caminho_mapeamento.stem + '.indice.pkl')
+
+def _hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _ler_cache_indice(caminho_cache):
+    """Conteúdo do cache, ou None se ausente, corrompido ou de outra versão."""
+    if not caminho_cache.exists():
+        return None
+    try:
+        with open(caminho_cache, 'rb') as f:
+            conteudo = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(conteudo, dict) or conteudo.get('versao') != VERSAO_INDICE:
+        return None
+    return conteudo
+
+def _salvar_cache_indice(caminho_cache, conteudo):
+    """Grava o cache (arquivo temporário + replace). Sem permissão de escrita, segue sem cache."""
+    temporario = caminho_cache.with_suffix(caminho_cache.suffix + '.tmp')
+    try:
+        with open(temporario, 'wb') as f:
+            pickle.dump(conteudo, f, protocol=pickle.HIGHEST_PROTOCOL)
+        temporario.replace(caminho_cache)
+    except OSError:
+        pass
+
+def carregar_indice_quadras(caminho_mapeamento=ARQUIVO_MAPEAMENTO, log_callback=None):
+    """
+    Índice de quadras pronto para localizar_quadras. Usa o cache quando o
+    mtime e o tamanho da planilha batem; se só o mtime mudou, confere o hash
+    antes de recompilar.
+    """
+    caminho_mapeamento = Path(caminho_mapeamento)
+    if not caminho_mapeamento.exists():
+        raise FileNotFoundError(f"Arquivo de mapeamento não encontrado em: {caminho_mapeamento}")
+    log = log_callback or (lambda mensagem: None)
+
+    caminho_cache = caminho_cache_indice(caminho_mapeamento)
+    info = caminho_mapeamento.stat()
+    conteudo = _ler_cache_indice(caminho_cache)
+    if conteudo is not None and (conteudo['mtime_ns'], conteudo['tamanho']) == (info.st_mtime_ns, info.st_size):
+        log("✓ Mapeamento carregado (índice em cache).")
+        return conteudo['indice']
+
+    hash_atual = _hash_arquivo(caminho_mapeamento)
+    if conteudo is not None and conteudo['sha256'] == hash_atual:
+        conteudo.update(mtime_ns=info.st_mtime_ns, tamanho=info.st_size)
+        _salvar_cache_indice(caminho_cache, conteudo)
+        log("✓ Mapeamento carregado (índice em cache).")
+        return conteudo['indice']
+
+    indice = compilar_indice_quadras(pd.read_excel(caminho_mapeamento))
+    _salvar_cache_indice(caminho_cache, {
+        'versao': VERSAO_INDICE, 'mtime_ns': info.st_mtime_ns, 'tamanho': info.st_size,
+        'sha256': hash_atual, 'indice': indice,
+    })
+    log("✓ Mapeamento carregado (índice recompilado).")
+    return indice
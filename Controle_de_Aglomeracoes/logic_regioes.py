@@ -0,0 +1,110 @@
+# logic_regioes.py
+# Regiões do relatório diário: nome, limiar de aglomeração, períodos do dia
+# que entram no relatório e quais logradouros entram (lista de ruas, padrão de
+# texto e/ou quadras do mapeamento). Sem filtro, a região cobre todos os
+# logradouros da planilha; sem 'periodos', todos os períodos (o relatório de
+# sempre, logic_report.REGIAO_PADRAO). As definições podem vir de um JSON, por exemplo:
+#
+#   [
+#     {"nome": "Santa Cecília, Campos Elíseos e Santa Ifigênia"},
+#     {"nome": "Luz", "quadras": ["Q10", "Q11"], "sufixo": "luz"},
+#     {"nome": "Eixo Rio Branco", "logradouros": ["Avenida Rio Branco"], "limiar": 5},
+#     {"nome": "Praças", "padrao": "^Praça ", "periodos": ["madrugada", "noite"]}
+#   ]
+
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+import logic_quadras
+
+# --- Configurações ---
+CHAVES_FILTRO = ('logradouros', 'padrao', 'quadras')
+CHAVES_VALIDAS = ('nome', 'limiar', 'sufixo', 'periodos') + CHAVES_FILTRO
+
+def slug(texto):
+    """Nome de região em formato de nome de arquivo ("Santa Cecília" -> "santa_cecilia")."""
+    sem_acento = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', sem_acento.lower()).strip('_')
+
+def normalizar_regiao(definicao, limiar_padrao, periodos_padrao):
+    """
+    Confere uma definição de região e completa os padrões (limiar, períodos e
+    sufixo do nome dos arquivos). Os períodos têm que estar entre os de
+    `periodos_padrao` e ficam na ordem deles. Levanta ValueError se estiver inválida.
+    """
+    if not isinstance(definicao, dict) or not str(definicao.get('nome', '')).strip():
+        raise ValueError(f"Região sem nome: {definicao!r}")
+    desconhecidas = [chave for chave in definicao if chave not in CHAVES_VALIDAS]
+    if desconhecidas:
+        raise ValueError(f"Região '{definicao['nome']}': chaves desconhecidas {desconhecidas}")
+
+    regiao = dict(definicao)
+    regiao['nome'] = str(regiao['nome']).strip()
+    regiao['limiar'] = regiao.get('limiar', limiar_padrao)
+    if not isinstance(regiao['limiar'], (int, float)) or isinstance(regiao['limiar'], bool):
+        raise ValueError(f"Região '{regiao['nome']}': limiar deve ser um número")
+    periodos = regiao.get('periodos', periodos_padrao)
+    if isinstance(periodos, str) or not isinstance(periodos, (list, tuple)) or not periodos:
+        raise ValueError(f"Região '{regiao['nome']}': 'periodos' deve ser uma lista não vazia")
+    desconhecidos = [periodo for periodo in periodos if periodo not in periodos_padrao]
+    if desconhecidos:
+        raise ValueError(f"Região '{regiao['nome']}': períodos desconhecidos {desconhecidos} "
+                         f"(válidos: {list(periodos_padrao)})")
+    regiao['periodos'] = [periodo for periodo in periodos_padrao if periodo in periodos]
+    regiao['sufixo'] = regiao.get('sufixo', slug(regiao['nome']))
+    if 'padrao' in regiao:
+        re.compile(regiao['padrao'])  # Padrão inválido falha aqui, antes de qualquer relatório
+    for chave in ('logradouros', 'quadras'):
+        if chave in regiao and (isinstance(regiao[chave], str) or not isinstance(regiao[chave], (list, tuple))):
+            raise ValueError(f"Região '{regiao['nome']}': '{chave}' deve ser uma lista")
+    return regiao
+
+def carregar_regioes(caminho, limiar_padrao, periodos_padrao):
+    """Lista de regiões (já normalizadas) de um arquivo JSON."""
+    with open(Path(caminho), encoding='utf-8') as f:
+        definicoes = json.load(f)
+    if isinstance(definicoes, dict):
+        definicoes = [definicoes]
+    regioes = [normalizar_regiao(definicao, limiar_padrao, periodos_padrao) for definicao in definicoes]
+    sufixos = [regiao['sufixo'] for regiao in regioes]
+    if len(set(sufixos)) != len(sufixos):
+        raise ValueError(f"Regiões com o mesmo sufixo de arquivo: {sufixos}")
+    return regioes
+
+def tem_filtro(regiao):
+    return any(chave in regiao for chave in CHAVES_FILTRO)
+
+def rua_do_logradouro(logradouro):
+    """Tipo e nome de um logradouro padronizado ("Rua X, 12 - bar" -> "rua x")."""
+    return re.split(r', | - ', logradouro, maxsplit=1)[0].strip().lower()
+
+def pertence(regiao, logradouros, indice_quadras=None):
+    """
+    Máscara dos logradouros (padronizados pelo parser) que estão na região.
+    Os filtros se somam: entra o logradouro cuja rua está em 'logradouros',
+    que casa com 'padrao' ou que fica em uma das 'quadras' do mapeamento
+    (esta precisa do índice de logic_quadras).
+    """
+    logradouros = list(logradouros)
+    if not tem_filtro(regiao):
+        return np.ones(len(logradouros), dtype=bool)
+
+    textos = [valor if isinstance(valor, str) else None for valor in logradouros]
+    mascara = np.zeros(len(logradouros), dtype=bool)
+    if 'logradouros' in regiao:
+        ruas = {str(rua).strip().lower() for rua in regiao['logradouros']}
+        mascara |= np.array([texto is not None and rua_do_logradouro(texto) in ruas for texto in textos], dtype=bool)
+    if 'padrao' in regiao:
+        padrao = re.compile(regiao['padrao'], re.IGNORECASE)
+        mascara |= np.array([texto is not None and padrao.search(texto) is not None for texto in textos], dtype=bool)
+    if 'quadras' in regiao:
+        if indice_quadras is None:
+            raise ValueError(f"Região '{regiao['nome']}' usa quadras, mas o índice do mapeamento não foi carregado")
+        quadras = {str(quadra) for quadra in regiao['quadras']}
+        localizadas = logic_quadras.localizar_quadras(textos, indice_quadras)
+        mascara |= np.array([quadra is not None and str(quadra) in quadras for quadra in localizadas], dtype=bool)
+    return mascara
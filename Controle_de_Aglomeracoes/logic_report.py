@@ -7,17 +7,35 @@ import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 import warnings
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 import re
+import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # IMPORTA O NOVO MÓDULO DE GERAÇÃO DE TEXTO
 import logic_text_generator
+import logic_storage
+import logic_agregados
+import logic_quadras
+import logic_regioes
+import logic_xlsx_writer
+import logic_profiler
+import logic_jobs
 
 warnings.filterwarnings('ignore')
 
+# Configurações
+LIMIAR = 10
+DIFERENCA_MINIMA = 10  # Variação de volume entre dias seguidos destacada no texto de análise (pessoas)
+TOP_K = 5      # Logradouros no destaque do texto de análise (geral e por período)
+DIAS_TOP = 3   # Últimos dias do intervalo considerados nesses destaques
+# Períodos em que o parser normaliza as contagens (ver normalizar_periodo); cada
+# região pode usar só parte deles. A noite é contada no dia anterior aos demais.
+PERIODOS = ['madrugada', 'manhã', 'tarde', 'noite']
+# Região do relatório de sempre: todos os logradouros e períodos da planilha (ver logic_regioes)
+REGIAO_PADRAO = {'nome': 'Santa Cecília, Campos Elíseos e Santa Ifigênia', 'limiar': LIMIAR, 'sufixo': '',
+                 'periodos': PERIODOS}
+
 # --- Funções Utilitárias (sem alteração) ---
 
 def normalizar_periodo(periodo_str):
@@ -58,129 +76,464 @@ def ordenar_logradouros_df(df_input):
     df_ordenado = df_ordenado.drop(columns=['_numero_ordem'])
     return df_ordenado
 
-# --- Função Principal de Lógica ---
+# --- Cubo de Contagens ---
 
-def execute_report_generator(processed_file_path, data_inicio, data_fim, log_callback):
+def construir_cubo(df_janela, data_inicio, n_dias, mascara=None, periodos=PERIODOS):
     """
-    Função principal que executa toda a lógica de geração de relatório.
-    Recebe o caminho do arquivo processado, datas e uma função de callback para o log.
-    Retorna os caminhos dos arquivos gerados (planilha, relatorio_txt).
+    Soma qtd_pessoas em um cubo denso [logradouro, período, dia] com np.add.at,
+    a partir dos códigos fatorados. Dia 0 = data_inicio; o eixo dos períodos
+    segue `periodos` (linhas de outros períodos ficam de fora).
+    Com `mascara`, só as linhas marcadas entram na soma (a fatoração usa todas,
+    então cubos da mesma janela compartilham os índices).
+    Retorna (cubo, {logradouro: índice}); a última linha do cubo fica zerada
+    e serve para logradouros sem registro (ex.: NaN).
     """
-    try:
-        log_callback("=" * 80)
-        log_callback("GERADOR DE RELATÓRIO CONSOLIDADO")
-        log_callback("=" * 80)
-        log_callback(f"✓ Processamento iniciado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    codigos, unicos = pd.factorize(df_janela['logradouro'])
+    periodo_idx = df_janela['periodo_norm'].map({p: i for i, p in enumerate(periodos)}).to_numpy(dtype=np.float64)
+    dia_idx = (df_janela['data'].dt.normalize() - pd.Timestamp(data_inicio).normalize()).dt.days.to_numpy(dtype=np.int64)
+    qtd = df_janela['qtd_pessoas'].to_numpy(dtype=np.float64)
+
+    validos = (codigos >= 0) & ~np.isnan(periodo_idx)
+    periodo_idx = np.nan_to_num(periodo_idx).astype(np.int64)
+    if mascara is not None:
+        validos &= np.asarray(mascara, dtype=bool)
+
+    # Contagens inteiras (o normal) vão para int32; se houver fração, float64
+    somadas = qtd if mascara is None else qtd[np.asarray(mascara, dtype=bool)]
+    dtype = np.int32 if np.all(somadas == np.round(somadas)) else np.float64
+    cubo = np.zeros((len(unicos) + 1, len(periodos), n_dias), dtype=dtype)
+    np.add.at(cubo, (codigos[validos], periodo_idx[validos], dia_idx[validos]), qtd[validos].astype(dtype))
+    return cubo, {logradouro: i for i, logradouro in enumerate(unicos)}
+
+def janela_do_cubo(cubo, inicio, n_dias):
+    """
+    Fatia de n_dias do cubo a partir do dia `inicio`. Se o cubo é float só
+    por causa de frações fora da janela, volta para int32.
+    """
+    janela = cubo[:, :, inicio:inicio + n_dias]
+    if janela.dtype.kind == 'f' and np.all(janela == np.round(janela)):
+        janela = janela.astype(np.int32)
+    return janela
+
+def registros_com_horario(df_janela, dia):
+    """Registros do dia informado com horário diferente de 00:00."""
+    datas = df_janela['data']
+    datas_normalizadas = datas.dt.normalize()
+    return ((datas_normalizadas == pd.Timestamp(dia).normalize()) & (datas != datas_normalizadas)).to_numpy()
+
+def indices_no_cubo(logradouros, mapa_indices, cubo):
+    """Índice de cada logradouro da lista no cubo (ausentes apontam para a linha zerada)."""
+    linha_vazia = cubo.shape[0] - 1
+    return np.array([mapa_indices.get(logradouro, linha_vazia) for logradouro in logradouros], dtype=np.int64)
+
+def colunas_do_relatorio(n_dias, periodos=PERIODOS):
+    """
+    Período (índice em `periodos`) e dia (índice no cubo) de cada coluna de
+    dados do relatório: a noite usa do 1º ao penúltimo dia, os demais
+    períodos do 2º ao último.
+    """
+    col_periodo, col_dia = [], []
+    for p, periodo in enumerate(periodos):
+        dias_ref = range(0, n_dias - 1) if periodo == 'noite' else range(1, n_dias)
+        col_periodo.extend([p] * len(dias_ref))
+        col_dia.extend(dias_ref)
+    return np.array(col_periodo, dtype=np.int64), np.array(col_dia, dtype=np.int64)
+
+def detectar_variacoes(cubo_ordenado, logradouros, dias_por_periodo, rotulos_por_periodo, diferenca_minima,
+                       periodos=PERIODOS):
+    """
+    Variações de um dia para o seguinte (np.diff no eixo dos dias) com
+    |diferença| >= diferenca_minima, para cada logradouro e período (o eixo
+    dos períodos do cubo segue `periodos`).
+    Retorna as variações em colunas (logradouro, periodo, d1, d2, v1, v2,
+    pct, dif_bruta; um array por chave), já ordenadas: maiores aumentos
+    primeiro, depois as maiores reduções (empates mantêm a ordem
+    logradouro > período > dia). O texto de análise formata as colunas de uma vez.
+    """
+    partes = []
+    for p, dias in enumerate(dias_por_periodo):
+        serie = cubo_ordenado[:, p, dias]
+        diferencas = np.diff(serie, axis=1)
+        pos, i = np.nonzero(np.abs(diferencas) >= diferenca_minima)
+        partes.append((pos, np.full(len(pos), p), i, serie[pos, i], serie[pos, i + 1], diferencas[pos, i]))
+
+    pos, per, i, v1, v2, dif = (np.concatenate(coluna) for coluna in zip(*partes))
+
+    # Ordem de geração (logradouro, período, dia) e depois a ordenação estável por diferença
+    geracao = np.lexsort((i, per, pos))
+    pos, per, i, v1, v2, dif = pos[geracao], per[geracao], i[geracao], v1[geracao], v2[geracao], dif[geracao]
+    aumentos = np.flatnonzero(dif > 0)
+    reducoes = np.flatnonzero(dif < 0)
+    ordem = np.concatenate([
+        aumentos[np.argsort(-dif[aumentos], kind='stable')],
+        reducoes[np.argsort(dif[reducoes], kind='stable')]
+    ])
+
+    pos, per, i, v1, v2, dif = pos[ordem], per[ordem], i[ordem], v1[ordem], v2[ordem], dif[ordem]
+
+    v1_positivo = v1 > 0
+    pct = np.where(v1_positivo, dif / np.where(v1_positivo, v1, 1) * 100, 100.0)
+
+    # Rótulos de todos os períodos em um só array; o de (período, dia) fica em inicio[período] + dia
+    rotulos = np.array([rotulo for rotulos_periodo in rotulos_por_periodo for rotulo in rotulos_periodo], dtype=object)
+    inicio = np.cumsum([0] + [len(rotulos_periodo) for rotulos_periodo in rotulos_por_periodo])[:-1]
+    return {
+        'logradouro': np.array(logradouros, dtype=object)[pos],
+        'periodo': np.array(periodos, dtype=object)[per],
+        'd1': rotulos[inicio[per] + i], 'd2': rotulos[inicio[per] + i + 1],
+        'v1': v1, 'v2': v2, 'pct': pct, 'dif_bruta': dif,
+    }
+
+def top_k(totais, k):
+    """
+    Posições dos k maiores valores positivos de `totais`, do maior para o
+    menor (empates na ordem das posições). Com np.argpartition o custo é
+    linear no número de logradouros; só os k escolhidos são ordenados.
+    """
+    totais = np.asarray(totais)
+    posicoes = np.flatnonzero(totais > 0)
+    if k <= 0:
+        return posicoes[:0]
+    if len(posicoes) > k:
+        valores = totais[posicoes]
+        corte = valores[np.argpartition(-valores, k - 1)[k - 1]]  # k-ésimo maior valor
+        acima = posicoes[valores > corte]
+        empatados = posicoes[valores == corte][:k - len(acima)]
+        posicoes = np.concatenate([acima, empatados])
+    return posicoes[np.lexsort((posicoes, -totais[posicoes]))]
+
+def top_logradouros(cubo_ordenado, logradouros, dias, k=TOP_K, periodos=None):
+    """
+    Os k logradouros com maior soma no cubo [logradouro, período, dia]
+    dentro da janela `dias` (índices no eixo dos dias) e dos `periodos`
+    (índices; todos, se None). Retorna [(logradouro, soma), ...].
+    """
+    janela = cubo_ordenado[:, :, dias] if periodos is None else cubo_ordenado[:, periodos][:, :, dias]
+    totais = janela.sum(axis=(1, 2))
+    return [(logradouros[i], totais[i].item()) for i in top_k(totais, k).tolist()]
+
+def indice_do_dia(dia, data_inicio):
+    """Posição do dia no eixo de dias do cubo."""
+    return (pd.Timestamp(dia).normalize() - pd.Timestamp(data_inicio).normalize()).days
+
+def media_arredondada(valores):
+    """round(soma / quantidade) como nos cálculos originais; '' quando não há valores."""
+    if len(valores) == 0:
+        return ''
+    return round(np.asarray(valores).sum().item() / len(valores))
+
+# --- Estrutura em Memória do Relatório ---
+# Últimos relatórios gerados neste processo, por caminho do .xlsx
+MAXIMO_ESTRUTURAS = 8
+_ESTRUTURAS = {}
+
+def montar_estrutura(linhas_planilha, logradouros, visiveis, limiar=LIMIAR, n_periodos=len(PERIODOS)):
+    """
+    Estrutura do relatório como está na planilha: cabeçalhos, linhas de dados
+    (valores como gravados, None nas células vazias), logradouros, máscara de
+    visibilidade, contagens numéricas das colunas de dados (a partir da 3ª,
+    vazias = 0), a linha de totais, o limiar da região e o número de
+    períodos (colunas de média antes da do limiar).
+    """
+    n = len(logradouros)
+    linhas = linhas_planilha[3:3 + n]
+    colunas_totais = len(linhas_planilha[1])
+    contagens = np.zeros((n, colunas_totais - 2), dtype=np.float64)
+    if n:
+        contagens[:] = [[0 if valor is None else valor for valor in linha[2:]] for linha in linhas]
+    return {
+        'cabecalhos': linhas_planilha[:3],
+        'linhas': linhas,
+        'logradouros': list(logradouros),
+        'visiveis': np.asarray(visiveis, dtype=bool),
+        'contagens': contagens,
+        'total': linhas_planilha[3 + n],
+        'limiar': limiar,
+        'n_periodos': n_periodos,
+    }
+
+def registrar_estrutura(caminho_xlsx, estrutura):
+    """Guarda a estrutura do relatório gerado (descarta as mais antigas)."""
+    _ESTRUTURAS[str(Path(caminho_xlsx).resolve())] = estrutura
+    while len(_ESTRUTURAS) > MAXIMO_ESTRUTURAS:
+        del _ESTRUTURAS[next(iter(_ESTRUTURAS))]
+
+def estrutura_do_relatorio(caminho_xlsx):
+    """Estrutura em memória do relatório gerado neste processo, ou None."""
+    return _ESTRUTURAS.get(str(Path(caminho_xlsx).resolve()))
 
-        # Configurações
-        LIMIAR = 10
-        script_dir = Path(__file__).parent
-        projeto_root = script_dir
-        
-        if not (projeto_root / 'docs').exists():
-             projeto_root = script_dir.parent
-             if not (projeto_root / 'docs').exists():
-                 log_callback(f"❌ Estrutura de pastas 'docs' não encontrada a partir de {script_dir}")
-                 raise FileNotFoundError("Não foi possível localizar a pasta 'docs'")
-
-        DOCS_DIR = projeto_root / 'docs'
-        DOCS_DIR.mkdir(exist_ok=True)
-
-        log_callback(f"\n✓ Configurações:")
-        log_callback(f"  • Limiar de aglomeração: > {LIMIAR} pessoas")
-        log_callback(f"  • Diretório saída: {DOCS_DIR}")
-        
-        arquivo_selecionado = Path(processed_file_path)
-        log_callback(f"✓ Arquivo de entrada: {arquivo_selecionado.name}")
-        log_callback(f"✓ Período definido: {data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}")
-
-        # 6. Carregar e Preparar Dados
-        log_callback(f"\n📊 Carregando dados...")
-        df = pd.read_excel(arquivo_selecionado)
+# --- Função Principal de Lógica ---
+
+def localizar_pasta_docs(log_callback):
+    """Pasta 'docs' do projeto (ao lado do script ou na pasta acima), criada se preciso."""
+    script_dir = Path(__file__).parent
+    projeto_root = script_dir
+
+    if not (projeto_root / 'docs').exists():
+         projeto_root = script_dir.parent
+         if not (projeto_root / 'docs').exists():
+             log_callback(f"❌ Estrutura de pastas 'docs' não encontrada a partir de {script_dir}")
+             raise FileNotFoundError("Não foi possível localizar a pasta 'docs'")
+
+    DOCS_DIR = projeto_root / 'docs'
+    DOCS_DIR.mkdir(exist_ok=True)
+
+    log_callback(f"\n✓ Configurações:")
+    log_callback(f"  • Limiar de aglomeração: > {LIMIAR} pessoas")
+    log_callback(f"  • Diretório saída: {DOCS_DIR}")
+    return DOCS_DIR
+
+def carregar_dados_relatorio(processed_file_path, log_callback):
+    """
+    Lê a planilha processada (ou seu artefato colunar) e prepara as colunas
+    usadas pelo relatório. Feito uma vez, serve para qualquer intervalo de datas.
+    """
+    perfil = logic_profiler.perfil_de(log_callback)
+    tarefa = logic_jobs.tarefa_de(log_callback)
+    arquivo_selecionado = Path(processed_file_path)
+    log_callback(f"✓ Arquivo de entrada: {arquivo_selecionado.name}")
+
+    # 6. Carregar e Preparar Dados
+    log_callback(f"\n📊 Carregando dados...")
+    colunas_necessarias = ['Data', 'Período', 'Qtd. pessoas', 'Logradouro', 'tipo_logradouro', 'nome_logradouro', 'numero_logradouro']
+    with perfil.etapa('relatorio', 'load'):
+        tarefa.progresso("Carregando dados")
+        df = logic_storage.ler_planilha_processada(
+            arquivo_selecionado, colunas_necessarias, ao_progredir=tarefa.contador("Linhas lidas")
+        ).reset_index(drop=True)
         log_callback(f"✓ Planilha carregada: {len(df):,} registros")
 
-        colunas_necessarias = ['Data', 'Período', 'Qtd. pessoas', 'Logradouro', 'tipo_logradouro', 'nome_logradouro', 'numero_logradouro']
-        colunas_faltantes = [col for col in colunas_necessarias if col not in df.columns]
-        if colunas_faltantes:
-            log_callback(f"\n⚠️  ERRO: Colunas obrigatórias não encontradas: {colunas_faltantes}")
-            raise KeyError(f"Colunas faltantes: {colunas_faltantes}")
+    colunas_faltantes = [col for col in colunas_necessarias if col not in df.columns]
+    if colunas_faltantes:
+        log_callback(f"\n⚠️  ERRO: Colunas obrigatórias não encontradas: {colunas_faltantes}")
+        raise KeyError(f"Colunas faltantes: {colunas_faltantes}")
 
+    with perfil.etapa('relatorio', 'parse'):
         df = df.rename(columns={
             'Data': 'data', 'Período': 'periodo', 'Qtd. pessoas': 'qtd_pessoas', 'Logradouro': 'logradouro'
         })
+        # Artefato colunar: logradouro e período vêm como categorias; as etapas abaixo usam texto
+        for col in ('logradouro', 'periodo'):
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object)
         df['data'] = pd.to_datetime(df['data'], errors='coerce')
         df = df.dropna(subset=['data'])
         df['qtd_pessoas'] = pd.to_numeric(df['qtd_pessoas'], errors='coerce')
         df = df.dropna(subset=['qtd_pessoas'])
         df['periodo_norm'] = df['periodo'].apply(normalizar_periodo)
         df = df.dropna(subset=['periodo_norm'])
-        log_callback(f"✓ Dados preparados")
+    log_callback(f"✓ Dados preparados")
+    return df
 
-        # 7. Calcular Média Anterior
-        if data_fim.weekday() == 0:  # 0 significa Segunda-feira
-            dias_recuo = 3
-            log_callback(f"📅 Relatório de Segunda-feira detectado: comparando com 3 dias atrás (Sexta-feira).")
-        else:
-            dias_recuo = 1
-            
-        data_inicio_anterior = data_inicio - timedelta(days=dias_recuo)
-        data_fim_anterior = data_fim - timedelta(days=dias_recuo)
-        
-        df_anterior = df[(df['data'] >= data_inicio_anterior) & (df['data'] <= data_fim_anterior)].copy()
+def atualizar_agregados(df, processed_file_path, docs_dir, log_callback, limiares=()):
+    """
+    Tabela diária materializada do histórico (logic_agregados), em
+    data/processed, atualizada com o DataFrame preparado: só as linhas que
+    ainda não estão nela são somadas (base canônica ou nova exportação).
+    `limiares` (os das regiões) ganham acumulados próprios além do LIMIAR.
+    Retorna a tabela, ou None se não deu para montá-la (o relatório segue
+    sem as médias móveis).
+    """
+    perfil = logic_profiler.perfil_de(log_callback)
+    logic_jobs.tarefa_de(log_callback).progresso("Atualizando agregados diários")
+    try:
+        with perfil.etapa('relatorio', 'aggregate'):
+            pasta_processed = Path(docs_dir).parent / 'data' / 'processed'
+            pasta_processed.mkdir(parents=True, exist_ok=True)
+            agregados, somadas = logic_agregados.sincronizar_agregados(
+                pasta_processed / logic_agregados.ARQUIVO_AGREGADOS, df, PERIODOS, LIMIAR, limiares
+            )
+        log_callback(f"✓ Agregados diários: {len(agregados.logradouros):,} logradouros, "
+                     f"{agregados.soma.shape[2]:,} dias ({somadas:,} registros somados agora)")
+        return agregados
+    except logic_jobs.TarefaCancelada:
+        raise
+    except Exception:
+        log_callback(f"⚠️  Agregados diários indisponíveis; o relatório segue sem as médias móveis.")
+        log_callback(traceback.format_exc())
+        return None
+
+def medias_moveis(agregados, data_fim, janelas=logic_agregados.JANELAS, linhas=None, limiar=None, periodos=None):
+    """
+    Para cada janela: a média de pessoas por dia nos últimos n dias até
+    data_fim, a dos n dias anteriores a eles e a variação percentual.
+    `linhas`, `limiar` e `periodos` restringem a uma região (ver resumo_janela).
+    """
+    resultado = []
+    for n_dias in janelas:
+        atual = agregados.resumo_janela(data_fim, n_dias, linhas, limiar, periodos)
+        anterior = agregados.resumo_janela(data_fim - timedelta(days=n_dias), n_dias, linhas, limiar, periodos)
+        variacao = 0
+        if anterior['media_dia'] > 0:
+            variacao = round((atual['media_dia'] - anterior['media_dia']) / anterior['media_dia'] * 100, 1)
+        resultado.append({'dias': n_dias, 'atual': atual, 'anterior': anterior, 'variacao': variacao})
+    return resultado
+
+def gravar_planilha_relatorio(caminho_saida, cabecalhos, matriz, visiveis, total_row, rodape, media_atual,
+                              qtd_dias_por_periodo, limiar, ao_progredir=None):
+    """
+    Planilha formatada do relatório diário e a grade em formato colunar, em
+    data/processed (lida pelo relatório de quadras no lugar do .xlsx). Roda na
+    thread de gravação.
+    Retorna as linhas de valores como ficam na planilha.
+    """
+    linhas_planilha = logic_xlsx_writer.salvar_relatorio_diario(
+        caminho_saida, cabecalhos, matriz, visiveis, total_row, rodape, media_atual,
+        qtd_dias_por_periodo, limiar, ao_progredir=ao_progredir
+    )
+    logic_storage.salvar_artefato(
+        logic_storage.grade_de_planilha(linhas_planilha), caminho_saida, logic_storage.caminho_artefato_relatorio
+    )
+    return linhas_planilha
+
+def resumo_executivo(data):
+    """Linhas do resumo executivo do log, a partir dos dados do texto de análise."""
+    linhas = [
+        f"\n" + "=" * 80,
+        "RESUMO EXECUTIVO",
+        "=" * 80,
+        f"Média Atual:    {int(data['media_atual'])} pessoas/dia",
+        f"Média Anterior: {int(data['media_anterior'])} pessoas/dia",
+        f"Variação:       {data['variacao']:+.1f}%",
+        "-" * 40,
+        f"Destaques do dia {data['ultimo_dia_val'].strftime('%d/%m/%Y')}:",
+    ]
+    for periodo, contagem in data['ultimo_dia_por_periodo']:
+        rotulo = f"{periodo.capitalize()}:"
+        linhas.append(f"  • {rotulo:<10} {int(contagem['total'])} pessoas ({int(contagem['enderecos'])} aglomerações)")
+    if data['medias_moveis']:
+        linhas.append("-" * 40)
+        for movel in data['medias_moveis']:
+            linhas.append(f"Últimos {movel['dias']:>2} dias: {movel['atual']['media_dia']:.0f} pessoas/dia ({movel['variacao']:+.1f}%)")
+    linhas.append("=" * 80)
+    return linhas
+
+# --- Relatórios por Região ---
+
+def agregar_intervalo(df, data_inicio, data_fim, log_callback, periodos=PERIODOS):
+    """
+    Passo comum a todas as regiões de um intervalo: um único cubo
+    [logradouro, período, dia] cobre a janela anterior e a atual (nos
+    `periodos`), e os logradouros do período atual já saem ordenados. Cada
+    região depois só seleciona as suas linhas e períodos (montar_relatorio_regiao).
+    """
+    # 7. Janela Anterior
+    if data_fim.weekday() == 0:  # 0 significa Segunda-feira
+        dias_recuo = 3
+        log_callback(f"📅 Relatório de Segunda-feira detectado: comparando com 3 dias atrás (Sexta-feira).")
+    else:
+        dias_recuo = 1
+
+    data_inicio_anterior = data_inicio - timedelta(days=dias_recuo)
+    data_fim_anterior = data_fim - timedelta(days=dias_recuo)
+
+    # Um único cubo cobre a janela anterior e a atual; as duas são fatias
+    # deslocadas de dias_recuo dias no mesmo eixo.
+    dias_lista = gerar_lista_dias(data_inicio, data_fim)
+    n_dias = len(dias_lista)
+    df_comparacao = df[(df['data'] >= data_inicio_anterior) & (df['data'] <= data_fim)]
+
+    # Registros com horário no último dia da janela anterior ficam fora dela
+    # (data <= data_fim_anterior), mas entram na atual: vão para um cubo à parte
+    com_horario = registros_com_horario(df_comparacao, data_fim_anterior)
+    cubo_total, mapa_indices = construir_cubo(df_comparacao, data_inicio_anterior, dias_recuo + n_dias, ~com_horario,
+                                              periodos)
+
+    df_periodo = df_comparacao[df_comparacao['data'] >= data_inicio]
+    log_callback(f"✓ Dados do período atual: {len(df_periodo):,} registros")
+
+    cubo = cubo_total[:, :, dias_recuo:]
+    dia_fim_anterior = n_dias - 1 - dias_recuo
+    if com_horario.any() and dia_fim_anterior >= 0:
+        cubo_horario, _ = construir_cubo(df_comparacao, data_fim_anterior, 1, com_horario, periodos)
+        cubo = np.array(cubo, dtype=np.result_type(cubo, cubo_horario))
+        cubo[:, :, dia_fim_anterior] += cubo_horario[:, :, 0]
+
+    # 8. Ordenar Logradouros do Período Atual
+    log_callback(f"\n🔄 Construindo matriz de contagens...")
+    df_logradouros_unicos = df_periodo[['logradouro', 'tipo_logradouro', 'nome_logradouro', 'numero_logradouro']].drop_duplicates()
+    df_logradouros_ordenados = ordenar_logradouros_df(df_logradouros_unicos)
+    logradouros = df_logradouros_ordenados['logradouro'].tolist()
+
+    return {
+        'dias_recuo': dias_recuo, 'data_inicio_anterior': data_inicio_anterior, 'data_fim_anterior': data_fim_anterior,
+        'dias_lista': dias_lista, 'n_dias': n_dias, 'periodos': list(periodos),
+        'cubo_total': cubo_total, 'cubo': cubo, 'mapa_indices': mapa_indices,
+        'logradouros': logradouros, 'indices_logradouros': indices_no_cubo(logradouros, mapa_indices, cubo),
+    }
+
+def selecionar_regiao(agregacao, regiao, indice_quadras=None):
+    """
+    Cubos da janela anterior e atual e logradouros ordenados só com as linhas
+    e os períodos da região. Sem filtro, são os da agregação inteira.
+    Retorna (cubo_anterior, cubo_ordenado, logradouros).
+    """
+    cubo_total, cubo, n_dias = agregacao['cubo_total'], agregacao['cubo'], agregacao['n_dias']
+    logradouros, indices = agregacao['logradouros'], agregacao['indices_logradouros']
+    periodos = regiao.get('periodos', PERIODOS)
+    if list(periodos) != agregacao['periodos']:
+        colunas = [agregacao['periodos'].index(periodo) for periodo in periodos]
+        cubo_total, cubo = cubo_total[:, colunas], cubo[:, colunas]
+    if logic_regioes.tem_filtro(regiao):
+        # A última linha do cubo (zerada, dos logradouros sem registro) fica sempre
+        linhas = np.append(logic_regioes.pertence(regiao, agregacao['mapa_indices'], indice_quadras), True)
+        nova_posicao = np.cumsum(linhas) - 1
+        na_regiao = linhas[indices]
+        cubo_total, cubo = cubo_total[linhas], cubo[linhas]
+        logradouros = [logradouro for logradouro, dentro in zip(logradouros, na_regiao.tolist()) if dentro]
+        indices = nova_posicao[indices[na_regiao]]
+    cubo_anterior = janela_do_cubo(cubo_total, 0, n_dias)
+    cubo_ordenado = janela_do_cubo(cubo, 0, n_dias)[indices]
+    return cubo_anterior, cubo_ordenado, logradouros
+
+def montar_relatorio_regiao(agregacao, regiao, data_inicio, data_fim, docs_dir, log_callback, sufixo='',
+                            agregados=None, indice_quadras=None):
+    """
+    Monta e grava o relatório (planilha + texto de análise) de uma região a
+    partir da agregação do intervalo (agregar_intervalo). O nome da região
+    vai no título e no texto; o limiar dela vale para destaques, contagens
+    de aglomeração e médias móveis, e só os períodos dela entram.
+    Retorna os caminhos dos arquivos gerados (planilha, relatorio_txt).
+    """
+    perfil = logic_profiler.perfil_de(log_callback)
+    tarefa = logic_jobs.tarefa_de(log_callback)
+    DOCS_DIR = Path(docs_dir)
+    limiar = regiao['limiar']
+    periodos = list(regiao.get('periodos', PERIODOS))
+    data_inicio_anterior, data_fim_anterior = agregacao['data_inicio_anterior'], agregacao['data_fim_anterior']
+    dias_lista, n_dias = agregacao['dias_lista'], agregacao['n_dias']
+
+    with perfil.etapa('relatorio', 'aggregate'):
+        cubo_anterior, cubo_ordenado, logradouros = selecionar_regiao(agregacao, regiao, indice_quadras)
+
+        # Média Anterior
+        col_periodo, col_dia = colunas_do_relatorio(n_dias, periodos)
+        totais_por_coluna_anterior = cubo_anterior.sum(axis=0)[col_periodo, col_dia]
+        totais_por_coluna_anterior = totais_por_coluna_anterior[totais_por_coluna_anterior > 0]
 
         media_anterior = 0.0
-        if len(df_anterior) > 0:
-            df_anterior['data_str'] = df_anterior['data'].dt.strftime('%d/%m/%Y')
-            contagens_anterior = df_anterior.groupby(['logradouro', 'periodo_norm', 'data_str'])['qtd_pessoas'].sum().to_dict()
-            dias_anteriores = gerar_lista_dias(data_inicio_anterior, data_fim_anterior)
-            dias_validos_anterior = dias_anteriores[1:]
-            dias_noite_anterior = dias_anteriores[:-1]
-            df_logradouros_unicos_anterior = df_anterior[['logradouro', 'tipo_logradouro', 'nome_logradouro', 'numero_logradouro']].drop_duplicates()
-            df_logradouros_ordenados_anterior = ordenar_logradouros_df(df_logradouros_unicos_anterior)
-            logradouros_anterior = df_logradouros_ordenados_anterior['logradouro'].tolist()
-            
-            totais_por_coluna_anterior = []
-            for periodo in ['madrugada', 'manhã', 'tarde', 'noite']:
-                dias_ref = dias_noite_anterior if periodo == 'noite' else dias_validos_anterior
-                for dia in dias_ref:
-                    dia_str = dia.strftime('%d/%m/%Y')
-                    soma_coluna = sum(contagens_anterior.get((logradouro, periodo, dia_str), 0) for logradouro in logradouros_anterior)
-                    if soma_coluna > 0:
-                        totais_por_coluna_anterior.append(soma_coluna)
-            
-            if totais_por_coluna_anterior:
-                media_anterior = round(sum(totais_por_coluna_anterior) / len(totais_por_coluna_anterior))
-        
+        if len(totais_por_coluna_anterior):
+            media_anterior = media_arredondada(totais_por_coluna_anterior)
+
         if media_anterior > 0:
             log_callback(f"✓ Média anterior calculada: {media_anterior:.0f} pessoas/dia")
         else:
             log_callback(f"⚠️  Sem dados para o intervalo anterior. Média anterior = 0")
 
-        df_periodo = df[(df['data'] >= data_inicio) & (df['data'] <= data_fim)].copy()
-        log_callback(f"✓ Dados do período atual: {len(df_periodo):,} registros")
-
-        # 8. Gerar Lista de Dias
-        dias_lista = gerar_lista_dias(data_inicio, data_fim)
+        # 9. Gerar Lista de Dias
         dias_validos = dias_lista[1:]
         dias_noite = dias_lista[:-1]
         log_callback(f"✓ Estrutura dos dias gerada.")
-
-        # 9. Construir Matriz de Contagens
-        log_callback(f"\n🔄 Construindo matriz de contagens...")
-        df_periodo['data_str'] = df_periodo['data'].dt.strftime('%d/%m/%Y')
-        contagens = df_periodo.groupby(['logradouro', 'periodo_norm', 'data_str'])['qtd_pessoas'].sum().to_dict()
-        df_logradouros_unicos = df_periodo[['logradouro', 'tipo_logradouro', 'nome_logradouro', 'numero_logradouro']].drop_duplicates()
-        df_logradouros_ordenados = ordenar_logradouros_df(df_logradouros_unicos)
-        logradouros = df_logradouros_ordenados['logradouro'].tolist()
         log_callback(f"✓ {len(logradouros)} logradouros únicos identificados e ordenados")
 
+    tarefa.progresso("Montando relatório")
+    with perfil.etapa('relatorio', 'format'):
         # 10. Criar Cabeçalhos
-        periodos = ['madrugada', 'manhã', 'tarde', 'noite']
-        periodos_fmt = {'madrugada': 'Madrugada', 'manhã': 'Manhã', 'tarde': 'Tarde', 'noite': 'Noite'}
-        
+        periodos_fmt = {periodo: periodo.capitalize() for periodo in periodos}
+
         primeiro_dia = dias_validos[0] if dias_validos else data_inicio
         ultimo_dia = dias_validos[-1] if dias_validos else data_fim
-        header1 = [f"Contagem diária - Santa Cecília, Campos Elíseos e Santa Ifigênia - {primeiro_dia.strftime('%d/%m/%Y')} a {ultimo_dia.strftime('%d/%m/%Y')}"]
+        header1 = [f"Contagem diária - {regiao['nome']} - {primeiro_dia.strftime('%d/%m/%Y')} a {ultimo_dia.strftime('%d/%m/%Y')}"]
         header2 = ['Ordem', 'Período']
         header3 = ['', 'Logradouro' + ' ' * 20 + 'Data']
 
@@ -190,9 +543,9 @@ def execute_report_generator(processed_file_path, data_inicio, data_fim, log_cal
                 header2.append(periodos_fmt[periodo])
             for dia in dias_ref:
                 header3.append(dia.strftime('%d'))
-        
-        header2.extend(['Média por período', '', '', '', ''])
-        header3.extend(['Madrugada', 'Manhã', 'Tarde', 'Noite', '>10'])
+
+        header2.extend(['Média por período'] + [''] * len(periodos))
+        header3.extend([periodos_fmt[periodo] for periodo in periodos] + [f'>{limiar:g}'])
 
         colunas_totais = len(header2)
         while len(header1) < colunas_totais: header1.append('')
@@ -201,39 +554,24 @@ def execute_report_generator(processed_file_path, data_inicio, data_fim, log_cal
 
         # 11. Construir Matriz de Dados
         log_callback(f"\n🔄 Construindo matriz de dados...")
+        valores = cubo_ordenado[:, col_periodo, col_dia]        # [logradouro, coluna do relatório]
+
+        soma_linha = valores.sum(axis=1)
+        acima_limiar = valores > limiar
+        contador_acima_limiar = acima_limiar.sum(axis=1)
+        colunas_por_periodo = [np.flatnonzero(col_periodo == p) for p in range(len(periodos))]
+        somas_por_periodo = [valores[:, cols].sum(axis=1) for cols in colunas_por_periodo]
+
+        linhas_mantidas = np.flatnonzero(soma_linha > 0)
         matriz = []
-        visiveis = []
-
-        for logradouro in logradouros:
-            linha = ['', logradouro]
-            soma_linha = 0
-            alguma_acima_limiar = False
-            valores_por_periodo = {'madrugada': [], 'manhã': [], 'tarde': [], 'noite': []}
-            contador_acima_10 = 0
-            
-            for periodo in periodos:
-                dias_ref = dias_noite if periodo == 'noite' else dias_validos
-                for dia in dias_ref:
-                    dia_str = dia.strftime('%d/%m/%Y')
-                    chave = (logradouro, periodo, dia_str)
-                    valor = contagens.get(chave, 0)
-                    linha.append(valor if valor > 0 else '')
-                    soma_linha += valor
-                    if valor > LIMIAR:
-                        alguma_acima_limiar = True
-                        contador_acima_10 += 1
-                    valores_por_periodo[periodo].append(valor)
-            
-            media_madrugada = round(sum(valores_por_periodo['madrugada']) / len(valores_por_periodo['madrugada'])) if valores_por_periodo['madrugada'] else ''
-            media_manha = round(sum(valores_por_periodo['manhã']) / len(valores_por_periodo['manhã'])) if valores_por_periodo['manhã'] else ''
-            media_tarde = round(sum(valores_por_periodo['tarde']) / len(valores_por_periodo['tarde'])) if valores_por_periodo['tarde'] else ''
-            media_noite = round(sum(valores_por_periodo['noite']) / len(valores_por_periodo['noite'])) if valores_por_periodo['noite'] else ''
-            
-            linha.extend([media_madrugada, media_manha, media_tarde, media_noite, contador_acima_10 if contador_acima_10 > 0 else ''])
-            
-            if soma_linha > 0:
-                matriz.append(linha)
-                visiveis.append(alguma_acima_limiar)
+        for idx in linhas_mantidas:
+            linha = ['', logradouros[idx]]
+            linha.extend(valor if valor > 0 else '' for valor in valores[idx].tolist())
+            for cols, somas in zip(colunas_por_periodo, somas_por_periodo):
+                linha.append(round(somas[idx].item() / len(cols)) if len(cols) else '')
+            linha.append(contador_acima_limiar[idx].item() if contador_acima_limiar[idx] > 0 else '')
+            matriz.append(linha)
+        visiveis = acima_limiar[linhas_mantidas].any(axis=1).tolist()
 
         ordem = 1
         for i in range(len(matriz)):
@@ -247,226 +585,408 @@ def execute_report_generator(processed_file_path, data_inicio, data_fim, log_cal
         # 12. Calcular Linha de Totais
         total_row = [''] * colunas_totais
         total_row[1] = 'TOTAL'
-        num_colunas_dados = colunas_totais - 5
+        num_colunas_dados = colunas_totais - len(periodos) - 1
 
-        for col in range(2, num_colunas_dados):
-            soma = sum(matriz[row][col] if isinstance(matriz[row][col], (int, float)) else 0 for row in range(len(matriz)))
-            total_row[col] = soma if soma > 0 else ''
+        valores_mantidos = valores[linhas_mantidas]
+        totais = np.where(valores_mantidos > 0, valores_mantidos, 0).sum(axis=0)
+        total_row[2:num_colunas_dados] = [soma if soma > 0 else '' for soma in totais.tolist()]
 
-        total_valores_por_periodo = {'madrugada': [], 'manhã': [], 'tarde': [], 'noite': []}
-        col_idx = 2
-        for periodo in periodos:
-            dias_ref = dias_noite if periodo == 'noite' else dias_validos
-            for _ in dias_ref:
-                valor = total_row[col_idx]
-                if isinstance(valor, (int, float)) and valor > 0:
-                    total_valores_por_periodo[periodo].append(valor)
-                col_idx += 1
-        
-        media_total_madr = round(sum(total_valores_por_periodo['madrugada']) / len(total_valores_por_periodo['madrugada'])) if total_valores_por_periodo['madrugada'] else ''
-        media_total_manha = round(sum(total_valores_por_periodo['manhã']) / len(total_valores_por_periodo['manhã'])) if total_valores_por_periodo['manhã'] else ''
-        media_total_tarde = round(sum(total_valores_por_periodo['tarde']) / len(total_valores_por_periodo['tarde'])) if total_valores_por_periodo['tarde'] else ''
-        media_total_noite = round(sum(total_valores_por_periodo['noite']) / len(total_valores_por_periodo['noite'])) if total_valores_por_periodo['noite'] else ''
-
-        total_row[num_colunas_dados] = media_total_madr
-        total_row[num_colunas_dados + 1] = media_total_manha
-        total_row[num_colunas_dados + 2] = media_total_tarde
-        total_row[num_colunas_dados + 3] = media_total_noite
-        total_row[num_colunas_dados + 4] = ''
-
-        valores_somados = [v for v in total_row[2:num_colunas_dados] if isinstance(v, (int, float)) and v > 0]
-        media_atual = round(sum(valores_somados) / len(valores_somados)) if valores_somados else 0
+        for p, cols in enumerate(colunas_por_periodo):
+            totais_periodo = totais[cols]
+            total_row[num_colunas_dados + p] = media_arredondada(totais_periodo[totais_periodo > 0])
+        total_row[num_colunas_dados + len(periodos)] = ''
+
+        totais_positivos = totais[totais > 0]
+        media_atual = media_arredondada(totais_positivos) if len(totais_positivos) else 0
         log_callback(f"\n📊 Médias calculadas:")
         log_callback(f"  • Média atual: {media_atual:.0f} pessoas/dia")
         log_callback(f"  • Média anterior: {media_anterior:.0f} pessoas/dia")
 
-        # --- NOVO BLOCO: DETECÇÃO E ORDENAÇÃO DE VARIAÇÕES (MÍNIMO 10 PESSOAS) ---
-        log_callback(f"📝 Detectando variações de volume >= 10 pessoas...")
-        todas_variacoes = []
-        DIFERENCA_MINIMA = 10 
-
-        for logradouro in logradouros:
-            for periodo in periodos:
-                dias_ref = dias_noite if periodo == 'noite' else dias_validos
-                for i in range(len(dias_ref) - 1):
-                    v1 = contagens.get((logradouro, periodo, dias_ref[i].strftime('%d/%m/%Y')), 0)
-                    v2 = contagens.get((logradouro, periodo, dias_ref[i+1].strftime('%d/%m/%Y')), 0)
-                    
-                    dif_bruta = v2 - v1
-                    if abs(dif_bruta) >= DIFERENCA_MINIMA:
-                        pct_info = (dif_bruta / v1 * 100) if v1 > 0 else 100.0
-                        todas_variacoes.append({
-                            'logradouro': logradouro, 'periodo': periodo,
-                            'd1': dias_ref[i].strftime('%d/%m'), 'd2': dias_ref[i+1].strftime('%d/%m'),
-                            'v1': v1, 'v2': v2, 'pct': pct_info, 'dif_bruta': dif_bruta
-                        })
-        
+        # --- NOVO BLOCO: DETECÇÃO E ORDENAÇÃO DE VARIAÇÕES (MÍNIMO DIFERENCA_MINIMA PESSOAS) ---
+        log_callback(f"📝 Detectando variações de volume >= {DIFERENCA_MINIMA} pessoas...")
+
         # ORDENAÇÃO: Primeiro os maiores aumentos (desc), depois as maiores reduções (asc)
-        aumentos = sorted([v for v in todas_variacoes if v['dif_bruta'] > 0], key=lambda x: x['dif_bruta'], reverse=True)
-        reducoes = sorted([v for v in todas_variacoes if v['dif_bruta'] < 0], key=lambda x: x['dif_bruta']) # Mais negativo primeiro
-        variacoes_extremas = aumentos + reducoes
+        dias_por_periodo = [col_dia[cols] for cols in colunas_por_periodo]
+        rotulos_por_periodo = [
+            [d.strftime('%d/%m') for d in (dias_noite if periodo == 'noite' else dias_validos)]
+            for periodo in periodos
+        ]
+        variacoes_extremas = detectar_variacoes(
+            cubo_ordenado, logradouros, dias_por_periodo, rotulos_por_periodo, DIFERENCA_MINIMA, periodos
+        )
         # -----------------------------------------------------------------------
 
         # 13. Gerar Dados de Análise (Cálculos)
         log_callback(f"\n📝 Gerando dados para o texto de análise...")
-        
-        def somar_periodo_no_dia(periodo, dia_str):
-            total, enderecos, soma_aglom = 0.0, 0, 0.0
-            for logradouro in logradouros:
-                valor = contagens.get((logradouro, periodo, dia_str), 0)
-                total += valor
-                if valor > LIMIAR:
-                    enderecos += 1
-                    soma_aglom += valor
-            return {'total': total, 'enderecos': enderecos, 'soma_aglom': soma_aglom}
+
+        def somar_periodo_no_dia(p, dia):
+            valores_dia = cubo_ordenado[:, p, indice_do_dia(dia, data_inicio)]
+            acima = valores_dia > limiar
+            return {
+                'total': float(valores_dia.sum()),
+                'enderecos': int(acima.sum()),
+                'soma_aglom': float(valores_dia[acima].sum())
+            }
 
         ultimo_dia_val = dias_validos[-1] if dias_validos else data_fim
         ultimo_dia_noite = dias_noite[-1] if dias_noite else data_fim
 
-        madr = somar_periodo_no_dia('madrugada', ultimo_dia_val.strftime('%d/%m/%Y'))
-        manha = somar_periodo_no_dia('manhã', ultimo_dia_val.strftime('%d/%m/%Y'))
-        tarde = somar_periodo_no_dia('tarde', ultimo_dia_val.strftime('%d/%m/%Y'))
-        noite = somar_periodo_no_dia('noite', ultimo_dia_noite.strftime('%d/%m/%Y'))
-
-        ultimos_3_dias = dias_validos[-3:] if len(dias_validos) >= 3 else dias_validos
-        soma_por_logradouro = {}
-        for logradouro in logradouros:
-            total = sum(contagens.get((logradouro, p, d.strftime('%d/%m/%Y')), 0) for p in periodos for d in ultimos_3_dias)
-            if total > 0: soma_por_logradouro[logradouro] = total
-        
-        top_5_logradouros = sorted(soma_por_logradouro.items(), key=lambda x: x[1], reverse=True)[:5]
+        ultimo_dia_por_periodo = [
+            (periodo, somar_periodo_no_dia(p, ultimo_dia_noite if periodo == 'noite' else ultimo_dia_val))
+            for p, periodo in enumerate(periodos)
+        ]
+
+        # Destaques dos últimos DIAS_TOP dias: no geral e em cada período (nos dias das colunas dele)
+        dias_top = [indice_do_dia(d, data_inicio) for d in dias_validos[-DIAS_TOP:]]
+        top_5_logradouros = top_logradouros(cubo_ordenado, logradouros, dias_top)
+        top_por_periodo = [
+            (periodo, top_logradouros(cubo_ordenado, logradouros, dias_por_periodo[p][-DIAS_TOP:], periodos=[p]))
+            for p, periodo in enumerate(periodos)
+        ]
         variacao = round(((media_atual - media_anterior) / media_anterior) * 100, 1) if media_anterior > 0 else 0
+        moveis = []
+        if agregados is not None:
+            linhas_agregados = None
+            if logic_regioes.tem_filtro(regiao):
+                linhas_agregados = np.flatnonzero(logic_regioes.pertence(regiao, agregados.logradouros, indice_quadras))
+            agregados.garantir_limiares([limiar])  # Já preparado por atualizar_agregados nas regiões conhecidas
+            moveis = medias_moveis(agregados, data_fim, linhas=linhas_agregados, limiar=limiar, periodos=periodos)
         hoje = datetime.now()
         ref_texto = "sexta-feira" if hoje.weekday() == 0 else "ontem"
 
         # 14. Criar Rodapé
         hoje_formatado = hoje.strftime('%d/%m/%Y')
         rodape = [
-            ['Nota: As ruas sem aglomeração (>10) no período solicitado estão ocultas, mas constam na planilha.'],
+            [f'Nota: As ruas sem aglomeração (>{limiar:g}) no período solicitado estão ocultas, mas constam na planilha.'],
             ['Fonte: SMS/Redenção na Rua'],
             [f'Elaborado por: SGM/SEPE, em {hoje_formatado}']
         ]
         rodape_norm = [linha + [''] * (colunas_totais - len(linha)) for linha in rodape]
         log_callback(f"✓ Rodapé criado")
 
-        # 15. Montar Saída Completa
-        saida = [header1, header2, header3, *matriz, total_row, *rodape_norm]
-        
-        # 16. Exportar para Excel
-        nome_arquivo_saida = f"relatorio_diario_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    with perfil.etapa('relatorio', 'write'):
+        # 15-16. Exportar para Excel
+        sufixo_regiao = f"_{regiao['sufixo']}" if regiao['sufixo'] else ''
+        nome_arquivo_saida = f"relatorio_diario_{datetime.now().strftime('%Y%m%d_%H%M%S')}{sufixo_regiao}{sufixo}.xlsx"
         caminho_saida = DOCS_DIR / nome_arquivo_saida
-        pd.DataFrame(saida).to_excel(caminho_saida, index=False, header=False, engine='openpyxl')
+        caminho_txt = DOCS_DIR / f"{nome_arquivo_saida.replace('.xlsx', '')}_analise.txt"
 
-        # 17. Aplicar Formatação
+        # 17. Gravar com Formatação (uma passada, estilos nomeados compartilhados) na thread de gravação;
+        # o texto de análise e o resumo são montados enquanto a planilha é serializada
         log_callback(f"\n🎨 Aplicando formatação...")
-        wb = load_workbook(caminho_saida)
-        ws = wb.active
-        fonte_bold, fonte_italic = Font(bold=True), Font(italic=True, size=10)
-        fill_cinza = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
-        fill_azul = PatternFill(start_color='B7E1FA', end_color='B7E1FA', fill_type='solid')
-        border_thin = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=colunas_totais)
-        ws.cell(1, 1).alignment = Alignment(horizontal='center', vertical='center')
-        ws.cell(1, 1).font, ws.cell(1, 1).fill = fonte_bold, fill_cinza
-        
-        for row in range(2, 4):
-            for col in range(1, colunas_totais + 1):
-                cell = ws.cell(row, col)
-                cell.font, cell.fill, cell.border = fonte_bold, fill_cinza, border_thin
-        
-        ws.merge_cells(start_row=2, start_column=1, end_row=3, end_column=1)
-        ws.cell(2, 1).alignment = Alignment(horizontal='center', vertical='center')
-
-        col_inicio = 3
-        for periodo in periodos:
-            qtd_dias = len(dias_noite) if periodo == 'noite' else len(dias_validos)
-            if qtd_dias > 0:
-                ws.merge_cells(start_row=2, start_column=col_inicio, end_row=2, end_column=col_inicio + qtd_dias - 1)
-                ws.cell(2, col_inicio).alignment = Alignment(horizontal='center', vertical='center')
-            col_inicio += qtd_dias
-
-        col_medias = colunas_totais - 4
-        ws.merge_cells(start_row=2, start_column=col_medias, end_row=2, end_column=col_medias + 3)
-        ws.cell(2, col_medias).value = "Média por período"
-        ws.cell(2, col_medias).alignment = Alignment(horizontal='center', vertical='center')
-        
-        col_maior10 = colunas_totais
-        ws.merge_cells(start_row=2, start_column=col_maior10, end_row=3, end_column=col_maior10)
-        ws.cell(2, col_maior10).value = ">10"
-        ws.cell(2, col_maior10).alignment = Alignment(horizontal='center', vertical='center')
-
-        primeira_linha_dados = 4
-        col_madrugada = colunas_totais - 4
-        for row_idx, visivel in enumerate(visiveis):
-            row = primeira_linha_dados + row_idx
-            if not visivel: ws.row_dimensions[row].hidden = True
-            for col in range(1, colunas_totais + 1):
-                cell = ws.cell(row, col)
-                cell.alignment = Alignment(horizontal='center')
-                cell.border = border_thin
-                if col >= 3 and isinstance(cell.value, (int, float)) and cell.value > LIMIAR:
-                     if col != col_maior10: cell.fill = fill_azul
-
-        linha_total = primeira_linha_dados + len(matriz)
-        for col in range(1, colunas_totais + 1):
-            cell = ws.cell(linha_total, col)
-            cell.font, cell.fill, cell.alignment, cell.border = fonte_bold, fill_cinza, Alignment(horizontal='center'), border_thin
-            if col == col_maior10: cell.value = ''
-
-        linha_rodape_inicio = linha_total + 1
-        for row in range(linha_rodape_inicio, linha_rodape_inicio + 3):
-            for col in range(1, colunas_totais + 1): ws.cell(row, col).font = fonte_italic
-
-        linha_media = linha_rodape_inicio + 4
-        ws.cell(linha_media, 2).value, ws.cell(linha_media, 2).font = 'Média:', fonte_bold
-        ws.cell(linha_media, 3).value, ws.cell(linha_media, 3).font = int(media_atual), fonte_bold
-        ws.cell(linha_media, 3).alignment = Alignment(horizontal='center')
-
-        ws.column_dimensions['A'].width, ws.column_dimensions['B'].width = 8, 45
-        for col in range(3, col_madrugada): ws.column_dimensions[get_column_letter(col)].width = 6
-        for col in range(col_madrugada, col_maior10 + 1): ws.column_dimensions[get_column_letter(col)].width = 12
-
-        wb.save(caminho_saida)
-        log_callback(f"✓ Formatação aplicada")
-
-        # 18. Exportar Texto de Análise
-        log_callback(f"\n📝 Exportando texto de análise...")
-        nome_txt = f"{nome_arquivo_saida.replace('.xlsx', '')}_analise.txt"
-        caminho_txt = DOCS_DIR / nome_txt
-
-        report_data = {
-            'data_inicio': data_inicio, 'data_fim': data_fim,
-            'data_inicio_anterior': data_inicio_anterior, 'data_fim_anterior': data_fim_anterior,
-            'hoje': hoje, 'media_atual': media_atual, 'media_anterior': media_anterior,
-            'variacao': variacao, 'ultimo_dia_val': ultimo_dia_val, 'ultimo_dia_noite': ultimo_dia_noite,
-            'madr': madr, 'manha': manha, 'tarde': tarde, 'noite': noite,
-            'top_5_logradouros': top_5_logradouros, 
-            'variacoes_extremas': variacoes_extremas, 
-            'ref_texto': ref_texto
-        }
-        
-        conteudo_txt = logic_text_generator.generate_analysis_text(report_data)
-        with open(caminho_txt, 'w', encoding='utf-8') as f: f.write(conteudo_txt)
+        gravacao = logic_storage.GravacaoEmSegundoPlano(
+            gravar_planilha_relatorio, caminho_saida, (header1, header2, header3), matriz, visiveis, total_row,
+            rodape_norm, media_atual, [len(dias_noite) if periodo == 'noite' else len(dias_validos) for periodo in periodos],
+            limiar, ao_progredir=tarefa.contador("Células formatadas")
+        )
+
+    with gravacao:
+        try:
+            # 18. Exportar Texto de Análise
+            log_callback(f"\n📝 Exportando texto de análise...")
+            report_data = {
+                'regiao': regiao['nome'], 'limiar': limiar, 'diferenca_minima': DIFERENCA_MINIMA,
+                'data_inicio': data_inicio, 'data_fim': data_fim,
+                'data_inicio_anterior': data_inicio_anterior, 'data_fim_anterior': data_fim_anterior,
+                'hoje': hoje, 'media_atual': media_atual, 'media_anterior': media_anterior,
+                'variacao': variacao, 'ultimo_dia_val': ultimo_dia_val, 'ultimo_dia_noite': ultimo_dia_noite,
+                'ultimo_dia_por_periodo': ultimo_dia_por_periodo,
+                'top_5_logradouros': top_5_logradouros, 'top_por_periodo': top_por_periodo,
+                'top_k': TOP_K, 'dias_top': DIAS_TOP,
+                'variacoes_extremas': variacoes_extremas,
+                'ref_texto': ref_texto,
+                'medias_moveis': moveis
+            }
+
+            with perfil.etapa('relatorio', 'format'):
+                conteudo_txt = logic_text_generator.generate_analysis_text(report_data)
+                resumo = resumo_executivo(report_data)
+            with perfil.etapa('relatorio', 'write'):
+                with open(caminho_txt, 'w', encoding='utf-8') as f: f.write(conteudo_txt)
+                linhas_planilha = gravacao.concluir()
+        except BaseException:
+            # Sem a planilha, o texto de análise não fica sozinho em docs
+            caminho_txt.unlink(missing_ok=True)
+            raise
+    log_callback(f"✓ Formatação aplicada")
+
+    # Estrutura em memória, usada pelo relatório de quadras no mesmo processo (sem reler a planilha)
+    registrar_estrutura(caminho_saida, montar_estrutura(
+        linhas_planilha, [logradouros[idx] for idx in linhas_mantidas], visiveis, limiar, len(periodos)
+    ))
+
+    # 19. Resumo Executivo
+    for linha in resumo:
+        log_callback(linha)
+
+    return str(caminho_saida), str(caminho_txt)
+
+def _indice_das_regioes(regioes, log_callback):
+    """Índice de quadras (logic_quadras), carregado só se alguma região é definida por quadras."""
+    if any('quadras' in regiao for regiao in regioes):
+        return logic_quadras.carregar_indice_quadras(log_callback=log_callback)
+    return None
 
-        # 19. Resumo Executivo
-        log_callback(f"\n" + "=" * 80)
-        log_callback("RESUMO EXECUTIVO")
+def gerar_relatorios_regioes(df, data_inicio, data_fim, docs_dir, log_callback, regioes, sufixo='', agregados=None):
+    """
+    Relatórios de várias regiões para um intervalo: a agregação (cubo e
+    ordenação dos logradouros) é feita uma vez e cada região grava a sua
+    planilha e o seu texto. Uma região que falha não impede as demais.
+    Retorna [(nome da região, planilha, relatorio_txt), ...] na ordem recebida.
+    """
+    perfil = logic_profiler.perfil_de(log_callback)
+    log_callback(f"✓ Período definido: {data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}")
+
+    logic_jobs.tarefa_de(log_callback).progresso("Agregando contagens")
+    with perfil.etapa('relatorio', 'aggregate'):
+        periodos = [periodo for periodo in PERIODOS if any(periodo in regiao.get('periodos', PERIODOS) for regiao in regioes)]
+        agregacao = agregar_intervalo(df, data_inicio, data_fim, log_callback, periodos)
+    indice_quadras = _indice_das_regioes(regioes, log_callback)
+
+    gerados = []
+    for regiao in regioes:
+        log_callback(f"\n🗺️  Região: {regiao['nome']} (limiar > {regiao['limiar']:g})")
+        try:
+            caminhos = montar_relatorio_regiao(agregacao, regiao, data_inicio, data_fim, docs_dir, log_callback,
+                                               sufixo=sufixo, agregados=agregados, indice_quadras=indice_quadras)
+        except logic_jobs.TarefaCancelada:
+            raise
+        except Exception:
+            log_callback(f"\n❌ ERRO NA REGIÃO {regiao['nome']} ❌")
+            log_callback(traceback.format_exc())
+            caminhos = (None, None)
+        gerados.append((regiao['nome'], *caminhos))
+    return gerados
+
+def gerar_relatorio(df, data_inicio, data_fim, docs_dir, log_callback, sufixo='', agregados=None, regiao=REGIAO_PADRAO):
+    """
+    Monta e grava o relatório (planilha + texto de análise) de um intervalo a
+    partir do DataFrame já preparado por carregar_dados_relatorio. Com
+    `agregados` (logic_agregados), o texto traz também as médias móveis de
+    7, 14 e 28 dias. Sem `regiao`, é o relatório de sempre (REGIAO_PADRAO).
+    Retorna os caminhos dos arquivos gerados (planilha, relatorio_txt).
+    """
+    perfil = logic_profiler.perfil_de(log_callback)
+    log_callback(f"✓ Período definido: {data_inicio.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}")
+
+    logic_jobs.tarefa_de(log_callback).progresso("Agregando contagens")
+    with perfil.etapa('relatorio', 'aggregate'):
+        agregacao = agregar_intervalo(df, data_inicio, data_fim, log_callback, regiao.get('periodos', PERIODOS))
+    return montar_relatorio_regiao(agregacao, regiao, data_inicio, data_fim, docs_dir, log_callback, sufixo=sufixo,
+                                   agregados=agregados, indice_quadras=_indice_das_regioes([regiao], log_callback))
+
+def execute_report_generator(processed_file_path, data_inicio, data_fim, log_callback):
+    """
+    Função principal que executa toda a lógica de geração de relatório.
+    Recebe o caminho do arquivo processado, datas e uma função de callback para o log.
+    Retorna os caminhos dos arquivos gerados (planilha, relatorio_txt).
+    """
+    try:
         log_callback("=" * 80)
-        log_callback(f"Média Atual:    {int(media_atual)} pessoas/dia")
-        log_callback(f"Média Anterior: {int(media_anterior)} pessoas/dia")
-        log_callback(f"Variação:       {variacao:+.1f}%")
-        log_callback("-" * 40)
-        log_callback(f"Destaques do dia {ultimo_dia_val.strftime('%d/%m/%Y')}:")
-        log_callback(f"  • Madrugada: {int(madr['total'])} pessoas ({int(madr['enderecos'])} aglomerações)")
-        log_callback(f"  • Manhã:     {int(manha['total'])} pessoas ({int(manha['enderecos'])} aglomerações)")
-        log_callback(f"  • Tarde:     {int(tarde['total'])} pessoas ({int(tarde['enderecos'])} aglomerações)")
-        log_callback(f"  • Noite:     {int(noite['total'])} pessoas ({int(noite['enderecos'])} aglomerações)")
+        log_callback("GERADOR DE RELATÓRIO CONSOLIDADO")
         log_callback("=" * 80)
-        
-        return str(caminho_saida), str(caminho_txt)
+        log_callback(f"✓ Processamento iniciado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
 
+        DOCS_DIR = localizar_pasta_docs(log_callback)
+        df = carregar_dados_relatorio(processed_file_path, log_callback)
+        agregados = atualizar_agregados(df, processed_file_path, DOCS_DIR, log_callback)
+        return gerar_relatorio(df, data_inicio, data_fim, DOCS_DIR, log_callback, agregados=agregados)
+
+    except logic_jobs.TarefaCancelada:
+        log_callback(f"\n⏹️  Relatório cancelado. Nenhum arquivo de saída foi gravado.")
+        return None, None
     except Exception as e:
         log_callback(f"\n❌ ERRO GERAL NO GERADOR DE RELATÓRIO ❌")
         log_callback(traceback.format_exc())
-        return None, None
\ No newline at end of file
+        return None, None
+
+# --- Modo em Lote (vários intervalos) ---
+
+_DF_LOTE = None
+_DOCS_LOTE = None
+_AGREGADOS_LOTE = None
+_REGIOES_LOTE = None
+
+def _iniciar_processo_lote(df, docs_dir, agregados=None, regioes=None):
+    """Inicializador dos processos do lote: recebe o DataFrame preparado (e os agregados e regiões) uma única vez."""
+    global _DF_LOTE, _DOCS_LOTE, _AGREGADOS_LOTE, _REGIOES_LOTE
+    _DF_LOTE, _DOCS_LOTE, _AGREGADOS_LOTE, _REGIOES_LOTE = df, docs_dir, agregados, regioes
+
+def _gerar_relatorio_lote(data_inicio, data_fim, sufixo):
+    """Gera um intervalo dentro de um processo do lote. Retorna (caminhos, linhas de log)."""
+    logs = []
+    try:
+        caminhos = gerar_relatorio(_DF_LOTE, data_inicio, data_fim, _DOCS_LOTE, logs.append, sufixo=sufixo,
+                                   agregados=_AGREGADOS_LOTE)
+    except Exception:
+        logs.append(f"\n❌ ERRO NO INTERVALO {data_inicio.strftime('%d/%m/%Y')} - {data_fim.strftime('%d/%m/%Y')} ❌")
+        logs.append(traceback.format_exc())
+        caminhos = (None, None)
+    return caminhos, logs
+
+def _gerar_regioes_lote(data_inicio, data_fim, sufixo):
+    """Gera as regiões de um intervalo dentro de um processo do lote. Retorna (relatórios, linhas de log)."""
+    logs = []
+    try:
+        gerados = gerar_relatorios_regioes(_DF_LOTE, data_inicio, data_fim, _DOCS_LOTE, logs.append, _REGIOES_LOTE,
+                                           sufixo=sufixo, agregados=_AGREGADOS_LOTE)
+    except Exception:
+        logs.append(f"\n❌ ERRO NO INTERVALO {data_inicio.strftime('%d/%m/%Y')} - {data_fim.strftime('%d/%m/%Y')} ❌")
+        logs.append(traceback.format_exc())
+        gerados = [(regiao['nome'], None, None) for regiao in _REGIOES_LOTE]
+    return gerados, logs
+
+def _executar_lote(gerar, intervalos, sufixos, initargs, max_workers, log_callback):
+    """
+    Roda gerar(data_inicio, data_fim, sufixo) para cada intervalo: no próprio
+    processo com max_workers <= 1, senão em um pool iniciado com initargs.
+    Repassa os logs de cada intervalo e retorna {intervalo: resultado}.
+    """
+    if max_workers is None:
+        max_workers = min(len(intervalos), os.cpu_count() or 1)
+
+    resultados = {}
+    if max_workers <= 1:
+        _iniciar_processo_lote(*initargs)
+        for intervalo in intervalos:
+            resultado, logs = gerar(*intervalo, sufixos[intervalo])
+            for linha in logs: log_callback(linha)
+            resultados[intervalo] = resultado
+    else:
+        log_callback(f"\n🔄 Gerando {len(intervalos)} intervalos em {max_workers} processos...")
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_processo_lote,
+                                 initargs=initargs) as executor:
+            futuros = {
+                executor.submit(gerar, *intervalo, sufixos[intervalo]): intervalo
+                for intervalo in intervalos
+            }
+            for futuro in as_completed(futuros):
+                resultado, logs = futuro.result()
+                for linha in logs: log_callback(linha)
+                resultados[futuros[futuro]] = resultado
+    return resultados
+
+def intervalos_deslizantes(primeiro_fim, ultimo_fim, n_dias):
+    """Um intervalo de n_dias terminando em cada dia de primeiro_fim até ultimo_fim."""
+    return [(fim - timedelta(days=n_dias - 1), fim) for fim in gerar_lista_dias(primeiro_fim, ultimo_fim)]
+
+def execute_report_batch(processed_file_path, intervalos, log_callback, max_workers=None):
+    """
+    Gera os relatórios de vários intervalos (data_inicio, data_fim) de uma vez:
+    a planilha é lida e preparada uma única vez e cada intervalo é montado em
+    um processo do pool. Os arquivos levam o intervalo no nome.
+    Retorna [(data_inicio, data_fim, planilha, relatorio_txt), ...] na ordem
+    recebida (caminhos None nos intervalos que falharam).
+    """
+    try:
+        log_callback("=" * 80)
+        log_callback("GERADOR DE RELATÓRIO CONSOLIDADO - LOTE")
+        log_callback("=" * 80)
+        log_callback(f"✓ Processamento iniciado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+        intervalos = list(dict.fromkeys(intervalos))
+        log_callback(f"✓ Intervalos solicitados: {len(intervalos)}")
+
+        DOCS_DIR = localizar_pasta_docs(log_callback)
+        df = carregar_dados_relatorio(processed_file_path, log_callback)
+        agregados = atualizar_agregados(df, processed_file_path, DOCS_DIR, log_callback)
+
+        sufixos = {(ini, fim): f"_{ini.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}" for ini, fim in intervalos}
+        resultados = _executar_lote(_gerar_relatorio_lote, intervalos, sufixos, (df, DOCS_DIR, agregados),
+                                    max_workers, log_callback)
+
+        gerados = [(ini, fim, *resultados[ini, fim]) for ini, fim in intervalos]
+        ok = sum(1 for _, _, planilha, _ in gerados if planilha is not None)
+        log_callback(f"\n✓ Lote concluído: {ok} de {len(gerados)} relatórios gerados")
+        return gerados
+
+    except Exception as e:
+        log_callback(f"\n❌ ERRO GERAL NO GERADOR DE RELATÓRIO (LOTE) ❌")
+        log_callback(traceback.format_exc())
+        return []
+
+def execute_region_reports(processed_file_path, intervalos, regioes, log_callback, max_workers=1):
+    """
+    Relatórios de várias regiões (logic_regioes) para cada intervalo: a
+    planilha é lida uma vez e, em cada intervalo, a agregação é compartilhada
+    pelas regiões. Os arquivos levam o sufixo da região (e o intervalo, se
+    houver mais de um). Com max_workers > 1 (ou None, como no lote), os
+    intervalos são divididos entre processos.
+    Retorna [(data_inicio, data_fim, região, planilha, relatorio_txt), ...]
+    (caminhos None nas regiões que falharam).
+    """
+    try:
+        log_callback("=" * 80)
+        log_callback("GERADOR DE RELATÓRIO CONSOLIDADO - REGIÕES")
+        log_callback("=" * 80)
+        log_callback(f"✓ Processamento iniciado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+        intervalos = list(dict.fromkeys(intervalos))
+        log_callback(f"✓ Regiões: {', '.join(regiao['nome'] for regiao in regioes)}")
+
+        DOCS_DIR = localizar_pasta_docs(log_callback)
+        df = carregar_dados_relatorio(processed_file_path, log_callback)
+        agregados = atualizar_agregados(df, processed_file_path, DOCS_DIR, log_callback,
+                                        limiares=[regiao['limiar'] for regiao in regioes])
+
+        sufixos = {
+            (ini, fim): f"_{ini.strftime('%Y%m%d')}_{fim.strftime('%Y%m%d')}" if len(intervalos) > 1 else ''
+            for ini, fim in intervalos
+        }
+        if max_workers == 1:
+            # No próprio processo, com o log_callback da chamada (perfil, progresso e cancelamento)
+            resultados = {
+                (ini, fim): gerar_relatorios_regioes(df, ini, fim, DOCS_DIR, log_callback, regioes,
+                                                     sufixo=sufixos[ini, fim], agregados=agregados)
+                for ini, fim in intervalos
+            }
+        else:
+            resultados = _executar_lote(_gerar_regioes_lote, intervalos, sufixos, (df, DOCS_DIR, agregados, regioes),
+                                        max_workers, log_callback)
+        gerados = [(ini, fim, *relatorio) for ini, fim in intervalos for relatorio in resultados[ini, fim]]
+
+        ok = sum(1 for *_, planilha, _ in gerados if planilha is not None)
+        log_callback(f"\n✓ Regiões concluídas: {ok} de {len(gerados)} relatórios gerados")
+        return gerados
+
+    except logic_jobs.TarefaCancelada:
+        log_callback(f"\n⏹️  Relatório cancelado.")
+        return []
+    except Exception as e:
+        log_callback(f"\n❌ ERRO GERAL NO GERADOR DE RELATÓRIO (REGIÕES) ❌")
+        log_callback(traceback.format_exc())
+        return []
+
+def _ler_data(texto):
+    return datetime.strptime(texto, "%d/%m/%Y")
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gera relatórios diários para vários intervalos de datas de uma vez')
+    parser.add_argument('arquivo', help='planilha processada (saída do Passo 1)')
+    parser.add_argument('--intervalo', nargs=2, action='append', default=[], metavar=('INICIO', 'FIM'),
+                        help='intervalo dd/mm/aaaa dd/mm/aaaa (pode repetir)')
+    parser.add_argument('--deslizante', nargs=2, metavar=('PRIMEIRO_FIM', 'ULTIMO_FIM'),
+                        help='um intervalo terminando em cada dia entre as duas datas')
+    parser.add_argument('--dias', type=int, default=4, help='tamanho dos intervalos de --deslizante (padrão: 4)')
+    parser.add_argument('--processos', type=int, default=None, help='número de processos (padrão: um por intervalo, até o nº de CPUs)')
+    parser.add_argument('--regioes', metavar='ARQUIVO_JSON',
+                        help='definições de regiões (ver logic_regioes): um relatório por região em cada intervalo')
+    args = parser.parse_args()
+
+    intervalos = [(_ler_data(inicio), _ler_data(fim)) for inicio, fim in args.intervalo]
+    if args.deslizante:
+        intervalos += intervalos_deslizantes(_ler_data(args.deslizante[0]), _ler_data(args.deslizante[1]), args.dias)
+    if not intervalos:
+        parser.error('informe ao menos um --intervalo ou --deslizante')
+
+    if args.regioes:
+        regioes = logic_regioes.carregar_regioes(args.regioes, LIMIAR, PERIODOS)
+        gerados = execute_region_reports(args.arquivo, intervalos, regioes, print, max_workers=args.processos)
+        for data_inicio, data_fim, nome, planilha, txt in gerados:
+            print(f"{data_inicio.strftime('%d/%m/%Y')} - {data_fim.strftime('%d/%m/%Y')} [{nome}]: {planilha or 'ERRO'}")
+    else:
+        gerados = execute_report_batch(args.arquivo, intervalos, print, max_workers=args.processos)
+        for data_inicio, data_fim, planilha, txt in gerados:
+            print(f"{data_inicio.strftime('%d/%m/%Y')} - {data_fim.strftime('%d/%m/%Y')}: {planilha or 'ERRO'}")
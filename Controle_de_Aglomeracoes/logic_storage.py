@@ -0,0 +1,399 @@
+# logic_storage.py
+# Base canônica processada (modo incremental do parser), artefatos colunares
+# (Parquet, ou pickle sem pyarrow) que substituem a releitura dos .xlsx e
+# leitura em streaming das planilhas de contagem
+
+import pandas as pd
+import numpy as np
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from openpyxl import load_workbook
+
+# --- Configuração da Base ---
+ARQUIVO_BASE = 'base_processada.pkl'
+VERSAO_BASE = 1
+
+# --- Leitura em streaming ---
+# Colunas usadas pelos relatórios; as demais não são materializadas
+COLUNAS_CONTAGEM = ['Data', 'Logradouro', 'Período', 'Qtd. pessoas', 'Equipe']
+TAMANHO_BLOCO = 50_000
+PASSO_PROGRESSO = 5_000  # Linhas lidas entre dois avisos de progresso
+
+# --- Artefatos colunares ---
+# Gravados ao lado do .xlsx (mesmo nome, outra extensão); o .xlsx fica só para leitura humana.
+# Os dos relatórios vão para data/processed, para que a pasta docs guarde só as entregas.
+COLUNAS_CATEGORICAS = ['Logradouro', 'Período']
+
+# Textos que o pd.read_excel trata como nulos (valores padrão de na_values)
+TEXTOS_NULOS = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+_TEXTOS_NULOS = frozenset(TEXTOS_NULOS)
+
+try:
+    import pyarrow  # noqa: F401
+    EXTENSAO_ARTEFATO = '.parquet'
+except ImportError:
+    EXTENSAO_ARTEFATO = '.pkl'
+
+# Uma linha é "nova" quando esta combinação (no texto original, antes do parse) não está na base
+COLUNAS_CHAVE = ['Data', 'Equipe', 'Logradouro', 'Período']
+
+# --- Gravação em Segundo Plano ---
+
+class GravacaoEmSegundoPlano:
+    """
+    Roda funcao(*args, **kwargs) em uma thread de gravação a partir da
+    criação, enquanto o chamador segue com o próximo passo (texto de análise,
+    relatório TXT...). concluir() espera o fim e devolve o resultado, ou
+    levanta a exceção da gravação. Usada como `with`, a saída do bloco
+    sempre espera a gravação, mesmo se o passo seguinte falhar.
+    """
+
+    def __init__(self, funcao, *args, **kwargs):
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gravacao')
+        self._futuro = executor.submit(funcao, *args, **kwargs)
+        executor.shutdown(wait=False)  # A thread termina sozinha ao fim da gravação
+
+    def concluir(self):
+        return self._futuro.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        wait([self._futuro])
+        return False
+
+# --- Saídas do Parser em Memória ---
+# Último DataFrame gravado neste processo (planilha processada ou base canônica), com o
+# caminho: o relatório gerado em seguida, no mesmo processo, não volta ao disco.
+# A trava protege o registro entre a thread do parser (ou da interface) e a de gravação.
+_PROCESSADO = {}
+_TRAVA_PROCESSADO = threading.Lock()
+
+def registrar_processado(caminho, df):
+    """Guarda o DataFrame gravado (ou prestes a ser gravado) em `caminho`, no lugar do anterior."""
+    with _TRAVA_PROCESSADO:
+        _PROCESSADO.clear()
+        _PROCESSADO[str(Path(caminho).resolve())] = df
+
+def descartar_processado(caminho):
+    """Esquece o DataFrame de `caminho` (gravação que falhou ou foi cancelada)."""
+    with _TRAVA_PROCESSADO:
+        _PROCESSADO.pop(str(Path(caminho).resolve()), None)
+
+def processado_em_memoria(caminho):
+    """DataFrame gravado em `caminho` neste processo, ou None."""
+    with _TRAVA_PROCESSADO:
+        df = _PROCESSADO.get(str(Path(caminho).resolve()))
+    return None if df is None else df.copy(deep=False)
+
+def hash_linhas(df):
+    """
+    Hash (uint64) do conteúdo de cada linha de df (todas as colunas).
+    Linhas iguais são diferenciadas pela ordem de ocorrência (1ª, 2ª, ...),
+    então repetições legítimas não se perdem.
+    """
+    if df.empty:
+        return np.array([], dtype=np.uint64)
+    chave = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    ocorrencia = pd.Series(chave).groupby(chave).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({'chave': chave, 'ocorrencia': ocorrencia}), index=False
+    ).to_numpy()
+
+def hash_chaves(df):
+    """
+    Hash (uint64) de cada linha, calculado sobre as COLUNAS_CHAVE presentes
+    na planilha raw (ver hash_linhas). Deve ser chamado antes do parse.
+    """
+    colunas = [col for col in COLUNAS_CHAVE if col in df.columns]
+    if not colunas or df.empty:
+        return np.array([], dtype=np.uint64)
+    return hash_linhas(df[colunas].astype(str))
+
+def carregar_base(caminho_base):
+    """
+    Lê a base canônica. Retorna (DataFrame processado, hashes das chaves);
+    base inexistente ou de outra versão volta como (None, array vazio).
+    """
+    caminho_base = Path(caminho_base)
+    if not caminho_base.exists():
+        return None, np.array([], dtype=np.uint64)
+    with open(caminho_base, 'rb') as f:
+        conteudo = pickle.load(f)
+    if not isinstance(conteudo, dict) or conteudo.get('versao') != VERSAO_BASE:
+        return None, np.array([], dtype=np.uint64)
+    return conteudo['dados'], conteudo['chaves']
+
+def salvar_base(caminho_base, df, chaves):
+    """Grava a base canônica (arquivo temporário + replace)."""
+    caminho_base = Path(caminho_base)
+    temporario = caminho_base.with_suffix(caminho_base.suffix + '.tmp')
+    conteudo = {'versao': VERSAO_BASE, 'dados': df, 'chaves': chaves}
+    with open(temporario, 'wb') as f:
+        pickle.dump(conteudo, f, protocol=pickle.HIGHEST_PROTOCOL)
+    temporario.replace(caminho_base)
+    registrar_processado(caminho_base, df)
+
+def filtrar_linhas_novas(df_raw, chaves_base):
+    """
+    Separa o delta: linhas da planilha raw cuja chave ainda não está na base.
+    Retorna (DataFrame só com as linhas novas, hashes dessas linhas).
+    """
+    chaves = hash_chaves(df_raw)
+    novas = ~np.isin(chaves, chaves_base)
+    return df_raw[novas], chaves[novas]
+
+def anexar_na_base(df_base, chaves_base, df_novos, chaves_novas):
+    """Junta o delta já processado à base. Retorna (DataFrame, hashes)."""
+    if df_base is None or df_base.empty:
+        return df_novos.reset_index(drop=True), chaves_novas
+    df = pd.concat([df_base, df_novos], ignore_index=True)
+    return df, np.concatenate([chaves_base, chaves_novas])
+
+def ler_planilha_processada(caminho, colunas=None, ao_progredir=None):
+    """
+    Lê a saída do parser: a base canônica (.pkl) ou a planilha processada (.xlsx).
+    Para o .xlsx, usa o artefato colunar ao lado dele quando existir; sem ele,
+    lê em streaming só as `colunas` pedidas (None = todas), avisando o
+    progresso da leitura em `ao_progredir` (ver iterar_excel).
+    Na base, textos vazios viram NaN, como acontece na ida e volta pelo Excel.
+    """
+    caminho = Path(caminho)
+    em_memoria = processado_em_memoria(caminho)
+    if caminho.suffix.lower() == '.pkl':
+        df = em_memoria if em_memoria is not None else carregar_base(caminho)[0]
+        if df is None:
+            raise ValueError(f"Base processada inválida ou de outra versão: {caminho.name}")
+        return df.replace('', np.nan)
+    if em_memoria is not None:
+        return em_memoria
+    artefato = localizar_artefato(caminho)
+    if artefato is not None:
+        return ler_artefato(artefato)
+    return ler_excel(caminho, colunas, ao_progredir=ao_progredir)
+
+# --- Artefatos Colunares ---
+
+def _sem_textos_nulos(df):
+    """Aplica às colunas de texto a mesma troca por nulo que o pd.read_excel faria."""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(~df[col].isin(TEXTOS_NULOS))
+    return df
+
+def caminho_artefato(caminho_xlsx, extensao=EXTENSAO_ARTEFATO):
+    """Caminho do artefato colunar que acompanha um .xlsx."""
+    return Path(caminho_xlsx).with_suffix(extensao)
+
+def caminho_artefato_relatorio(caminho_xlsx, extensao=EXTENSAO_ARTEFATO):
+    """Caminho do artefato de um relatório de docs: mesmo nome, em data/processed do projeto."""
+    caminho_xlsx = Path(caminho_xlsx)
+    return caminho_xlsx.parent.parent / 'data' / 'processed' / caminho_xlsx.with_suffix(extensao).name
+
+def localizar_artefato(caminho_xlsx, caminho_de=caminho_artefato):
+    """Artefato colunar existente do .xlsx (Parquet tem preferência), ou None."""
+    for extensao in ('.parquet', '.pkl'):
+        caminho = caminho_de(caminho_xlsx, extensao)
+        if caminho.exists():
+            return caminho
+    return None
+
+def salvar_artefato(df, caminho_xlsx, caminho_de=caminho_artefato):
+    """
+    Grava o DataFrame do .xlsx em formato colunar (por padrão, ao lado dele;
+    caminho_de dá outro lugar). Colunas de texto ficam com os nulos que o
+    .xlsx teria; nomes de coluna viram texto (Parquet).
+    Retorna o caminho gravado.
+    """
+    caminho = caminho_de(caminho_xlsx)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    df = _sem_textos_nulos(df)
+    df.columns = [str(col) for col in df.columns]
+    if caminho.suffix == '.parquet':
+        try:
+            df.to_parquet(caminho, index=False)
+            return caminho
+        except Exception:
+            # Colunas com tipos misturados que o Parquet não aceita: cai para pickle
+            caminho = caminho_de(caminho_xlsx, '.pkl')
+    df.to_pickle(caminho)
+    return caminho
+
+def ler_artefato(caminho):
+    """Lê um artefato colunar (.parquet ou .pkl)."""
+    caminho = Path(caminho)
+    if caminho.suffix == '.parquet':
+        return pd.read_parquet(caminho)
+    return pd.read_pickle(caminho)
+
+def artefato_processado(df):
+    """DataFrame do artefato da planilha processada: Logradouro e Período como categorias."""
+    df = _sem_textos_nulos(df)
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+def salvar_artefato_processado(df_artefato, caminho_xlsx):
+    """Grava o artefato (ver artefato_processado) ao lado da planilha processada."""
+    return salvar_artefato(df_artefato, caminho_xlsx)
+
+def grade_de_planilha(linhas):
+    """
+    Converte as linhas de uma planilha (ws.iter_rows(values_only=True)) no
+    DataFrame que pd.read_excel(header=None, dtype=str) devolveria para ela.
+    """
+    grade = []
+    for linha in linhas:
+        valores = []
+        for valor in linha:
+            if isinstance(valor, float) and valor.is_integer():
+                valor = int(valor)
+            if valor is None or (isinstance(valor, str) and valor in TEXTOS_NULOS):
+                valores.append(np.nan)
+            else:
+                valores.append(str(valor))
+        grade.append(valores)
+    df = pd.DataFrame(grade, dtype=object)
+    # O pd.read_excel descarta linhas e colunas vazias no fim da planilha
+    linhas_com_valor = np.flatnonzero(df.notna().any(axis=1).to_numpy())
+    colunas_com_valor = np.flatnonzero(df.notna().any(axis=0).to_numpy())
+    if len(linhas_com_valor) == 0:
+        return pd.DataFrame()
+    return df.iloc[:linhas_com_valor[-1] + 1, :colunas_com_valor[-1] + 1]
+
+def ler_grade_relatorio(caminho_xlsx):
+    """
+    Lê o relatório diário como grade de texto (header=None, dtype=str),
+    usando o artefato colunar (em data/processed) quando ele existir.
+    """
+    artefato = localizar_artefato(caminho_xlsx, caminho_artefato_relatorio)
+    if artefato is None:
+        return pd.read_excel(caminho_xlsx, header=None, dtype=str, engine='openpyxl')
+    df = ler_artefato(artefato)
+    df.columns = [int(col) for col in df.columns]
+    return df.astype(object).where(df.notna(), np.nan)
+
+# --- Leitura em Streaming (openpyxl read_only) ---
+
+def _coluna_como_serie(valores, nome):
+    """
+    Converte os valores crus de uma coluna como o pd.read_excel faria:
+    números inteiros viram int e os textos de TEXTOS_NULOS viram nulo.
+    """
+    convertidos = [
+        (int(v) if v.is_integer() else v) if type(v) is float
+        else (None if type(v) is str and v in _TEXTOS_NULOS else v)
+        for v in valores
+    ]
+    serie = pd.Series(convertidos, name=nome)
+    if serie.dtype == object:
+        serie = serie.where(serie.notna(), np.nan)
+    return serie
+
+def _tipar_bloco(df):
+    """Tipos finais das colunas de contagem: Data como datetime e Qtd. pessoas numérica."""
+    if 'Data' in df.columns:
+        df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
+    if 'Qtd. pessoas' in df.columns:
+        df['Qtd. pessoas'] = pd.to_numeric(df['Qtd. pessoas'], errors='coerce')
+    return df
+
+def iterar_excel(caminho, colunas=None, tamanho_bloco=TAMANHO_BLOCO, tipar=True, ao_progredir=None):
+    """
+    Lê a primeira aba da planilha em modo read_only (linha a linha, sem carregar
+    o arquivo inteiro) e gera DataFrames de até `tamanho_bloco` linhas.
+    Só as `colunas` pedidas são materializadas (None = todas; as ausentes são
+    ignoradas). Com tipar=True, Data e Qtd. pessoas já saem convertidas em
+    cada bloco (ler_excel converte depois de juntar, na coluna inteira).
+    `ao_progredir(linhas_lidas, total)` é chamado a cada PASSO_PROGRESSO linhas
+    (total vem da dimensão gravada na planilha; None se ela não tiver).
+    """
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        cabecalho = next(ws.iter_rows(max_row=1, values_only=True), None)
+        if cabecalho is None:
+            return
+        nomes = [f"Unnamed: {i}" if nome is None else nome for i, nome in enumerate(cabecalho)]
+        if colunas is None:
+            indices = list(range(len(nomes)))
+        else:
+            indices = [nomes.index(col) for col in colunas if col in nomes]
+        selecionadas = [nomes[i] for i in indices]
+
+        # Colunas à direita da última pedida nem chegam a ser convertidas pelo openpyxl
+        ultima_coluna = max(indices) + 1 if colunas is not None and indices else None
+        linhas = ws.iter_rows(min_row=2, max_col=ultima_coluna, values_only=True)
+        total = ws.max_row - 1 if ws.max_row else None
+
+        bloco, lidas = [], 0
+        for lidas, linha in enumerate(linhas, 1):
+            if ao_progredir is not None and lidas % PASSO_PROGRESSO == 0:
+                ao_progredir(lidas, total)
+            # Linhas totalmente vazias são descartadas, como no pd.read_excel
+            if not any(valor is not None for valor in linha):
+                continue
+            bloco.append(tuple(linha[i] if i < len(linha) else None for i in indices))
+            if len(bloco) >= tamanho_bloco:
+                yield _montar_bloco(bloco, selecionadas, tipar)
+                bloco = []
+        if bloco:
+            yield _montar_bloco(bloco, selecionadas, tipar)
+        if ao_progredir is not None:
+            ao_progredir(lidas, lidas)
+    finally:
+        wb.close()
+
+def _montar_bloco(bloco, nomes, tipar):
+    """DataFrame de um bloco de linhas (tuplas) já convertido."""
+    colunas = zip(*bloco) if bloco else [[] for _ in nomes]
+    df = pd.concat([_coluna_como_serie(valores, nome) for valores, nome in zip(colunas, nomes)], axis=1)
+    return _tipar_bloco(df) if tipar else df
+
+def juntar_blocos(blocos):
+    """
+    Junta os blocos em um único DataFrame, coluna a coluna: cada bloco é
+    desmontado em colunas soltas assim que sai do gerador, e as partes de uma
+    coluna são liberadas logo depois de concatenadas. Assim o pico fica nos
+    dados mais uma coluna, e não na lista de blocos mais o resultado inteiro.
+    Retorna None se não houver blocos.
+    """
+    nomes, partes, total = None, [], 0
+    for bloco in blocos:
+        if nomes is None:
+            nomes = list(bloco.columns)
+            partes = [[] for _ in nomes]
+        for i, parte in enumerate(partes):
+            parte.append(pd.Series(bloco.iloc[:, i].to_numpy(copy=True)))
+        total += len(bloco)
+        del bloco
+    if nomes is None:
+        return None
+
+    df = pd.DataFrame(index=pd.RangeIndex(total))
+    for i in range(len(nomes)):
+        df[i] = pd.concat(partes[i], ignore_index=True)
+        partes[i] = None
+    df.columns = nomes
+    return df
+
+def ler_excel(caminho, colunas=None, tamanho_bloco=TAMANHO_BLOCO, tipar=True, ao_progredir=None):
+    """
+    Junta os blocos de iterar_excel em um único DataFrame. Com tipar=True,
+    Data e Qtd. pessoas são convertidas uma vez, na coluna inteira (como no
+    pd.read_excel, o formato das datas em texto é inferido da coluna toda).
+    """
+    df = juntar_blocos(iterar_excel(caminho, colunas, tamanho_bloco, False, ao_progredir))
+    if df is None:
+        return pd.DataFrame(columns=colunas or [])
+    return _tipar_bloco(df) if tipar else df
@@ -1,6 +1,97 @@
 # logic_text_generator.py
 # MÓDULO RESPONSÁVEL POR GERAR O TEXTO DE ANÁLISE CONSOLIDADO
+# Os textos fixos são modelos (string.Template) compilados uma vez, na
+# importação; a cada relatório só os valores são pré-formatados e substituídos.
 from datetime import datetime
+from string import Template
+
+import numpy as np
+
+# --- Modelos ---
+
+# Uma linha por variação (str.format: as linhas são montadas em lote por formatar_variacoes)
+MODELO_VARIACAO = "{} {}: passou de {} para {} pessoas ({} de {} para {}). Uma {} de {:.1f}% em 24h."
+
+MODELO_MEDIA_MOVEL = Template(
+    "Últimos $dias dias ($inicio a $fim): $media_dia pessoas/dia, $aglomeracoes_dia aglomerações/dia\n"
+    "  $dias dias anteriores ($inicio_anterior a $fim_anterior): $comparacao"
+)
+MODELO_COMPARACAO_MOVEL = Template("$media_dia_anterior pessoas/dia — Variação: $variacao%")
+SEM_DADOS_ANTERIORES = "sem dados no período anterior"
+
+MODELO_MEDIAS_MOVEIS = Template("""
+================================================================================
+MÉDIAS MÓVEIS (DIAS COM REGISTRO)
+================================================================================
+
+$linhas
+""")
+
+MODELO_ANALISE = Template(
+    "Na região de $regiao, em $ultimo_dia "
+    "foram localizadas $pessoas_por_periodo. "
+    "Os $top_k logradouros com maior frequência nos últimos $dias_top dias são: $top_5. "
+    "Com mais de $limiar pessoas, foram $enderecos_por_periodo, "
+    "somando respectivamente $somas_por_periodo. "
+    "A média atual é de $media_atual pessoas por dia — $tipo_variacao de $variacao_abs% "
+    "em relação à contagem enviada $ref_texto."
+)
+
+MODELO_RELATORIO = Template("""================================================================================
+TEXTO DE ANÁLISE - RELATÓRIO DIÁRIO
+================================================================================
+
+Período do Relatório: $data_inicio a $data_fim
+Gerado em: $gerado_em
+
+================================================================================
+ANÁLISE RESUMIDA
+================================================================================
+
+$texto_analise
+
+================================================================================
+VARIAÇÕES RELEVANTES (TOP AUMENTOS E REDUÇÕES)
+================================================================================
+
+$variacoes
+
+================================================================================
+ESTATÍSTICAS GERAIS
+================================================================================
+
+Média Atual:    $media_atual pessoas/dia (intervalo $data_inicio a $data_fim)
+Média Anterior: $media_anterior pessoas/dia (intervalo $data_inicio_anterior a $data_fim_anterior)
+Variação Global: $variacao_global%
+$secao_medias_moveis
+================================================================================
+MAIORES CONCENTRAÇÕES POR PERÍODO (ÚLTIMOS $dias_top DIAS)
+================================================================================
+
+$top_por_periodo
+
+================================================================================
+DETALHAMENTO ÚLTIMO DIA - $ultimo_dia
+================================================================================
+
+$detalhamento
+
+================================================================================
+""")
+
+# Um bloco por período no detalhamento do último dia
+MODELO_DETALHE_PERIODO = Template("""$rotulo:
+  • Total de pessoas: $total
+  • Endereços com >$limiar pessoas: $enderecos
+  • Soma nas aglomerações: $soma_aglom""")
+
+ROTULOS_PERIODO = {'madrugada': 'Madrugada (05h)', 'manhã': 'Manhã (10h)', 'tarde': 'Tarde (15h)', 'noite': 'Noite (20h)'}
+EXPRESSOES_PERIODO = {'madrugada': 'de madrugada', 'manhã': 'de manhã', 'tarde': 'à tarde', 'noite': 'à noite'}
+HORARIOS_PERIODO = {'madrugada': '05h', 'manhã': '10h', 'tarde': '15h', 'noite': '20h'}
+
+COLUNAS_VARIACAO = ('logradouro', 'periodo', 'd1', 'd2', 'v1', 'v2', 'pct', 'dif_bruta')
+
+# --- Pré-formatação ---
 
 def _format_top_5(top_5_list):
     """
@@ -9,137 +100,167 @@ def _format_top_5(top_5_list):
     """
     if not top_5_list:
         return "Nenhum logradouro encontrado."
-    
+
     nomes = [log for log, _ in top_5_list]
-    
+
     if len(nomes) == 1:
         return nomes[0]
     if len(nomes) == 2:
         return f"{nomes[0]} e {nomes[1]}"
-    
+
     # Formato esperado: "Rua A; Rua B; Rua C e Rua D"
     return "; ".join(nomes[:-1]) + f" e {nomes[-1]}"
 
-def _format_extreme_variations(variations_list):
+def _enumerar(itens):
+    """Itens separados por vírgula, com 'e' antes do último ("a, b e c")."""
+    if len(itens) <= 1:
+        return "".join(itens)
+    return ", ".join(itens[:-1]) + f" e {itens[-1]}"
+
+def _format_last_day(ultimo_dia_por_periodo, ultimo_dia_noite, limiar):
+    """
+    Trechos do último dia para cada período da região: pessoas, endereços e
+    somas do parágrafo de análise ("12 pessoas de madrugada (05h), 30 de
+    manhã (10h)...") e os blocos do detalhamento. A noite é a do dia anterior.
+    """
+    pessoas, enderecos, somas, blocos = [], [], [], []
+    for i, (periodo, contagem) in enumerate(ultimo_dia_por_periodo):
+        expressao = EXPRESSOES_PERIODO[periodo]
+        do_dia = periodo == 'noite'
+        pessoas.append(f"{int(contagem['total'])}{' pessoas' if i == 0 else ''} {expressao} ({HORARIOS_PERIODO[periodo]})"
+                       + (f" do dia {ultimo_dia_noite.strftime('%d')}" if do_dia else ""))
+        enderecos.append(f"{int(contagem['enderecos'])}{' endereços' if i == 0 else ''} {expressao}")
+        somas.append(str(int(contagem['soma_aglom'])))
+        blocos.append(MODELO_DETALHE_PERIODO.substitute(
+            rotulo=ROTULOS_PERIODO[periodo] + (f" do dia {ultimo_dia_noite.strftime('%d/%m/%Y')}" if do_dia else ""),
+            limiar=limiar,
+            total=int(contagem['total']), enderecos=int(contagem['enderecos']), soma_aglom=int(contagem['soma_aglom']),
+        ))
+    return {
+        'pessoas_por_periodo': _enumerar(pessoas),
+        'enderecos_por_periodo': _enumerar(enderecos),
+        'somas_por_periodo': _enumerar(somas),
+        'detalhamento': "\n\n".join(blocos),
+    }
+
+def _format_top_by_period(top_por_periodo):
     """
-    Formata a seção de variações de volume (>= 10 pessoas).
-    Recebe a lista já ordenada (Aumentos primeiro, depois Reduções).
+    Formata a seção dos logradouros com maior soma em cada período:
+    uma linha por período, "Rua A (120); Rua B (95); ...".
     """
-    if not variations_list:
-        return "Nenhuma variação relevante (>= 10 pessoas) detectada no período."
-    
     linhas = []
-    for var in variations_list:
-        # Define o emoji e o termo com base no sinal da variação
-        seta = "🔺" if var['dif_bruta'] > 0 else "🔻"
-        tipo = "aumento" if var['dif_bruta'] > 0 else "diminuição"
-        
-        texto = (
-            f"{seta} {var['logradouro']}: passou de {int(var['v1'])} para {int(var['v2'])} pessoas "
-            f"({var['periodo'].capitalize()} de {var['d1']} para {var['d2']}). "
-            f"Uma {tipo} de {abs(var['pct']):.1f}% em 24h."
-        )
-        linhas.append(texto)
-    
+    for periodo, top in top_por_periodo:
+        itens = "; ".join(f"{logradouro} ({int(total)})" for logradouro, total in top) or "Nenhum registro."
+        linhas.append(f"{ROTULOS_PERIODO.get(periodo, periodo.capitalize())}: {itens}")
     return "\n".join(linhas)
 
-def generate_analysis_text(data: dict):
+def colunas_variacoes(variacoes):
     """
-    Gera o conteúdo completo do arquivo .txt com base nos dados calculados no logic_report.py.
+    Variações em colunas (um array por chave de COLUNAS_VARIACAO), como
+    devolvidas por logic_report.detectar_variacoes. Aceita também a lista
+    de dicionários (um por variação).
     """
-    
-    # Extração de variáveis do dicionário para facilitar a manutenção
-    hoje = data['hoje']
-    data_inicio = data['data_inicio']
-    data_fim = data['data_fim']
-    data_inicio_anterior = data['data_inicio_anterior']
-    data_fim_anterior = data['data_fim_anterior']
-    
-    ultimo_dia_val = data['ultimo_dia_val']
-    ultimo_dia_noite = data['ultimo_dia_noite']
-    
-    madr = data['madr']
-    manha = data['manha']
-    tarde = data['tarde']
-    noite = data['noite']
-    
-    top_5_texto = _format_top_5(data['top_5_logradouros'])
-    variacoes_extremas_texto = _format_extreme_variations(data.get('variacoes_extremas', []))
-    
-    media_atual = data['media_atual']
-    media_anterior = data['media_anterior']
-    variacao = data['variacao']
-    
-    # Define o termo de comparação global
-    tipo_variacao = "um aumento" if variacao > 0 else ("uma diminuição" if variacao < 0 else "estabilidade")
-    ref_texto = data['ref_texto']
-
-    # --- 1. Construção do Parágrafo de Análise Principal ---
-    texto_analise = (
-        f"Na região de Santa Cecília, Campos Elíseos e Santa Ifigênia, em {ultimo_dia_val.strftime('%d/%m/%Y')} "
-        f"foram localizadas {int(madr['total'])} pessoas de madrugada (05h), {int(manha['total'])} de manhã (10h), "
-        f"{int(tarde['total'])} à tarde (15h) e {int(noite['total'])} à noite (20h) do dia {ultimo_dia_noite.strftime('%d')}. "
-        f"Os 5 logradouros com maior frequência nos últimos 3 dias são: {top_5_texto}. "
-        f"Com mais de 10 pessoas, foram {int(madr['enderecos'])} endereços de madrugada, {int(manha['enderecos'])} de manhã, "
-        f"{int(tarde['enderecos'])} à tarde e {int(noite['enderecos'])} à noite, "
-        f"somando respectivamente {int(madr['soma_aglom'])}, {int(manha['soma_aglom'])}, {int(tarde['soma_aglom'])} e {int(noite['soma_aglom'])}. "
-        f"A média atual é de {int(media_atual)} pessoas por dia — {tipo_variacao} de {abs(variacao)}% "
-        f"em relação à contagem enviada {ref_texto}."
-    )
-
-    # --- 2. Montagem da Estrutura Visual do Arquivo TXT ---
-    conteudo_txt = f"""================================================================================
-TEXTO DE ANÁLISE - RELATÓRIO DIÁRIO
-================================================================================
+    if isinstance(variacoes, dict):
+        return variacoes
+    return {chave: np.array([var[chave] for var in variacoes], dtype=object) for chave in COLUNAS_VARIACAO}
 
-Período do Relatório: {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}
-Gerado em: {hoje.strftime('%d/%m/%Y às %H:%M:%S')}
-
-================================================================================
-ANÁLISE RESUMIDA
-================================================================================
-
-{texto_analise}
-
-================================================================================
-VARIAÇÕES RELEVANTES (TOP AUMENTOS E REDUÇÕES)
-================================================================================
-
-{variacoes_extremas_texto}
+def formatar_variacoes(colunas):
+    """
+    Linhas de texto das variações, pré-formatadas em lote a partir das
+    colunas: setas, termos, rótulos de período e números saem de operações
+    sobre os arrays, e cada linha é uma substituição em MODELO_VARIACAO.
+    """
+    dif = np.asarray(colunas['dif_bruta'])
+    if len(dif) == 0:
+        return []
 
-================================================================================
-ESTATÍSTICAS GERAIS
-================================================================================
+    aumento = dif > 0
+    periodos = list(colunas['periodo'])
+    rotulos_periodo = {periodo: periodo.capitalize() for periodo in set(periodos)}
+    return list(map(
+        MODELO_VARIACAO.format,
+        np.where(aumento, "🔺", "🔻").tolist(),
+        list(colunas['logradouro']),
+        np.asarray(colunas['v1']).astype(np.int64).tolist(),
+        np.asarray(colunas['v2']).astype(np.int64).tolist(),
+        list(map(rotulos_periodo.__getitem__, periodos)),
+        list(colunas['d1']),
+        list(colunas['d2']),
+        np.where(aumento, "aumento", "diminuição").tolist(),
+        np.abs(np.asarray(colunas['pct'], dtype=np.float64)).tolist(),
+    ))
 
-Média Atual:    {int(media_atual)} pessoas/dia (intervalo {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')})
-Média Anterior: {int(media_anterior)} pessoas/dia (intervalo {data_inicio_anterior.strftime('%d/%m/%Y')} a {data_fim_anterior.strftime('%d/%m/%Y')})
-Variação Global: {variacao:+.1f}%
+def _format_extreme_variations(variations, diferenca_minima):
+    """
+    Formata a seção de variações de volume (>= diferenca_minima pessoas).
+    Recebe as variações já ordenadas (Aumentos primeiro, depois Reduções).
+    """
+    linhas = formatar_variacoes(colunas_variacoes(variations))
+    if not linhas:
+        return f"Nenhuma variação relevante (>= {diferenca_minima:g} pessoas) detectada no período."
+    return "\n".join(linhas)
 
-================================================================================
-DETALHAMENTO ÚLTIMO DIA - {ultimo_dia_val.strftime('%d/%m/%Y')}
-================================================================================
+def _format_moving_averages(moving_averages):
+    """
+    Formata a seção de médias móveis (7, 14 e 28 dias): média de pessoas por
+    dia na janela, comparada com a janela de mesmo tamanho imediatamente anterior.
+    Sem registros na janela anterior (média zero), não há variação a mostrar.
+    """
+    linhas = []
+    for movel in moving_averages:
+        atual, anterior = movel['atual'], movel['anterior']
+        comparacao = SEM_DADOS_ANTERIORES
+        if anterior['dias'] and anterior['media_dia'] > 0:
+            comparacao = MODELO_COMPARACAO_MOVEL.substitute(
+                media_dia_anterior=f"{anterior['media_dia']:.0f}", variacao=f"{movel['variacao']:+.1f}",
+            )
+        linhas.append(MODELO_MEDIA_MOVEL.substitute(
+            dias=movel['dias'],
+            inicio=atual['inicio'].strftime('%d/%m'), fim=atual['fim'].strftime('%d/%m/%Y'),
+            media_dia=f"{atual['media_dia']:.0f}", aglomeracoes_dia=f"{atual['aglomeracoes_dia']:.1f}",
+            inicio_anterior=anterior['inicio'].strftime('%d/%m'), fim_anterior=anterior['fim'].strftime('%d/%m/%Y'),
+            comparacao=comparacao,
+        ))
+    return "\n".join(linhas)
 
-Madrugada (05h):
-  • Total de pessoas: {int(madr['total'])}
-  • Endereços com >10 pessoas: {int(madr['enderecos'])}
-  • Soma nas aglomerações: {int(madr['soma_aglom'])}
+# --- Texto Completo ---
 
-Manhã (10h):
-  • Total de pessoas: {int(manha['total'])}
-  • Endereços com >10 pessoas: {int(manha['enderecos'])}
-  • Soma nas aglomerações: {int(manha['soma_aglom'])}
+def generate_analysis_text(data: dict):
+    """
+    Gera o conteúdo completo do arquivo .txt com base nos dados calculados no logic_report.py.
+    """
+    variacao = data['variacao']
+    # Define o termo de comparação global
+    tipo_variacao = "um aumento" if variacao > 0 else ("uma diminuição" if variacao < 0 else "estabilidade")
 
-Tarde (15h):
-  • Total de pessoas: {int(tarde['total'])}
-  • Endereços com >10 pessoas: {int(tarde['enderecos'])}
-  • Soma nas aglomerações: {int(tarde['soma_aglom'])}
+    campos = {
+        'regiao': data['regiao'],
+        'limiar': f"{data['limiar']:g}",
+        'data_inicio': data['data_inicio'].strftime('%d/%m/%Y'),
+        'data_fim': data['data_fim'].strftime('%d/%m/%Y'),
+        'data_inicio_anterior': data['data_inicio_anterior'].strftime('%d/%m/%Y'),
+        'data_fim_anterior': data['data_fim_anterior'].strftime('%d/%m/%Y'),
+        'gerado_em': data['hoje'].strftime('%d/%m/%Y às %H:%M:%S'),
+        'ultimo_dia': data['ultimo_dia_val'].strftime('%d/%m/%Y'),
+        'top_5': _format_top_5(data['top_5_logradouros']),
+        'top_k': data['top_k'],
+        'dias_top': data['dias_top'],
+        'top_por_periodo': _format_top_by_period(data['top_por_periodo']),
+        'media_atual': int(data['media_atual']),
+        'media_anterior': int(data['media_anterior']),
+        'tipo_variacao': tipo_variacao,
+        'variacao_abs': abs(variacao),
+        'variacao_global': f"{variacao:+.1f}",
+        'ref_texto': data['ref_texto'],
+        'variacoes': _format_extreme_variations(data.get('variacoes_extremas', []), data['diferenca_minima']),
+        'secao_medias_moveis': "",
+    }
+    campos.update(_format_last_day(data['ultimo_dia_por_periodo'], data['ultimo_dia_noite'], campos['limiar']))
 
-Noite (20h) do dia {ultimo_dia_noite.strftime('%d/%m/%Y')}:
-  • Total de pessoas: {int(noite['total'])}
-  • Endereços com >10 pessoas: {int(noite['enderecos'])}
-  • Soma nas aglomerações: {int(noite['soma_aglom'])}
+    # Médias móveis (só quando o relatório tem a tabela de agregados diários)
+    if data.get('medias_moveis'):
+        campos['secao_medias_moveis'] = MODELO_MEDIAS_MOVEIS.substitute(linhas=_format_moving_averages(data['medias_moveis']))
 
-================================================================================
-"""
-    
-    return conteudo_txt
\ No newline at end of file
+    # --- 1. Parágrafo de Análise Principal e 2. Estrutura Visual do Arquivo TXT ---
+    campos['texto_analise'] = MODELO_ANALISE.substitute(campos)
+    return MODELO_RELATORIO.substitute(campos)
@@ -0,0 +1,171 @@
+# logic_xlsx_writer.py
+# Escrita do relatório diário em uma única passada (openpyxl em modo write-only),
+# com estilos nomeados registrados uma vez no workbook e compartilhados pelas células
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.styles.fills import DEFAULT_EMPTY_FILL
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+PASSO_PROGRESSO = 50  # Linhas de dados entre dois avisos de progresso
+
+# --- Estilos ---
+
+_LADO_FINO = Side(style='thin')
+_BORDA_FINA = Border(left=_LADO_FINO, right=_LADO_FINO, top=_LADO_FINO, bottom=_LADO_FINO)
+_FILL_CINZA = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
+_FILL_AZUL = PatternFill(start_color='B7E1FA', end_color='B7E1FA', fill_type='solid')
+_CENTRO = Alignment(horizontal='center', vertical='center')
+_CENTRO_HORIZONTAL = Alignment(horizontal='center')
+
+ESTILOS_RELATORIO = {
+    'rel_titulo': dict(font=Font(bold=True), fill=_FILL_CINZA, alignment=_CENTRO),
+    'rel_cabecalho': dict(font=Font(bold=True), fill=_FILL_CINZA, border=_BORDA_FINA),
+    'rel_cabecalho_centro': dict(font=Font(bold=True), fill=_FILL_CINZA, border=_BORDA_FINA, alignment=_CENTRO),
+    'rel_dado': dict(alignment=_CENTRO_HORIZONTAL, border=_BORDA_FINA),
+    'rel_dado_aglomeracao': dict(alignment=_CENTRO_HORIZONTAL, border=_BORDA_FINA, fill=_FILL_AZUL),
+    'rel_total': dict(font=Font(bold=True), fill=_FILL_CINZA, alignment=_CENTRO_HORIZONTAL, border=_BORDA_FINA),
+    'rel_rodape': dict(font=Font(italic=True, size=10)),
+    'rel_media_rotulo': dict(font=Font(bold=True)),
+    'rel_media_valor': dict(font=Font(bold=True), alignment=_CENTRO_HORIZONTAL),
+}
+
+def _estilo_nomeado(nome, **atributos):
+    """NamedStyle com fonte, preenchimento e borda padrão do workbook no que não for informado."""
+    atributos.setdefault('font', DEFAULT_FONT)
+    atributos.setdefault('fill', DEFAULT_EMPTY_FILL)
+    atributos.setdefault('border', DEFAULT_BORDER)
+    return NamedStyle(name=nome, **atributos)
+
+def _registrar_estilos(wb):
+    """Registra os estilos nomeados do relatório no workbook."""
+    for nome, atributos in ESTILOS_RELATORIO.items():
+        wb.add_named_style(_estilo_nomeado(nome, **atributos))
+
+def _estilo_mesclada(wb, lados, registrados):
+    """
+    Estilo das células internas de uma mesclagem: só as bordas que o openpyxl
+    copia da célula inicial para as bordas do intervalo (MergedCellRange.format).
+    """
+    nome = 'rel_mesclada_' + '_'.join(lados)
+    if nome not in registrados:
+        borda = Border(**{lado: _LADO_FINO if lado in lados else Side() for lado in ('left', 'right', 'top', 'bottom', 'diagonal')})
+        wb.add_named_style(_estilo_nomeado(nome, border=borda))
+        registrados.add(nome)
+    return nome
+
+# --- Escrita ---
+
+def _celula(ws, valor, estilo):
+    """Célula write-only com estilo nomeado ('' vira célula vazia, como no to_excel)."""
+    cell = WriteOnlyCell(ws, value=None if valor == '' else valor)
+    cell.style = estilo
+    return cell
+
+def salvar_relatorio_diario(caminho, cabecalhos, matriz, visiveis, total_row, rodape, media_atual,
+                            qtd_dias_por_periodo, limiar, ao_progredir=None):
+    """
+    Grava o relatório diário (.xlsx) em uma única passada: mesclagens do
+    cabeçalho, linhas ocultas sem aglomeração, preenchimento azul acima do
+    limiar, linha de totais, rodapé e média.
+    `ao_progredir(celulas, total)` é chamado a cada PASSO_PROGRESSO linhas de dados.
+    Retorna as linhas de valores como ficam na planilha (para a grade colunar).
+    """
+    header1, header2, header3 = cabecalhos
+    colunas_totais = len(header2)
+    col_medias = colunas_totais - len(qtd_dias_por_periodo)  # Uma média por período antes da coluna do limiar
+    col_maior10 = colunas_totais
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title='Sheet1')
+    _registrar_estilos(wb)
+    registrados = set(ESTILOS_RELATORIO)
+
+    # Mesclagens do cabeçalho (linhas 2 e 3); a do título não leva bordas
+    mesclagens = [CellRange(min_row=2, min_col=1, max_row=3, max_col=1)]
+    col_inicio = 3
+    for qtd_dias in qtd_dias_por_periodo:
+        if qtd_dias > 0:
+            mesclagens.append(CellRange(min_row=2, min_col=col_inicio, max_row=2, max_col=col_inicio + qtd_dias - 1))
+        col_inicio += qtd_dias
+    mesclagens.append(CellRange(min_row=2, min_col=col_medias, max_row=2, max_col=col_maior10 - 1))
+    mesclagens.append(CellRange(min_row=2, min_col=col_maior10, max_row=3, max_col=col_maior10))
+
+    ws.merged_cells.add(CellRange(min_row=1, min_col=1, max_row=1, max_col=colunas_totais).coord)
+    for mesclagem in mesclagens:
+        ws.merged_cells.add(mesclagem.coord)
+
+    estilos_cabecalho = {}
+    for mesclagem in mesclagens:
+        for linha, col in mesclagem.cells:
+            if (linha, col) == (mesclagem.min_row, mesclagem.min_col):
+                estilos_cabecalho[linha, col] = 'rel_cabecalho_centro'
+                continue
+            lados = [lado for lado, na_borda in (
+                ('top', linha == mesclagem.min_row), ('left', col == mesclagem.min_col),
+                ('right', col == mesclagem.max_col), ('bottom', linha == mesclagem.max_row)
+            ) if na_borda]
+            estilos_cabecalho[linha, col] = (None, _estilo_mesclada(wb, lados, registrados))
+
+    # Larguras e linhas ocultas precisam existir antes das linhas serem gravadas
+    ws.column_dimensions['A'].width, ws.column_dimensions['B'].width = 8, 45
+    for col in range(3, col_medias): ws.column_dimensions[get_column_letter(col)].width = 6
+    for col in range(col_medias, col_maior10 + 1): ws.column_dimensions[get_column_letter(col)].width = 12
+
+    primeira_linha_dados = 4
+    for row_idx, visivel in enumerate(visiveis):
+        if not visivel: ws.row_dimensions[primeira_linha_dados + row_idx].hidden = True
+
+    linhas = []
+    def gravar(valores, celulas):
+        linhas.append([None if valor == '' else valor for valor in valores])
+        ws.append(celulas)
+
+    # Título (mesclado de ponta a ponta) e cabeçalhos
+    titulo = [None] * colunas_totais
+    titulo[0] = header1[0]
+    gravar(titulo, [_celula(ws, header1[0], 'rel_titulo')])
+
+    header2 = list(header2)
+    header2[col_maior10 - 1] = f'>{limiar:g}'
+    for numero_linha, header in ((2, header2), (3, header3)):
+        valores, celulas = [], []
+        for col, valor in enumerate(header, 1):
+            estilo = estilos_cabecalho.get((numero_linha, col), 'rel_cabecalho')
+            if isinstance(estilo, tuple):
+                valor, estilo = estilo
+            valores.append(valor)
+            celulas.append(_celula(ws, valor, estilo))
+        gravar(valores, celulas)
+
+    # Dados: azul acima do limiar nas colunas de contagem e médias (não na de >10)
+    total_celulas = len(matriz) * colunas_totais
+    for numero, linha in enumerate(matriz):
+        if ao_progredir is not None and numero % PASSO_PROGRESSO == 0:
+            ao_progredir(numero * colunas_totais, total_celulas)
+        celulas = [_celula(ws, linha[0], 'rel_dado'), _celula(ws, linha[1], 'rel_dado')]
+        for col, valor in enumerate(linha[2:], 3):
+            acima = col != col_maior10 and isinstance(valor, (int, float)) and valor > limiar
+            celulas.append(_celula(ws, valor, 'rel_dado_aglomeracao' if acima else 'rel_dado'))
+        gravar(linha, celulas)
+
+    total_row = list(total_row)
+    total_row[col_maior10 - 1] = ''
+    gravar(total_row, [_celula(ws, valor, 'rel_total') for valor in total_row])
+
+    for linha in rodape:
+        gravar(linha, [_celula(ws, valor, 'rel_rodape') for valor in linha])
+
+    gravar([], [])
+    gravar([None, 'Média:', int(media_atual)], [
+        None, _celula(ws, 'Média:', 'rel_media_rotulo'), _celula(ws, int(media_atual), 'rel_media_valor')
+    ])
+
+    if ao_progredir is not None:
+        ao_progredir(total_celulas, total_celulas)
+    wb.save(caminho)
+    return linhas
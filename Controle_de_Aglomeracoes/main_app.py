@@ -5,22 +5,22 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from datetime import datetime, timedelta
 import threading
+import importlib
 import queue
 import os
 import subprocess
 import sys
 from pathlib import Path
 
-# Importa as funções de lógica
-try:
-    import logic_parser
-    import logic_report
-    import quadras_report # NOVO IMPORT
-except ImportError as e:
-    messagebox.showerror("Erro de Importação", 
-                         f"Erro ao importar módulos.\nDetalhe: {e}\n"
-                         "Certifique-se de que logic_parser.py, logic_report.py e quadras_report.py estão na mesma pasta.")
-    sys.exit()
+import logic_profiler # Só biblioteca padrão
+import logic_jobs
+import logic_contexto
+
+# Os módulos de lógica (logic_parser, logic_report, quadras_report) trazem pandas,
+# numpy e openpyxl: são importados depois que a janela abre, em segundo plano
+# (prewarm_modules), e cada thread de trabalho importa o que usa (o import
+# espera a importação em andamento, se houver)
+MODULOS_LOGICA = ("logic_parser", "logic_report", "quadras_report")
 
 class App(tk.Tk):
     def __init__(self):
@@ -43,16 +43,19 @@ class App(tk.Tk):
         self.processed_file_path = tk.StringVar()
         self.start_date_var = tk.StringVar()
         self.end_date_var = tk.StringVar()
+        self.incremental_var = tk.BooleanVar(value=False)
         
         self.final_excel_path = None # Relatório Diário
         self.final_txt_path = None   # Análise Diária
         self.final_quadras_path = None # Relatório Quadras (NOVO)
+        self.current_job = None        # Tarefa em execução (progresso e cancelamento)
 
         self.msg_queue = queue.Queue()
 
         self.create_widgets()
         self.set_default_dates()
         self.check_queue()
+        self.after(100, self.prewarm_modules)
 
     def set_default_dates(self):
         hoje = datetime.now()
@@ -93,6 +96,9 @@ class App(tk.Tk):
         self.btn_select_raw = ttk.Button(parser_frame, text="Selecionar...", command=self.select_raw_file)
         self.btn_select_raw.grid(row=0, column=2, padx=5, pady=5)
 
+        self.chk_incremental = ttk.Checkbutton(parser_frame, text="Modo incremental (processar só linhas novas)", variable=self.incremental_var)
+        self.chk_incremental.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+
         self.btn_run_parser = ttk.Button(parser_frame, text="Executar Parser", state="disabled", command=self.run_parser)
         self.btn_run_parser.grid(row=1, column=2, padx=5, pady=5, sticky="e")
 
@@ -125,6 +131,21 @@ class App(tk.Tk):
         self.btn_run_quadras = ttk.Button(quadras_frame, text="Gerar Relatório por Quadras", state="disabled", command=self.run_quadras_generator)
         self.btn_run_quadras.pack(side="right", padx=5, pady=5)
 
+        # --- Progresso ---
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.pack(fill="x", pady=5)
+        progress_frame.grid_columnconfigure(0, weight=1)
+
+        self.progress_var = tk.DoubleVar(value=0)
+        self.progress_text_var = tk.StringVar(value="")
+        self.progress_bar = ttk.Progressbar(progress_frame, variable=self.progress_var, maximum=100, mode="determinate")
+        self.progress_bar.grid(row=0, column=0, padx=5, sticky="ew")
+
+        self.btn_cancel = ttk.Button(progress_frame, text="Cancelar", state="disabled", command=self.cancel_job)
+        self.btn_cancel.grid(row=0, column=1, padx=5)
+
+        ttk.Label(progress_frame, textvariable=self.progress_text_var).grid(row=1, column=0, columnspan=2, padx=5, sticky="w")
+
         # --- Log ---
         log_frame = ttk.LabelFrame(main_frame, text="Log de Processamento", padding="10")
         log_frame.pack(fill="both", expand=True, pady=5)
@@ -158,6 +179,18 @@ class App(tk.Tk):
         self.log_text.delete(1.0, tk.END)
         self.log_text.configure(state="disabled")
 
+    def profiled_log_callback(self, execucao, job=None):
+        """log_callback da thread de trabalho, com o perfil de tempos/memória e a tarefa pendurados."""
+        def log_callback(message): self.msg_queue.put(message)
+        return logic_contexto.com_contexto(log_callback, perfil=logic_profiler.Perfil(execucao), tarefa=job)
+
+    def finish_profile(self, log_callback):
+        """Mostra o resumo de tempos no log e acrescenta a execução ao histórico em docs."""
+        perfil = log_callback.perfil
+        for linha in perfil.resumo(): log_callback(linha)
+        try: perfil.salvar(self.docs_path)
+        except OSError as e: log_callback(f"⚠️  Histórico de tempos não gravado: {e}")
+
     def select_raw_file(self):
         filetype = [("Arquivos Excel", "*.xlsx")]
         filepath = filedialog.askopenfilename(title="Selecione a planilha 'Raw'", filetypes=filetype)
@@ -176,6 +209,7 @@ class App(tk.Tk):
     def set_ui_state(self, state):
         entry_state = "normal" if state == "normal" else "readonly"
         self.btn_select_raw.config(state=state)
+        self.chk_incremental.config(state=state)
         # Lógica condicional para botões intermediários
         self.btn_run_parser.config(state=state if self.raw_file_path.get() else "disabled")
         self.btn_run_report.config(state=state if self.processed_file_path.get() else "disabled")
@@ -234,6 +268,53 @@ class App(tk.Tk):
         except Exception as e:
             self.msg_queue.put(("ERROR", f"❌ Falha: {e}"))
 
+    # --- TAREFAS (PROGRESSO E CANCELAMENTO) ---
+    def start_job(self):
+        """Nova tarefa para a próxima thread de trabalho; o progresso chega pela fila."""
+        def on_progress(descricao, feito, total): self.msg_queue.put(("PROGRESS", descricao, feito, total))
+        self.current_job = logic_jobs.Tarefa(ao_progredir=on_progress)
+        self.show_progress("Iniciando...", 0, None)
+        self.btn_cancel.config(state="normal")
+        return self.current_job
+
+    def cancel_job(self):
+        if self.current_job is None: return
+        self.current_job.cancelar()
+        self.btn_cancel.config(state="disabled")
+        self.log("⏹️  Cancelando... (a tarefa para no próximo ponto de verificação)")
+
+    def finish_job(self, completed=True):
+        self.current_job = None
+        self.btn_cancel.config(state="disabled")
+        self.progress_bar.stop()
+        self.progress_bar.config(mode="determinate")
+        self.progress_var.set(100 if completed else 0)
+        self.progress_text_var.set("")
+
+    def show_progress(self, descricao, feito, total):
+        if total:
+            if str(self.progress_bar.cget("mode")) != "determinate":
+                self.progress_bar.stop()
+                self.progress_bar.config(mode="determinate")
+            self.progress_var.set(min(100.0, 100.0 * feito / total))
+            self.progress_text_var.set(f"{descricao}: {feito:,} de {total:,}")
+        else:
+            # Etapa sem contagem (ex.: gravação da planilha): barra em movimento contínuo
+            if str(self.progress_bar.cget("mode")) != "indeterminate":
+                self.progress_bar.config(mode="indeterminate")
+                self.progress_bar.start(15)
+            self.progress_text_var.set(descricao)
+
+    # --- PRÉ-CARREGAMENTO DOS MÓDULOS ---
+    def prewarm_modules(self):
+        threading.Thread(target=self.prewarm_modules_thread, daemon=True).start()
+
+    def prewarm_modules_thread(self):
+        try:
+            for nome in MODULOS_LOGICA: importlib.import_module(nome)
+        except ImportError as e:
+            self.msg_queue.put(("IMPORT_ERROR", str(e)))
+
     # --- PARSER ---
     def run_parser(self):
         self.clear_log()
@@ -242,15 +323,20 @@ class App(tk.Tk):
         self.btn_open_txt.config(state="disabled")
         self.btn_open_quadras.config(state="disabled")
         filepath = self.raw_file_path.get()
-        threading.Thread(target=self.run_parser_thread, args=(filepath,), daemon=True).start()
+        incremental = self.incremental_var.get()
+        job = self.start_job()
+        threading.Thread(target=self.run_parser_thread, args=(filepath, incremental, job), daemon=True).start()
 
-    def run_parser_thread(self, filepath):
-        def log_callback(message): self.msg_queue.put(message)
+    def run_parser_thread(self, filepath, incremental=False, job=None):
+        log_callback = self.profiled_log_callback('parser', job)
         try:
-            processed_path, _ = logic_parser.execute_parser(filepath, log_callback)
+            import logic_parser
+            processed_path, _ = logic_parser.execute_parser(filepath, log_callback, incremental=incremental)
             if processed_path: self.msg_queue.put(("DONE_PARSER", processed_path))
+            elif job is not None and job.cancelada: self.msg_queue.put(("CANCELLED", "Parser"))
             else: raise Exception("Falha no parser.")
         except Exception as e: self.msg_queue.put(("ERROR", f"Erro no Parser: {e}"))
+        finally: self.finish_profile(log_callback)
 
     # --- RELATÓRIO DIÁRIO ---
     def run_report_generator(self):
@@ -270,15 +356,19 @@ class App(tk.Tk):
             messagebox.showerror("Erro", "Data inválida.")
             self.set_ui_state("normal")
             return
-        threading.Thread(target=self.run_report_thread, args=(filepath, start_date, end_date), daemon=True).start()
+        job = self.start_job()
+        threading.Thread(target=self.run_report_thread, args=(filepath, start_date, end_date, job), daemon=True).start()
 
-    def run_report_thread(self, filepath, start_date, end_date):
-        def log_callback(message): self.msg_queue.put(message)
+    def run_report_thread(self, filepath, start_date, end_date, job=None):
+        log_callback = self.profiled_log_callback('relatorio', job)
         try:
+            import logic_report
             excel_path, txt_path = logic_report.execute_report_generator(filepath, start_date, end_date, log_callback)
             if excel_path and txt_path: self.msg_queue.put(("DONE_REPORT", excel_path, txt_path))
+            elif job is not None and job.cancelada: self.msg_queue.put(("CANCELLED", "Relatório Diário"))
             else: raise Exception("Falha no gerador.")
         except Exception as e: self.msg_queue.put(("ERROR", f"Erro no Report: {e}"))
+        finally: self.finish_profile(log_callback)
 
     # --- RELATÓRIO QUADRAS (NOVO) ---
     def run_quadras_generator(self):
@@ -295,18 +385,23 @@ class App(tk.Tk):
              self.set_ui_state("normal")
              return
 
-        threading.Thread(target=self.run_quadras_thread, args=(input_excel,), daemon=True).start()
+        job = self.start_job()
+        threading.Thread(target=self.run_quadras_thread, args=(input_excel, job), daemon=True).start()
 
-    def run_quadras_thread(self, input_file):
-        def log_callback(message): self.msg_queue.put(message)
+    def run_quadras_thread(self, input_file, job=None):
+        log_callback = self.profiled_log_callback('quadras', job)
         try:
+            import quadras_report
             output_path = quadras_report.gerar_relatorio_quadras(input_file, log_callback)
             if output_path:
                 self.msg_queue.put(("DONE_QUADRAS", output_path))
             else:
                 raise Exception("Falha na geração do relatório de Quadras.")
+        except logic_jobs.TarefaCancelada:
+            self.msg_queue.put(("CANCELLED", "Relatório de Quadras"))
         except Exception as e:
             self.msg_queue.put(("ERROR", f"Erro Quadras: {e}"))
+        finally: self.finish_profile(log_callback)
 
 
     # --- QUEUE HANDLER ---
@@ -317,12 +412,17 @@ class App(tk.Tk):
                 if isinstance(msg, tuple):
                     type_, payload = msg[0], msg[1]
                     
-                    if type_ == "DONE_PARSER":
+                    if type_ == "PROGRESS":
+                        self.show_progress(payload, msg[2], msg[3])
+
+                    elif type_ == "DONE_PARSER":
+                        self.finish_job()
                         self.log("✓ Parser concluído.")
                         self.processed_file_path.set(payload)
                         self.set_ui_state("normal")
                     
                     elif type_ == "DONE_REPORT":
+                        self.finish_job()
                         self.log("✓ Relatório Diário concluído.")
                         self.final_excel_path, self.final_txt_path = payload, msg[2]
                         # Habilita botões do diário e o botão de rodar Quadras
@@ -333,6 +433,7 @@ class App(tk.Tk):
                         messagebox.showinfo("Sucesso", "Passo 2 Concluído! Você já pode abrir os arquivos ou prosseguir para o Passo 3 (Quadras).")
                     
                     elif type_ == "DONE_QUADRAS":
+                        self.finish_job()
                         self.log("✓ Relatório Quadras concluído.")
                         self.final_quadras_path = payload
                         self.btn_open_quadras.config(state="normal")
@@ -346,7 +447,22 @@ class App(tk.Tk):
                         self.set_ui_state("normal")
                         messagebox.showinfo("Sucesso", "Instalação concluída!")
                     
+                    elif type_ == "IMPORT_ERROR":
+                        self.log(f"❌ Erro ao importar módulos: {payload}")
+                        messagebox.showerror("Erro de Importação",
+                                             f"Erro ao importar módulos.\nDetalhe: {payload}\n"
+                                             "Certifique-se de que logic_parser.py, logic_report.py e quadras_report.py estão na mesma pasta "
+                                             "e de que as dependências estão instaladas (botão \"Instalar Dependências\").")
+
+                    elif type_ == "CANCELLED":
+                        self.finish_job(completed=False)
+                        self.log(f"⏹️  {payload} cancelado.")
+                        self.set_ui_state("normal")
+                        if self.final_excel_path:
+                            self.btn_run_quadras.config(state="normal")
+
                     elif type_ == "ERROR":
+                        if self.current_job is not None: self.finish_job(completed=False)
                         self.log(f"❌ {payload}")
                         messagebox.showerror("Erro", payload)
                         self.set_ui_state("normal")
@@ -1,21 +1,93 @@
 import pandas as pd
-import re
+import numpy as np
 import os
-import sys
 from itertools import groupby
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import Alignment, Border, Side, Font, PatternFill
 from openpyxl.utils import get_column_letter
 from pathlib import Path
 
+import logic_storage
+import logic_quadras
+import logic_report
+import logic_profiler
+import logic_jobs
+
 # --- CONFIGURAÇÃO DE ESTILOS ---
 COLOR_GRAY = "D9D9D9"
 COLOR_BLUE = "9BC2E6"
 
-def gerar_relatorio_quadras(input_file, log_callback):
+PASSO_PROGRESSO = 20  # Linhas escritas entre dois avisos de progresso
+
+def _valor_da_celula(valor):
+    """Número como int quando inteiro (float caso contrário); texto e vazios passam direto."""
+    if isinstance(valor, (int, float, np.number)) and not isinstance(valor, bool):
+        numero = float(valor)
+        if np.isnan(numero): return None
+        return int(numero) if numero.is_integer() else numero
+    return valor
+
+def _limiar_do_cabecalho(cabecalhos):
+    """
+    Limiar da região a partir do rótulo da última coluna ('>10', em uma das
+    linhas de cabeçalho, conforme a mesclagem); o padrão se não der para ler.
+    """
+    for rotulo in (linha[-1] for linha in cabecalhos):
+        if isinstance(rotulo, str) and rotulo.strip().startswith('>'):
+            numero = pd.to_numeric(rotulo.strip()[1:], errors='coerce')
+            if not pd.isna(numero):
+                return int(numero) if float(numero).is_integer() else float(numero)
+    return logic_report.LIMIAR
+
+def estrutura_de_grade(df_main):
+    """
+    Estrutura do relatório diário (mesmo formato de logic_report.montar_estrutura)
+    a partir da grade de texto da planilha: para relatórios gerados em outra execução.
+    """
+    grade = df_main.astype(object).where(df_main.notna(), None)
+    posicao_total = np.flatnonzero(grade[1].map(lambda v: str(v).strip().upper() == 'TOTAL').to_numpy())
+    fim_dados = posicao_total[0] if len(posicao_total) else len(grade)
+
+    # Dados e total com os números de volta a int/float (o logradouro fica como texto)
+    bloco = grade.iloc[3:fim_dados + 1].copy()
+    contagens = []
+    for col in bloco.columns:
+        if col == 1: continue
+        numeros = pd.to_numeric(bloco[col], errors='coerce')
+        bloco[col] = pd.Series([
+            valor if np.isnan(n) else (int(n) if n.is_integer() else n)
+            for valor, n in zip(bloco[col], numeros.astype(np.float64).tolist())
+        ], index=bloco.index, dtype=object)
+        if col >= 2:
+            contagens.append(numeros.fillna(0).to_numpy(dtype=np.float64)[:fim_dados - 3])
+    dados = bloco.iloc[:fim_dados - 3]
+
+    cabecalhos = grade.iloc[:3].values.tolist()
+    # Colunas de média: do rótulo 'Média por período' (2ª linha) até antes da do limiar
+    rotulos = [str(valor).strip() for valor in cabecalhos[1]]
+    n_periodos = len(logic_report.PERIODOS)
+    if 'Média por período' in rotulos:
+        n_periodos = len(rotulos) - 1 - rotulos.index('Média por período')
+    return {
+        'cabecalhos': cabecalhos,
+        'linhas': dados.values.tolist(),
+        'logradouros': dados[1].tolist(),
+        'visiveis': dados[dados.columns[-1]].map(lambda v: v is not None and str(v).strip() != '').to_numpy(dtype=bool),
+        'contagens': np.column_stack(contagens) if contagens else np.zeros((len(dados), 0)),
+        'total': bloco.iloc[-1].tolist() if len(posicao_total) else None,
+        'limiar': _limiar_do_cabecalho(cabecalhos),
+        'n_periodos': n_periodos,
+    }
+
+def gerar_relatorio_quadras(input_file, log_callback, estrutura=None):
     """
     Função principal corrigida mantendo toda a formatação original.
+    `estrutura` é a estrutura em memória do relatório diário
+    (logic_report.montar_estrutura); sem ela, usa a do relatório gerado neste
+    processo ou lê a grade gravada ao lado do .xlsx.
     """
+    perfil = logic_profiler.perfil_de(log_callback)
+    tarefa = logic_jobs.tarefa_de(log_callback)
     log_callback(f"Iniciando processamento de Quadras...")
     log_callback(f"Lendo arquivo: {os.path.basename(input_file)}")
 
@@ -32,233 +104,202 @@ def gerar_relatorio_quadras(input_file, log_callback):
     output_file = base_path / output_filename
     
     # Arquivo de mapeamento
-    script_dir = Path(__file__).resolve().parent
-    mapping_file_xlsx = script_dir / 'Mapeamento_FINAL_editado.xlsx'
+    mapping_file_xlsx = logic_quadras.ARQUIVO_MAPEAMENTO
 
     if not mapping_file_xlsx.exists():
         raise FileNotFoundError(f"Arquivo de mapeamento não encontrado em: {mapping_file_xlsx}")
 
-    # 1. CARREGAR DADOS
-    try:
-        df_map = pd.read_excel(mapping_file_xlsx)
-        df_map['Nome Original Norm'] = df_map['Nome Original'].astype(str).str.lower().str.strip()
-        log_callback("✓ Mapeamento carregado.")
-    except Exception as e:
-        raise Exception(f"Erro ao ler mapeamento: {e}")
-
-    try:
-        df_main = pd.read_excel(input_file, header=None, dtype=str, engine='openpyxl')
-    except Exception as e:
-        raise Exception(f"Erro ao ler input: {e}")
+    with perfil.etapa('quadras', 'load'):
+        # 1. CARREGAR DADOS (índice de quadras compilado, em cache ao lado do mapeamento)
+        try:
+            indice_quadras = logic_quadras.carregar_indice_quadras(mapping_file_xlsx, log_callback)
+        except Exception as e:
+            raise Exception(f"Erro ao ler mapeamento: {e}")
 
-    # 2. FUNÇÃO: ENCONTRAR QUADRA
-    def find_quadra(logradouro, df_map_ref):
-        if pd.isna(logradouro): return None
-        logradouro_str = str(logradouro).strip()
-        match = re.match(r"^(.*?),\s*(\d+)", logradouro_str)
-        
-        if match:
-            nome = match.group(1).strip().lower()
-            try: num = int(match.group(2))
-            except: num = 0
-        else:
-            nome = logradouro_str.lower()
-            num = 0
-        
-        cands = df_map_ref[df_map_ref['Nome Original Norm'] == nome]
-        if cands.empty: return None
-        
-        for _, r in cands.iterrows():
+        # Estrutura do relatório diário: em memória, se ele foi gerado neste processo;
+        # senão, a partir da grade gravada em data/processed
+        estrutura = estrutura or logic_report.estrutura_do_relatorio(input_file)
+        if estrutura is None:
             try:
-                # Proteção contra NaN no mapeamento
-                n_min = pd.to_numeric(r['Num Min'], errors='coerce')
-                n_max = pd.to_numeric(r['Num Max'], errors='coerce')
-                if pd.notna(n_min) and pd.notna(n_max):
-                    if int(n_min) <= num <= int(n_max):
-                        return r['Quadra']
-            except: continue
-        return None
+                estrutura = estrutura_de_grade(logic_storage.ler_grade_relatorio(input_file))
+            except Exception as e:
+                raise Exception(f"Erro ao ler input: {e}")
 
-    # 3. PROCESSAMENTO
-    log_callback("Processando linhas e identificando quadras...")
+    tarefa.progresso("Localizando quadras")
+    with perfil.etapa('quadras', 'aggregate'):
+        # 2-3. PROCESSAMENTO (quadras de todas as linhas em uma busca vetorizada no índice)
+        log_callback("Processando linhas e identificando quadras...")
     
-    header = [df_main.iloc[0], df_main.iloc[1], df_main.iloc[2]]
-    data = df_main.iloc[3:]
+        header = estrutura['cabecalhos']
+        linhas = estrutura['linhas']
+        visiveis = estrutura['visiveis']
+        contagens = estrutura['contagens']
+        limiar = estrutura['limiar']
+        quadras_por_linha = logic_quadras.localizar_quadras(estrutura['logradouros'], indice_quadras)
 
-    total_row = None
-    cleaned_rows = []
-
-    for idx, row in data.iterrows():
-        c0 = str(row[0]).lower() if pd.notna(row[0]) else ""
-        c1 = str(row[1]).lower() if pd.notna(row[1]) else ""
-        
-        if "total" in c0 or "total" in c1:
-            total_row = row
-        else:
-            quadra = find_quadra(row[1], df_map)
-            val_gt10 = row[18] if len(row) > 18 else None 
-            is_visible = pd.notna(val_gt10) and str(val_gt10).strip() != ""
-            
-            cleaned_rows.append({
-                'data': row.tolist(), 
-                'quadra': quadra, 
-                'visible': is_visible, 
-                'original_idx': idx
-            })
+        # Layout do relatório diário: Ordem, Logradouro, dias de cada período, uma média por período e a do limiar
+        colunas_totais = len(header[1])
+        col_maior10 = colunas_totais - 1
+        col_medias = col_maior10 - estrutura['n_periodos']
 
-    cleaned_rows.sort(key=lambda x: (x['quadra'] if x['quadra'] else "ZZZ_SEM_QUADRA", x['original_idx']))
+        ordem = np.array(
+            sorted(range(len(linhas)), key=lambda i: (quadras_por_linha[i] if quadras_por_linha[i] else "ZZZ_SEM_QUADRA", i)),
+            dtype=np.intp
+        )
 
-    final_structure = []
+        # Subtotais: soma das linhas visíveis de cada quadra (colunas de dados e médias, sem a do limiar),
+        # com as linhas já ordenadas por quadra, em uma única redução por blocos contíguos
+        log_callback("Calculando subtotais...")
+        quadras_ordenadas = quadras_por_linha[ordem]
+        somadas = ordem[visiveis[ordem] & pd.notna(quadras_ordenadas)]
+        subtotais = {}
+        if len(somadas):
+            quadras_somadas = quadras_por_linha[somadas]
+            inicios = np.flatnonzero(np.r_[True, quadras_somadas[1:] != quadras_somadas[:-1]])
+            somas = np.add.reduceat(contagens[somadas, :-1], inicios, axis=0)
+            n_visiveis = np.diff(np.r_[inicios, len(somadas)])
+            subtotais = {
+                quadras_somadas[inicio]: somas[g] for g, inicio in enumerate(inicios) if n_visiveis[g] > 1
+            }
 
-    log_callback("Calculando subtotais...")
-    for key, group in groupby(cleaned_rows, key=lambda x: x['quadra']):
-        group_list = list(group)
-        for item in group_list:
-            final_structure.append({'type':'data', 'values':item['data'], 'visible':item['visible']})
+        final_structure = []
+        for key, group in groupby(ordem.tolist(), key=lambda i: quadras_por_linha[i]):
+            for i in group:
+                final_structure.append({'type':'data', 'values':list(linhas[i]), 'visible':bool(visiveis[i])})
         
-        if key is None: continue
-        visible_rows_in_group = [it for it in group_list if it['visible']]
+            if key is None or key not in subtotais: continue
         
-        if len(visible_rows_in_group) > 1:
-            sub_vals = [""] * 19
+            sub_vals = [""] * colunas_totais
             sub_vals[1] = f"Subtotal"
-            for c in range(2, 18):
-                soma = 0
-                for it in visible_rows_in_group:
-                    # Proteção: converte para numérico e ignora NaN na soma
-                    v = pd.to_numeric(it['data'][c], errors='coerce')
-                    if pd.notna(v): soma += v
-                sub_vals[c] = int(round(soma)) # Aqui agora soma é sempre um número (ou 0)
-            
+            sub_vals[2:col_maior10] = np.rint(subtotais[key]).astype(np.int64).tolist()
             final_structure.append({'type':'subtotal', 'values':sub_vals, 'visible':True})
 
-    if total_row is not None:
-        final_structure.append({'type':'total_geral', 'values':total_row.tolist(), 'visible':True})
+        total_geral = estrutura['total']
+        if total_geral is not None:
+            final_structure.append({'type':'total_geral', 'values':list(total_geral), 'visible':True})
+
+    with perfil.etapa('quadras', 'format'):
+        # 4. WRITER EXCEL (EXATAMENTE SUA FORMATAÇÃO ORIGINAL)
+        log_callback("Gerando Excel final...")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Relatorio"
 
-    # 4. WRITER EXCEL (EXATAMENTE SUA FORMATAÇÃO ORIGINAL)
-    log_callback("Gerando Excel final...")
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Relatorio"
+        thin = Side(border_style="thin", color="000000")
+        border_all = Border(top=thin, left=thin, right=thin, bottom=thin)
+        align_center = Alignment(horizontal="center", vertical="center")
+        align_left = Alignment(horizontal="left", vertical="center")
+        font_bold = Font(bold=True)
+        fill_gray = PatternFill(start_color=COLOR_GRAY, end_color=COLOR_GRAY, fill_type="solid")
+        fill_blue = PatternFill(start_color=COLOR_BLUE, end_color=COLOR_BLUE, fill_type="solid")
 
-    thin = Side(border_style="thin", color="000000")
-    border_all = Border(top=thin, left=thin, right=thin, bottom=thin)
-    align_center = Alignment(horizontal="center", vertical="center")
-    align_left = Alignment(horizontal="left", vertical="center")
-    font_bold = Font(bold=True)
-    fill_gray = PatternFill(start_color=COLOR_GRAY, end_color=COLOR_GRAY, fill_type="solid")
-    fill_blue = PatternFill(start_color=COLOR_BLUE, end_color=COLOR_BLUE, fill_type="solid")
+        def apply_style(rng, border=True, fill=None, bold=False, align="center"):
+            rows = ws[rng] if ':' in rng else [[ws[rng]]]
+            for r in rows:
+                for c in r:
+                    if border: c.border = border_all
+                    if fill: c.fill = fill
+                    if bold: c.font = font_bold
+                    c.alignment = align_left if align == "left" else align_center
 
-    def apply_style(rng, border=True, fill=None, bold=False, align="center"):
-        rows = ws[rng] if ':' in rng else [[ws[rng]]]
-        for r in rows:
-            for c in r:
-                if border: c.border = border_all
-                if fill: c.fill = fill
-                if bold: c.font = font_bold
-                c.alignment = align_left if align == "left" else align_center
+        ultima = get_column_letter(colunas_totais)
 
-    # Cabeçalhos originais
-    ws.merge_cells("A1:S1"); ws["A1"] = header[0][0]; apply_style("A1:S1", fill=fill_gray, bold=True)
+        # Cabeçalhos originais
+        ws.merge_cells(f"A1:{ultima}1"); ws["A1"] = header[0][0]; apply_style(f"A1:{ultima}1", fill=fill_gray, bold=True)
     
-    h1 = header[1].fillna('').tolist()
-    ws.merge_cells("A2:A3"); ws["A2"] = h1[0]; apply_style("A2:A3", fill=fill_gray, bold=True)
-    ws["B2"] = h1[1]; apply_style("B2", fill=fill_gray, bold=True)
+        h1 = ['' if v is None else v for v in header[1]]
+        ws.merge_cells("A2:A3"); ws["A2"] = h1[0]; apply_style("A2:A3", fill=fill_gray, bold=True)
+        ws["B2"] = h1[1]; apply_style("B2", fill=fill_gray, bold=True)
     
-    ranges = [("C2:E2",2),("F2:H2",5),("I2:K2",8),("L2:N2",11),("O2:R2",14),("S2:S3",18)]
-    for rng, idx in ranges:
-        ws.merge_cells(rng); ws[rng.split(':')[0]] = h1[idx]; apply_style(rng, fill=fill_gray, bold=True)
+        # Um bloco mesclado por período (do rótulo até o próximo rótulo), o das médias e o do limiar
+        inicios_blocos = [i for i in range(2, col_maior10) if h1[i] != ''] + [col_maior10]
+        ranges = [
+            (f"{get_column_letter(ini + 1)}2:{get_column_letter(fim)}2", ini)
+            for ini, fim in zip(inicios_blocos, inicios_blocos[1:])
+        ]
+        ranges.append((f"{ultima}2:{ultima}3", col_maior10))
+        for rng, idx in ranges:
+            ws.merge_cells(rng); ws[rng.split(':')[0]] = h1[idx]; apply_style(rng, fill=fill_gray, bold=True)
     
-    h2 = header[2].fillna('').tolist()
-    ws["B3"] = h2[1]; apply_style("B3", fill=fill_gray, bold=True)
-    for i in range(2, 18):
-        l = get_column_letter(i+1)
-        v = h2[i]
-        if isinstance(v, str) and v.endswith('.0'): v = v[:-2]
-        ws[f"{l}3"] = v
-        apply_style(f"{l}3", fill=fill_gray, bold=True)
+        h2 = ['' if v is None else v for v in header[2]]
+        ws["B3"] = h2[1]; apply_style("B3", fill=fill_gray, bold=True)
+        for i in range(2, col_maior10):
+            l = get_column_letter(i+1)
+            v = h2[i]
+            if isinstance(v, str) and v.endswith('.0'): v = v[:-2]
+            ws[f"{l}3"] = v
+            apply_style(f"{l}3", fill=fill_gray, bold=True)
 
-    # Escrita dos Dados
-    current_row = 4
-    total_geral_vals = []
-    visible_counter = 1 
+        # Escrita dos Dados (valores já numéricos na estrutura; só normaliza int/float)
+        current_row = 4
+        visible_counter = 1 
 
-    for item in final_structure:
-        vals = item['values']
-        rtype = item['type']
-        is_visible = item['visible']
-        
-        if not is_visible:
-            ws.row_dimensions[current_row].hidden = True
-        else:
-            if rtype == 'data':
-                vals[0] = visible_counter
-                visible_counter += 1
+        total_celulas = len(final_structure) * colunas_totais
+        for numero, item in enumerate(final_structure):
+            if numero % PASSO_PROGRESSO == 0:
+                tarefa.progresso("Células formatadas", numero * colunas_totais, total_celulas)
+            vals = item['values']
+            rtype = item['type']
+            is_visible = item['visible']
         
-        # Coleta para média (Protegida contra NaN)
-        if rtype == 'total_geral':
-            for i in range(2, 14):
-                v_num = pd.to_numeric(vals[i], errors='coerce')
-                if pd.notna(v_num): 
-                    total_geral_vals.append(float(v_num))
-                else:
-                    total_geral_vals.append(0.0)
-                
-        for i, val in enumerate(vals):
-            if i >= 19: break # Proteção de limite de colunas
-            cell = ws.cell(row=current_row, column=i+1)
-            
-            # Conversão segura para exibição
-            f_val = pd.to_numeric(val, errors='coerce')
-            if pd.notna(f_val):
-                cell.value = int(f_val) if f_val.is_integer() else f_val
+            if not is_visible:
+                ws.row_dimensions[current_row].hidden = True
             else:
-                cell.value = val
+                if rtype == 'data':
+                    vals[0] = visible_counter
+                    visible_counter += 1
+        
+            for i, val in enumerate(vals[:colunas_totais]):
+                cell = ws.cell(row=current_row, column=i+1, value=_valor_da_celula(val))
             
-            # Estilo condicional
-            fill = None
-            bold = False
-            if rtype in ['subtotal', 'total_geral']:
-                fill = fill_gray
-                bold = True
-            elif i != 0 and i != 18 and isinstance(cell.value, (int, float)) and cell.value > 10:
-                fill = fill_blue
+                # Estilo condicional
+                fill = None
+                bold = False
+                if rtype in ['subtotal', 'total_geral']:
+                    fill = fill_gray
+                    bold = True
+                elif i != 0 and i != col_maior10 and isinstance(cell.value, (int, float)) and cell.value > limiar:
+                    fill = fill_blue
                 
-            cell.border = border_all
-            if fill: cell.fill = fill
-            if bold: cell.font = font_bold
-            cell.alignment = align_left if i == 1 else align_center
-        current_row += 1
+                cell.border = border_all
+                if fill: cell.fill = fill
+                if bold: cell.font = font_bold
+                cell.alignment = align_left if i == 1 else align_center
+            current_row += 1
 
-    # Rodapé protegido contra listas vazias ou NaN
-    avg = 0
-    if total_geral_vals:
-        avg = int(round(sum(total_geral_vals)/len(total_geral_vals)))
+        # Rodapé protegido contra listas vazias ou NaN
+        # Média do total geral nas colunas de dias (sem as médias e a do limiar)
+        avg = 0
+        if total_geral is not None and col_medias > 2:
+            totais_dias = pd.to_numeric(pd.Series(total_geral[2:col_medias], dtype=object), errors='coerce').fillna(0.0)
+            avg = int(round(float(totais_dias.mean())))
 
-    ft_row = current_row + 1
-    def wft(r, t, b=False):
-        c = ws.cell(row=r, column=2, value=t)
-        c.font = Font(size=10, bold=b)
-        c.alignment = align_left
+        ft_row = current_row + 1
+        def wft(r, t, b=False):
+            c = ws.cell(row=r, column=2, value=t)
+            c.font = Font(size=10, bold=b)
+            c.alignment = align_left
 
-    wft(ft_row, "Nota: As ruas sem aglomeração (>10) no período solicitado estão ocultas, mas constam na planilha.")
-    wft(ft_row+1, "Fonte: SMS/Redenção na Rua")
+        wft(ft_row, f"Nota: As ruas sem aglomeração (>{limiar:g}) no período solicitado estão ocultas, mas constam na planilha.")
+        wft(ft_row+1, "Fonte: SMS/Redenção na Rua")
     
-    from datetime import datetime
-    wft(ft_row+2, f"Elaborado por: SGM/SEPE, em {datetime.now().strftime('%d/%m/%Y')}")
+        from datetime import datetime
+        wft(ft_row+2, f"Elaborado por: SGM/SEPE, em {datetime.now().strftime('%d/%m/%Y')}")
     
-    mr = ft_row + 4
-    ws.cell(row=mr, column=2, value="Média:").font = font_bold
-    ws.cell(row=mr, column=2).alignment = Alignment(horizontal="right")
-    ws.cell(row=mr, column=3, value=avg).font = font_bold
-    ws.cell(row=mr, column=3).alignment = align_left
+        mr = ft_row + 4
+        ws.cell(row=mr, column=2, value="Média:").font = font_bold
+        ws.cell(row=mr, column=2).alignment = Alignment(horizontal="right")
+        ws.cell(row=mr, column=3, value=avg).font = font_bold
+        ws.cell(row=mr, column=3).alignment = align_left
 
-    # Larguras das colunas
-    ws.column_dimensions['A'].width = 8
-    ws.column_dimensions['B'].width = 65
-    for i in range(3, 20): ws.column_dimensions[get_column_letter(i)].width = 8
+        # Larguras das colunas
+        ws.column_dimensions['A'].width = 8
+        ws.column_dimensions['B'].width = 65
+        for i in range(3, colunas_totais + 1): ws.column_dimensions[get_column_letter(i)].width = 8
 
+    tarefa.progresso("Células formatadas", total_celulas, total_celulas)
     log_callback(f"Salvando arquivo: {output_filename}")
-    wb.save(output_file)
+    with perfil.etapa('quadras', 'write'):
+        wb.save(output_file)
     
     return str(output_file)
\ No newline at end of file
@@ -0,0 +1,47 @@
+# tests/conftest.py
+# Os módulos do projeto ficam na raiz de Controle_de_Aglomeracoes (layout plano),
+# como nos benchmarks: a pasta entra no sys.path antes dos testes.
+#
+# Uso (a partir da pasta Controle_de_Aglomeracoes):
+#   python -m pytest -q
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+if str(PASTA_PROJETO) not in sys.path:
+    sys.path.insert(0, str(PASTA_PROJETO))
+
+# --- Benchmarks (opcionais) ---
+# Os testes marcados com @pytest.mark.benchmark (tests/test_benchmarks.py) rodam
+# os casos de benchmarks/bench_pipeline.py e só são executados com --benchmarks:
+#   python -m pytest tests/test_benchmarks.py --benchmarks --benchmark-tamanhos 10k,100k
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup('benchmarks')
+    grupo.addoption('--benchmarks', action='store_true',
+                    help='roda os benchmarks e compara com benchmarks/baseline.json')
+    grupo.addoption('--benchmark-tamanhos', default='10k',
+                    help='tamanhos das planilhas sintéticas, separados por vírgula (padrão: 10k)')
+    grupo.addoption('--benchmark-repeticoes', type=int, default=3,
+                    help='repetições de cada caso (vale o menor tempo; padrão: 3)')
+    grupo.addoption('--benchmark-tolerancia', type=float, default=None,
+                    help='fator de regressão sobre a linha de base (padrão: bench_pipeline.TOLERANCIA)')
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: benchmark lento, só roda com --benchmarks')
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmarks'):
+        return
+    pular = pytest.mark.skip(reason='benchmark: use --benchmarks para rodar')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(pular)
+
+def pytest_generate_tests(metafunc):
+    if 'tamanho_benchmark' in metafunc.fixturenames:
+        tamanhos = [t.strip() for t in metafunc.config.getoption('--benchmark-tamanhos').split(',') if t.strip()]
+        metafunc.parametrize('tamanho_benchmark', tamanhos)
@@ -0,0 +1,44 @@
+# tests/test_agregados.py
+# Tabela diária de agregados (logic_agregados): sincronização por conteúdo e
+# acumulados por limiar gravados junto com a tabela.
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import logic_agregados
+import logic_report
+
+def _linhas(datas, qtd=12.0):
+    return pd.DataFrame({
+        'data': pd.to_datetime(datas, dayfirst=True),
+        'logradouro': 'Rua A, 1',
+        'periodo_norm': 'manhã',
+        'qtd_pessoas': qtd,
+    })
+
+def test_nova_exportacao_so_soma_linhas_novas(tmp_path):
+    caminho = tmp_path / logic_agregados.ARQUIVO_AGREGADOS
+    base = _linhas(['10/02/2025', '11/02/2025'])
+    _, somadas = logic_agregados.sincronizar_agregados(caminho, base, logic_report.PERIODOS, logic_report.LIMIAR)
+    assert somadas == 2
+    exportacao = pd.concat([base, _linhas(['12/02/2025'])]).iloc[::-1].reset_index(drop=True)
+    agregados, somadas = logic_agregados.sincronizar_agregados(
+        caminho, exportacao, logic_report.PERIODOS, logic_report.LIMIAR
+    )
+    assert somadas == 1
+    assert agregados.soma.sum() == 36
+
+def test_limiares_gravados_com_os_acumulados(tmp_path):
+    caminho = tmp_path / logic_agregados.ARQUIVO_AGREGADOS
+    df = _linhas(['10/02/2025', '11/02/2025', '12/02/2025'], qtd=[4.0, 8.0, 12.0])
+    logic_agregados.sincronizar_agregados(caminho, df, logic_report.PERIODOS, logic_report.LIMIAR, limiares=[5])
+
+    gravada = logic_agregados.carregar_agregados(caminho)
+    assert gravada.limiares == [logic_report.LIMIAR, 5]
+    # Lida (ou copiada para um processo do lote) com os acumulados prontos
+    copia = pickle.loads(pickle.dumps(gravada))
+    assert np.array_equal(copia._acum_acima[5], gravada._acum_acima[5])
+    resumo = copia.resumo_janela(pd.Timestamp(2025, 2, 12), 3, limiar=5)
+    assert resumo['aglomeracoes_dia'] * resumo['dias'] == 2
@@ -0,0 +1,30 @@
+# tests/test_benchmarks.py
+# Entrada do pytest para os benchmarks de benchmarks/bench_pipeline.py: cada
+# caso roda no seu processo, em uma cópia temporária do projeto, e falha se o
+# menor tempo passar da linha de base (benchmarks/baseline.json) vezes a
+# tolerância. Só roda com --benchmarks (ver tests/conftest.py).
+
+import pytest
+
+from benchmarks import bench_pipeline
+
+pytestmark = pytest.mark.benchmark
+
+@pytest.fixture(scope='module')
+def baseline():
+    return bench_pipeline.carregar_baseline()
+
+@pytest.mark.parametrize('caso', bench_pipeline.CASOS)
+def test_sem_regressao(caso, tamanho_benchmark, baseline, pytestconfig):
+    referencia = bench_pipeline.referencia(baseline, caso, tamanho_benchmark)
+    if referencia is None:
+        pytest.skip(f"sem linha de base para {caso} ({tamanho_benchmark})")
+    tolerancia = pytestconfig.getoption('--benchmark-tolerancia') or bench_pipeline.TOLERANCIA
+
+    resultado = bench_pipeline.medir_em_ambiente(caso, tamanho_benchmark, pytestconfig.getoption('--benchmark-repeticoes'))
+
+    razao = resultado['min_s'] / referencia
+    assert razao <= tolerancia, (
+        f"{caso} ({tamanho_benchmark}): {resultado['min_s']:.3f} s contra {referencia:.3f} s "
+        f"na linha de base ({razao:.2f}x, tolerância {tolerancia:.2f}x)"
+    )
@@ -0,0 +1,29 @@
+# tests/test_cache_logradouros.py
+# Limites dos caches de logradouros: o LRU em memória do ParserLogradouro e o
+# cache persistente de parse_logradouro_dedup (data/processed/cache_logradouros.pkl).
+
+import pandas as pd
+
+import logic_parser
+
+def test_parser_lru_mantem_os_mais_usados():
+    parser = logic_parser.ParserLogradouro(maximo_cache=2)
+    parser('Rua A, 1')
+    parser('Rua B, 2')
+    parser('Rua A, 1')  # A passa a ser o mais recente
+    parser('Rua C, 3')  # descarta B
+    assert list(parser._cache) == ['Rua A, 1', 'Rua C, 3']
+
+def test_cache_persistente_limitado(tmp_path):
+    cache = {}
+    logic_parser.parse_logradouro_dedup(pd.Series(['Rua A', 'Rua B', 'Rua C'], dtype=object), cache, maximo_cache=3)
+    _, estatisticas = logic_parser.parse_logradouro_dedup(
+        pd.Series(['Rua D', 'Rua A'], dtype=object), cache, maximo_cache=3
+    )
+    # Saem os que não estão na planilha atual, do usado há mais tempo para o mais recente
+    assert list(cache) == ['Rua C', 'Rua D', 'Rua A']
+    assert estatisticas['descartados'] == 1
+
+    arquivo = tmp_path / logic_parser.ARQUIVO_CACHE_LOGRADOUROS
+    logic_parser.salvar_cache_logradouros(arquivo, cache)
+    assert list(logic_parser.carregar_cache_logradouros(arquivo)) == list(cache)
@@ -0,0 +1,44 @@
+# tests/test_inicializacao.py
+# A janela abre antes de pandas, numpy e openpyxl: importar o main_app não
+# pode carregar as bibliotecas pesadas nem os módulos de lógica, e a
+# importação fica dentro de um orçamento de tempo. Cada medição roda em um
+# interpretador novo (ver também benchmarks/bench_inicializacao.py).
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('tkinter')
+
+PASTA_PROJETO = Path(__file__).resolve().parent.parent
+
+MODULOS_PESADOS = ('pandas', 'numpy', 'openpyxl', 'logic_parser', 'logic_report', 'quadras_report')
+ORCAMENTO_IMPORTACAO_S = 0.3  # Com os módulos de lógica no topo do main_app, a importação passava de 0,5 s
+RODADAS = 3
+
+CODIGO_FILHO = '''
+import json, sys, time
+inicio = time.perf_counter()
+import main_app
+print(json.dumps({'importacao_s': time.perf_counter() - inicio, 'modulos': sorted(sys.modules)}))
+'''
+
+def _importar_main_app():
+    saida = subprocess.run([sys.executable, '-c', CODIGO_FILHO], cwd=PASTA_PROJETO,
+                           capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+@pytest.fixture(scope='module')
+def rodadas():
+    return [_importar_main_app() for _ in range(RODADAS)]
+
+def test_main_app_nao_importa_modulos_pesados(rodadas):
+    carregados = [nome for nome in MODULOS_PESADOS if nome in rodadas[0]['modulos']]
+    assert carregados == []
+
+def test_importacao_dentro_do_orcamento(rodadas):
+    melhor = min(rodada['importacao_s'] for rodada in rodadas)
+    assert melhor < ORCAMENTO_IMPORTACAO_S, f"import main_app levou {melhor:.3f} s (orçamento {ORCAMENTO_IMPORTACAO_S} s)"
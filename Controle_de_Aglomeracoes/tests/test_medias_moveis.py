@@ -0,0 +1,35 @@
+# tests/test_medias_moveis.py
+# Seção de médias móveis do texto de análise (logic_text_generator), a partir
+# de uma tabela de agregados diários montada à mão.
+
+from datetime import datetime
+
+import pandas as pd
+
+import logic_agregados
+import logic_report
+import logic_text_generator
+
+def _agregados(datas):
+    df = pd.DataFrame({
+        'data': pd.to_datetime(datas, dayfirst=True),
+        'logradouro': 'Rua A',
+        'periodo_norm': 'manhã',
+        'qtd_pessoas': 20.0,
+    })
+    agregados = logic_agregados.AgregadosDiarios(logic_report.PERIODOS, logic_report.LIMIAR)
+    agregados.anexar(df)
+    return agregados
+
+def test_variacao_com_periodo_anterior():
+    agregados = _agregados(['01/02/2025', '08/02/2025', '09/02/2025'])
+    moveis = logic_report.medias_moveis(agregados, datetime(2025, 2, 14), janelas=(7,))
+    texto = logic_text_generator._format_moving_averages(moveis)
+    assert "(01/02 a 07/02/2025): 20 pessoas/dia — Variação: +0.0%" in texto
+
+def test_sem_dados_no_periodo_anterior():
+    agregados = _agregados(['10/02/2025', '12/02/2025'])
+    moveis = logic_report.medias_moveis(agregados, datetime(2025, 2, 14), janelas=(7,))
+    texto = logic_text_generator._format_moving_averages(moveis)
+    assert texto.splitlines()[1] == "  7 dias anteriores (01/02 a 07/02/2025): sem dados no período anterior"
+    assert "Variação" not in texto
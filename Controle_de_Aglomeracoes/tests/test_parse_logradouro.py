@@ -0,0 +1,83 @@
+# tests/test_parse_logradouro.py
+# Teste de referência (golden) dos parsers de logradouro. As saídas em
+# dados/parse_logradouro_golden.json foram gravadas com o parse_logradouro
+# original (regex por linha, antes do motor vetorizado) e cobrem nulos,
+# números, booleanos, prefixos, numeração, complementos, espaços irregulares
+# e as grafias estranhas das planilhas. Todos os caminhos de parse têm que
+# devolver exatamente as mesmas linhas.
+
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import logic_parser
+from logic_parser import COLUNAS_LOGRADOURO
+
+ARQUIVO_GOLDEN = Path(__file__).resolve().parent / 'dados' / 'parse_logradouro_golden.json'
+
+def _valor(entrada):
+    """Valor de entrada do caso (o JSON guarda o tipo à parte: NaN, None, bool...)."""
+    if entrada['tipo'] == 'nan':
+        return float('nan')
+    if entrada['tipo'] == 'none':
+        return None
+    return entrada['valor']
+
+with open(ARQUIVO_GOLDEN, encoding='utf-8') as f:
+    CASOS = json.load(f)
+
+ENTRADAS = [_valor(caso['entrada']) for caso in CASOS]
+ESPERADO = [caso['esperado'] for caso in CASOS]
+IDS = [repr(valor) for valor in ENTRADAS]
+
+def _linhas(df):
+    return df[COLUNAS_LOGRADOURO].to_numpy(dtype=object).tolist()
+
+@pytest.mark.parametrize('valor, esperado', zip(ENTRADAS, ESPERADO), ids=IDS)
+def test_parse_logradouro(valor, esperado):
+    resultado = logic_parser.parse_logradouro(valor)
+    assert [resultado[coluna] for coluna in COLUNAS_LOGRADOURO] == esperado
+
+def test_parser_com_cache():
+    # Duas passadas: a segunda sai toda do cache em memória
+    parser = logic_parser.ParserLogradouro()
+    for _ in range(2):
+        linhas = [[resultado[coluna] for coluna in COLUNAS_LOGRADOURO] for resultado in map(parser, ENTRADAS)]
+        assert linhas == ESPERADO
+
+def test_parser_com_cache_pequeno():
+    # Cache menor que o número de entradas: o descarte não pode mudar o resultado
+    parser = logic_parser.ParserLogradouro(maximo_cache=8)
+    for _ in range(2):
+        linhas = [[resultado[coluna] for coluna in COLUNAS_LOGRADOURO] for resultado in map(parser, ENTRADAS)]
+        assert linhas == ESPERADO
+
+def test_parse_logradouro_serie():
+    serie = pd.Series(ENTRADAS, dtype=object, index=range(10, 10 + len(ENTRADAS)))
+    resultado = logic_parser.parse_logradouro_serie(serie)
+    assert list(resultado.index) == list(serie.index)
+    assert _linhas(resultado) == ESPERADO
+
+def test_parse_logradouro_serie_fallback():
+    # '\0' dentro de um valor desvia a coluna para o parse linha a linha
+    serie = pd.Series(ENTRADAS + ['Rua\0Augusta'], dtype=object)
+    resultado = logic_parser.parse_logradouro_serie(serie)
+    assert _linhas(resultado)[:-1] == ESPERADO
+
+def test_parse_logradouro_dedup():
+    # Cada valor aparece três vezes, fora de ordem
+    serie = pd.Series(ENTRADAS * 3, dtype=object)[::-1].reset_index(drop=True)
+    resultado, estatisticas = logic_parser.parse_logradouro_dedup(serie)
+    assert _linhas(resultado) == (ESPERADO * 3)[::-1]
+    assert estatisticas['hits'] == 0
+
+def test_parse_logradouro_dedup_cache_persistente():
+    # Segunda execução com o mesmo cache: tudo sai do cache, mesmo resultado
+    serie = pd.Series(ENTRADAS, dtype=object)
+    cache = {}
+    logic_parser.parse_logradouro_dedup(serie, cache=cache)
+    resultado, estatisticas = logic_parser.parse_logradouro_dedup(serie, cache=cache)
+    assert _linhas(resultado) == ESPERADO
+    assert estatisticas['misses'] == 0
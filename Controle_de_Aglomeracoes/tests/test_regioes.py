@@ -0,0 +1,44 @@
+# tests/test_regioes.py
+# Definições de regiões (logic_regioes) e o relatório de uma região que usa só
+# parte dos períodos: cubo, colunas e texto de análise seguem os períodos dela.
+
+import pandas as pd
+import pytest
+
+import logic_regioes
+import logic_report
+
+def test_periodos_da_regiao():
+    regiao = logic_regioes.normalizar_regiao(
+        {'nome': 'Noturno', 'periodos': ['noite', 'madrugada']}, logic_report.LIMIAR, logic_report.PERIODOS
+    )
+    assert regiao['periodos'] == ['madrugada', 'noite']  # Na ordem de PERIODOS
+    padrao = logic_regioes.normalizar_regiao({'nome': 'Centro'}, logic_report.LIMIAR, logic_report.PERIODOS)
+    assert padrao['periodos'] == logic_report.PERIODOS
+
+@pytest.mark.parametrize('periodos', [[], 'noite', ['noite', 'almoço']])
+def test_periodos_invalidos(periodos):
+    with pytest.raises(ValueError):
+        logic_regioes.normalizar_regiao({'nome': 'X', 'periodos': periodos}, logic_report.LIMIAR, logic_report.PERIODOS)
+
+def test_relatorio_com_parte_dos_periodos(tmp_path):
+    dias = pd.to_datetime(['10/02/2025', '11/02/2025', '12/02/2025'], dayfirst=True)
+    df = pd.DataFrame([
+        {'data': dia, 'logradouro': f'Rua {nome}, 1', 'tipo_logradouro': 'Rua', 'nome_logradouro': nome,
+         'numero_logradouro': '1', 'periodo_norm': periodo, 'qtd_pessoas': 12 + i}
+        for i, dia in enumerate(dias) for nome in ('A', 'B') for periodo in logic_report.PERIODOS
+    ])
+    regiao = logic_regioes.normalizar_regiao(
+        {'nome': 'Noturno', 'periodos': ['madrugada', 'noite']}, logic_report.LIMIAR, logic_report.PERIODOS
+    )
+    docs = tmp_path / 'docs'  # O artefato da grade vai para tmp_path/data/processed
+    docs.mkdir()
+    planilha, txt = logic_report.gerar_relatorio(df, dias[0], dias[-1], docs, lambda mensagem: None, regiao=regiao)
+
+    estrutura = logic_report.estrutura_do_relatorio(planilha)
+    assert estrutura['n_periodos'] == 2
+    assert estrutura['cabecalhos'][2][-3:-1] == ['Madrugada', 'Noite']
+    assert estrutura['cabecalhos'][1][-1] == '>10'
+    texto = open(txt, encoding='utf-8').read()
+    assert "foram localizadas 28 pessoas de madrugada (05h) e 26 à noite (20h) do dia 11." in texto
+    assert "Manhã (10h):" not in texto and "Noite (20h) do dia 11/02/2025:" in texto
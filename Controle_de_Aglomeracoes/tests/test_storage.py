@@ -0,0 +1,25 @@
+# tests/test_storage.py
+# Registro em memória da última saída do parser (logic_storage)
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import logic_storage
+
+def test_registro_guarda_so_a_ultima_saida(tmp_path):
+    planilha, base = tmp_path / 'processada.xlsx', tmp_path / 'base_processada.pkl'
+    logic_storage.registrar_processado(planilha, pd.DataFrame({'a': [1]}))
+    logic_storage.registrar_processado(base, pd.DataFrame({'a': [2]}))
+    assert logic_storage.processado_em_memoria(planilha) is None
+    assert logic_storage.processado_em_memoria(base)['a'].tolist() == [2]
+    logic_storage.descartar_processado(base)
+    assert logic_storage.processado_em_memoria(base) is None
+
+def test_registro_entre_threads(tmp_path):
+    caminhos = [tmp_path / f'processada_{i}.xlsx' for i in range(20)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda c: logic_storage.registrar_processado(c, pd.DataFrame({'c': [c.name]})), caminhos))
+    encontrados = [c for c in caminhos if logic_storage.processado_em_memoria(c) is not None]
+    assert len(encontrados) == 1
+    logic_storage.descartar_processado(encontrados[0])